@@ -1,21 +1,310 @@
+import json
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.utils import get_fields_from_path, lookup_spawns_duplicates
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.text import smart_split, unescape_string_literal
+from django.utils.functional import cached_property
 from sdo_app.models import (Student, Subject, StudyGroup, StudentResult, Person, Program, Department, Major, Teacher,
-                            Practice, Lecture, Module, Course, Chair, EvaluationTest, QuestionSection, QuestionAnswers)
-
-admin.site.register(Chair)
-admin.site.register(Course)
-admin.site.register(Department)
-admin.site.register(EvaluationTest)
-admin.site.register(Lecture)
-admin.site.register(Major)
-admin.site.register(Module)
-admin.site.register(Person)
-admin.site.register(Program)
-admin.site.register(Practice)
-admin.site.register(Subject)
-admin.site.register(StudyGroup)
-admin.site.register(Student)
-admin.site.register(StudentResult)
-admin.site.register(Teacher)
-admin.site.register(QuestionSection)
-admin.site.register(QuestionAnswers)
+                            Practice, Lecture, Module, Course, Chair, EvaluationTest, QuestionSection, QuestionAnswers,
+                            FileBlob, ExamSession, BackgroundJob,
+                            PublishedTestSnapshot, SearchDocument, StudentResultArchive, LectureProgress,
+                            ChangeRecord, IdempotentResponse, AnswerSignature, OrgHierarchy)
+
+
+class EstimatedCountPaginator(Paginator):
+    # On Postgres the planner's row estimate replaces COUNT(*) once a changelist grows past the threshold.
+    @cached_property
+    def count(self) -> int:
+        threshold: int = getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 10000)
+
+        if connection.vendor != 'postgresql' or not hasattr(self.object_list, 'query'):
+            return super().count
+
+        sql, params = self.object_list.query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+
+        estimate: int = int((json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']['Plan Rows'])
+        return estimate if estimate > threshold else super().count
+
+
+class IndexedSearchAdmin(admin.ModelAdmin):
+    # '=' fields are matched with exact rather than Django's iexact, which wraps the column in UPPER() and misses the
+    # unique and foreign key indexes; '^' fields keep istartswith and are backed by prefix_search_index. A term that an
+    # exact lookup cannot take (a word against an id) skips that lookup instead of failing the search.
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+
+        if not search_fields or not search_term:
+            return queryset, False
+
+        term_queries: list[Q] = []
+        may_have_duplicates = False
+
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+
+            lookups = [lookup for search_field in search_fields
+                       if (lookup := self.get_search_lookup(queryset.model, search_field, bit)) is not None]
+
+            if not lookups:
+                return queryset.none(), False
+
+            term_queries.append(Q.create([(lookup, bit) for lookup in lookups], connector=Q.OR))
+            may_have_duplicates |= any(lookup_spawns_duplicates(self.opts, lookup) for lookup in lookups)
+
+        return queryset.filter(Q.create(term_queries)), may_have_duplicates
+
+    @staticmethod
+    def get_search_lookup(model, search_field: str, term: str) -> str | None:
+        if search_field.startswith('^'):
+            return f'{search_field[1:]}__istartswith'
+
+        if not search_field.startswith('='):
+            return f'{search_field}__icontains'
+
+        field_path = search_field[1:]
+
+        try:
+            get_fields_from_path(model, field_path)[-1].get_prep_value(term)
+        except (TypeError, ValueError):
+            return None
+
+        return f'{field_path}__exact'
+
+
+class LargeTableAdmin(IndexedSearchAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    ordering = ['-pk']
+
+
+@admin.register(Chair)
+class ChairAdmin(IndexedSearchAdmin):
+    search_fields = ['^name']
+
+
+@admin.register(Department)
+class DepartmentAdmin(IndexedSearchAdmin):
+    list_display = ['name', 'chair']
+    list_select_related = ['chair']
+    search_fields = ['^name']
+    autocomplete_fields = ['chair']
+
+
+@admin.register(Program)
+class ProgramAdmin(IndexedSearchAdmin):
+    list_display = ['name', 'department']
+    list_select_related = ['department']
+    search_fields = ['^name']
+    autocomplete_fields = ['department']
+
+
+@admin.register(Major)
+class MajorAdmin(IndexedSearchAdmin):
+    list_display = ['code', 'name']
+    search_fields = ['=code', '^name']
+    autocomplete_fields = ['programs']
+
+
+@admin.register(Subject)
+class SubjectAdmin(IndexedSearchAdmin):
+    search_fields = ['^name']
+
+
+@admin.register(Person)
+class PersonAdmin(LargeTableAdmin):
+    list_display = ['middle_name', 'first_name', 'last_name', 'user']
+    list_select_related = ['user']
+    search_fields = ['=user__username', '^middle_name']
+    raw_id_fields = ['user']
+
+
+@admin.register(Student)
+class StudentAdmin(LargeTableAdmin):
+    list_display = ['middle_name', 'first_name', 'last_name', 'user']
+    list_select_related = ['user']
+    search_fields = ['=user__username', '^middle_name']
+    raw_id_fields = ['user']
+
+
+@admin.register(Teacher)
+class TeacherAdmin(IndexedSearchAdmin):
+    list_display = ['middle_name', 'first_name', 'last_name', 'position', 'department']
+    list_select_related = ['department']
+    list_filter = ['position']
+    search_fields = ['=user__username', '^middle_name']
+    raw_id_fields = ['user']
+    autocomplete_fields = ['department']
+
+
+@admin.register(StudyGroup)
+class StudyGroupAdmin(IndexedSearchAdmin):
+    list_display = ['name', 'major', 'education_degree']
+    list_select_related = ['major']
+    list_filter = ['education_degree']
+    search_fields = ['^name']
+    autocomplete_fields = ['major', 'students']
+
+
+@admin.register(Course)
+class CourseAdmin(IndexedSearchAdmin):
+    list_display = ['title', 'teacher', 'end_date']
+    list_select_related = ['teacher']
+    date_hierarchy = 'end_date'
+    search_fields = ['^title']
+    autocomplete_fields = ['teacher', 'majors', 'members', 'modules', 'practice', 'evaluation_test']
+
+
+@admin.register(Module)
+class ModuleAdmin(IndexedSearchAdmin):
+    list_display = ['title', 'practice', 'evaluation_test']
+    list_select_related = ['practice', 'evaluation_test']
+    search_fields = ['^title']
+    autocomplete_fields = ['practice', 'evaluation_test']
+
+
+@admin.register(Lecture)
+class LectureAdmin(LargeTableAdmin):
+    list_display = ['title', 'module', 'deadline_date']
+    list_select_related = ['module']
+    search_fields = ['^title']
+    autocomplete_fields = ['module', 'practice', 'evaluation_test']
+
+
+@admin.register(Practice)
+class PracticeAdmin(LargeTableAdmin):
+    list_display = ['title', 'deadline_date', 'max_score', 'final_score_is']
+    list_filter = ['final_score_is']
+    search_fields = ['^title']
+
+
+@admin.register(EvaluationTest)
+class EvaluationTestAdmin(LargeTableAdmin):
+    list_display = ['title', 'deadline_date', 'allowed_attempts', 'final_score_is']
+    list_filter = ['final_score_is']
+    search_fields = ['^title']
+
+
+@admin.register(QuestionSection)
+class QuestionSectionAdmin(LargeTableAdmin):
+    list_display = ['id', 'evaluation_test']
+    list_select_related = ['evaluation_test']
+    search_fields = ['=evaluation_test__id']
+    autocomplete_fields = ['evaluation_test']
+
+
+@admin.register(QuestionAnswers)
+class QuestionAnswersAdmin(LargeTableAdmin):
+    list_display = ['id', 'question_section', 'is_correct', 'score']
+    list_select_related = ['question_section__evaluation_test']
+    list_filter = ['is_correct']
+    search_fields = ['=question_section__id', '=question_section__evaluation_test__id']
+    raw_id_fields = ['question_section']
+
+
+@admin.register(StudentResult)
+class StudentResultAdmin(LargeTableAdmin):
+    list_display = ['id', 'student', 'evaluation_test', 'practice', 'attempt', 'score', 'is_completed']
+    list_select_related = ['student', 'evaluation_test', 'practice']
+    list_filter = ['is_completed']
+    search_fields = ['=student__user__username', '=evaluation_test__id', '=practice__id']
+    autocomplete_fields = ['student', 'evaluation_test', 'practice']
+
+
+@admin.register(StudentResultArchive)
+class StudentResultArchiveAdmin(LargeTableAdmin):
+    list_display = ['id', 'student', 'evaluation_test', 'practice', 'attempts', 'final_score', 'archived_at']
+    list_select_related = ['student', 'evaluation_test', 'practice']
+    search_fields = ['=student__user__username', '=evaluation_test__id', '=practice__id']
+    raw_id_fields = ['student', 'evaluation_test', 'practice']
+    readonly_fields = ['attempts', 'final_result_id', 'final_score', 'archived_at']
+
+
+@admin.register(ExamSession)
+class ExamSessionAdmin(LargeTableAdmin):
+    list_display = ['id', 'student', 'evaluation_test', 'started_at', 'expires_at', 'is_finished']
+    list_select_related = ['student', 'evaluation_test']
+    list_filter = ['is_finished']
+    search_fields = ['=student__user__username', '=evaluation_test__id']
+    raw_id_fields = ['student', 'evaluation_test', 'student_result']
+
+
+@admin.register(FileBlob)
+class FileBlobAdmin(LargeTableAdmin):
+    list_display = ['name', 'size', 'ref_count']
+    search_fields = ['=name']
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'status', 'progress', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['=idempotency_key']
+    readonly_fields = ['locked_at', 'created_at', 'finished_at']
+
+
+@admin.register(PublishedTestSnapshot)
+class PublishedTestSnapshotAdmin(LargeTableAdmin):
+    list_display = ['id', 'evaluation_test', 'version', 'etag', 'created_at']
+    list_select_related = ['evaluation_test']
+    search_fields = ['=evaluation_test__id']
+    raw_id_fields = ['evaluation_test']
+    exclude = ['payload']
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(LargeTableAdmin):
+    list_display = ['id', 'kind', 'object_id', 'title']
+    list_filter = ['kind']
+    raw_id_fields = ['courses']
+    exclude = ['search_vector']
+
+
+@admin.register(LectureProgress)
+class LectureProgressAdmin(LargeTableAdmin):
+    list_display = ['id', 'student', 'course', 'updated_at']
+    list_select_related = ['student', 'course']
+    search_fields = ['=student__user__username', '=course__id']
+    raw_id_fields = ['student', 'course']
+
+
+@admin.register(ChangeRecord)
+class ChangeRecordAdmin(LargeTableAdmin):
+    list_display = ['id', 'model', 'object_id', 'operation', 'created_at']
+    list_filter = ['operation']
+    search_fields = ['=model']
+
+
+@admin.register(IdempotentResponse)
+class IdempotentResponseAdmin(LargeTableAdmin):
+    list_display = ['id', 'user', 'key', 'status_code', 'created_at', 'expires_at']
+    list_select_related = ['user']
+    search_fields = ['=user__username']
+    raw_id_fields = ['user']
+    readonly_fields = ['fingerprint', 'status_code', 'response', 'created_at']
+
+
+@admin.register(AnswerSignature)
+class AnswerSignatureAdmin(LargeTableAdmin):
+    list_display = ['student_result', 'practice', 'student', 'updated_at']
+    # StudentResult.__str__ names its student and task, so those are joined as well.
+    list_select_related = ['student_result__student', 'student_result__evaluation_test', 'student_result__practice',
+                           'practice', 'student']
+    search_fields = ['=student__user__username', '=practice__id']
+    raw_id_fields = ['student_result', 'practice', 'student']
+    exclude = ['signature']
+
+
+@admin.register(OrgHierarchy)
+class OrgHierarchyAdmin(LargeTableAdmin):
+    list_display = ['id', 'ancestor_model', 'ancestor_id', 'descendant_model', 'descendant_id', 'depth']
+    list_filter = ['ancestor_model', 'descendant_model']
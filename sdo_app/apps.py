@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SdoAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sdo_app'
+
+    def ready(self):
+        from . import signals, tasks
@@ -0,0 +1,13 @@
+from django.conf import settings
+from templated_mail.mail import BaseEmailMessage
+
+
+class DeadlineReminderEmail(BaseEmailMessage):
+    template_name = 'email/deadline_reminder.html'
+
+    def prepare(self, to: list[str]) -> 'DeadlineReminderEmail':
+        # Same as BaseEmailMessage.send without sending, so a batch can go through one connection.
+        self.render()
+        self.to = to
+        self.from_email = settings.DEFAULT_FROM_EMAIL
+        return self
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sdo_app.services import StudentResultService
+
+
+class Command(BaseCommand):
+    help = 'Moves results of finished courses into the compressed archive table in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='course_ids',
+                            help='Archive only the given finished course (may be repeated).')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of (student, task) groups moved in one transaction.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to leave room for regular traffic.')
+
+    def handle(self, *args, **options):
+        def progress(archived: int) -> None:
+            self.stdout.write(f'Archived {archived} result(s) so far.')
+            time.sleep(options['pause'])
+
+        archived: int = StudentResultService().archive(options['course_ids'], options['batch_size'], progress)
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} result(s).'))
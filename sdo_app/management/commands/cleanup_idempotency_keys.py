@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from sdo_app.services import IdempotencyService
+
+
+class Command(BaseCommand):
+    help = 'Deletes stored check responses whose Idempotency-Key has expired.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        deleted: int = IdempotencyService().cleanup(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {deleted} idempotency key(s).'))
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sdo_app.models import ChangeRecord
+from sdo_app.services import ChangeFeedService
+
+
+class Command(BaseCommand):
+    help = 'Drops change records superseded by a newer record for the same object, and optionally expires old ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=7,
+                            help='Only compact records older than this, so recent history stays complete.')
+        parser.add_argument('--max-age-days', type=int, default=None,
+                            help='Also drop every record older than this; consumers further behind must resync.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        before: int | None = ChangeRecord.objects.filter(created_at__gte=cutoff).order_by('pk') \
+            .values_list('pk', flat=True).first()
+
+        if before is None:
+            before = (ChangeRecord.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+
+        max_age: timedelta | None = timedelta(days=options['max_age_days']) \
+            if options['max_age_days'] is not None else None
+        deleted: int = ChangeFeedService().compact(before, max_age, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {deleted} change record(s).'))
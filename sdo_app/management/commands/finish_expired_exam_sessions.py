@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sdo_app.services import ExamSessionService
+
+
+class Command(BaseCommand):
+    help = 'Grades exam sessions whose time is over and which were never finished by the student.'
+
+    def handle(self, *args, **options):
+        finished: int = ExamSessionService().finish_expired()
+        self.stdout.write(self.style.SUCCESS(f'Finished {finished} expired exam session(s).'))
@@ -0,0 +1,38 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from sdo_app.models import StudentResult
+from sdo_app.services import SimilarityService
+from sdo_app.similarity import minhash
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds MinHash signatures of practice answers used to find near-duplicate submissions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--practice', type=int, default=None, help='Only rebuild answers to this practice.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        similarity_service = SimilarityService()
+        student_results = StudentResult.objects.filter(practice__isnull=False).order_by('pk')
+
+        if options['practice'] is not None:
+            student_results = student_results.filter(practice_id=options['practice'])
+
+        # Workers only hash text, reading answers and writing signatures stays in this process.
+        connections.close_all()
+        last_id: int = 0
+        indexed: int = 0
+
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            while batch := list(student_results.filter(pk__gt=last_id)[:options['batch_size']]):
+                answers: list[str] = [similarity_service.read_answer(student_result) for student_result in batch]
+                indexed += similarity_service.store(batch, executor.map(minhash, answers, chunksize=16))
+                last_id = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} answer(s).'))
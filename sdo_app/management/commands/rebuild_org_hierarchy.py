@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sdo_app.services import OrgHierarchyService
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the closure table linking chairs, departments, programs and majors to their groups and courses.'
+
+    def handle(self, *args, **options):
+        paths: int = OrgHierarchyService().rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Stored {paths} hierarchy path(s).'))
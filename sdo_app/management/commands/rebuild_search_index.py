@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sdo_app.services import SearchService
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index over courses, lectures and test questions.'
+
+    def handle(self, *args, **options):
+        indexed: int = SearchService().rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} document(s).'))
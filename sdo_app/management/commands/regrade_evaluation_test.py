@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sdo_app.services import EvaluationTestService
+
+
+class Command(BaseCommand):
+    help = 'Rescores every stored attempt of the given tests against their current answer keys.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('evaluation_test_ids', nargs='+', type=int)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        evaluation_test_service = EvaluationTestService()
+
+        for evaluation_test_id in options['evaluation_test_ids']:
+            if not evaluation_test_service.is_exist(evaluation_test_id):
+                raise CommandError(f'Evaluation test {evaluation_test_id} does not exist.')
+
+            regraded: int = evaluation_test_service.regrade(evaluation_test_id, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Evaluation test {evaluation_test_id}: regraded {regraded} '
+                                                 f'attempt(s).'))
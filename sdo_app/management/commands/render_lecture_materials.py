@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from sdo_app.models import Lecture
+from sdo_app.services import LectureMaterialsService
+
+
+class Command(BaseCommand):
+    help = 'Pre-renders lecture materials to sanitized HTML with an asset manifest and a gzip variant.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Render again even if the output is up to date.')
+
+    def handle(self, *args, **options):
+        lecture_materials_service = LectureMaterialsService()
+        lectures = Lecture.objects.exclude(materials='').select_related('module').iterator()
+        rendered: int = sum(lecture_materials_service.render_lecture(lecture, options['force']) is not None
+                            for lecture in lectures)
+        self.stdout.write(self.style.SUCCESS(f'Rendered materials for {rendered} lecture(s).'))
@@ -0,0 +1,70 @@
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections, DatabaseError
+
+from sdo_app.models import BackgroundJob
+from sdo_app.services import BackgroundJobService
+
+
+def work(poll_interval: float, exit_when_idle: bool) -> None:
+    background_job_service = BackgroundJobService()
+
+    try:
+        while True:
+            try:
+                background_job: BackgroundJob | None = background_job_service.claim()
+            except DatabaseError:
+                connections.close_all()
+                time.sleep(poll_interval)
+                continue
+
+            if background_job is None:
+                if exit_when_idle:
+                    return
+
+                time.sleep(poll_interval)
+                continue
+
+            background_job_service.run(background_job)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Runs a pool of processes executing background jobs from the database queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                            help='Number of worker processes.')
+        parser.add_argument('--poll-interval', type=float,
+                            default=getattr(settings, 'BACKGROUND_JOB_POLL_INTERVAL', 1),
+                            help='Seconds to wait before polling an empty queue again.')
+        parser.add_argument('--once', action='store_true', help='Exit as soon as the queue is empty.')
+
+    def handle(self, *args, **options):
+        connections.close_all()
+
+        if options['processes'] <= 1:
+            work(options['poll_interval'], options['once'])
+            return
+
+        workers: list = [multiprocessing.Process(target=work, args=(options['poll_interval'], options['once']),
+                                                 daemon=True)
+                         for _ in range(options['processes'])]
+
+        for worker in workers:
+            worker.start()
+
+        self.stdout.write(f'Started {len(workers)} worker process(es).')
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
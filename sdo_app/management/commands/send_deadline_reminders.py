@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from sdo_app.services import DeadlineReminderService
+
+
+class Command(BaseCommand):
+    help = 'Emails every enrolled student one digest of their upcoming deadlines, meant to run once a day.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, default=None,
+                            help='Day to compute reminders for (YYYY-MM-DD), today by default.')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--backend', default=None,
+                            help='Email backend to use instead of EMAIL_BACKEND, e.g. '
+                                 'django.core.mail.backends.filebased.EmailBackend.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the reminders that would be sent.')
+
+    def handle(self, *args, **options):
+        sent: int = DeadlineReminderService().send(options['date'], options['batch_size'], options['backend'],
+                                                   options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(f'{"Would send" if options["dry_run"] else "Sent"} {sent} reminder(s).'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from sdo_app.storage import content_addressed_storage
+
+
+class Command(BaseCommand):
+    help = 'Deletes blob files that no FileBlob row references, left behind by rolled back or interrupted saves.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=24 * 60 * 60,
+                            help='Seconds a file must be unchanged before it is swept, so saves in flight are kept.')
+
+    def handle(self, *args, **options):
+        removed: int = content_addressed_storage.sweep(options['min_age'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} unreferenced blob file(s).'))
@@ -0,0 +1,138 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+
+
+def is_not_modified(request, etag: str, mtime: float) -> bool:
+    if_none_match: str | None = request.headers.get('If-None-Match')
+
+    if if_none_match is not None:
+        return if_none_match.strip() == '*' or etag in parse_etags(if_none_match)
+
+    if_modified_since: int | None = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    # Malformed and multi-range headers are ignored (the whole file is served); only a well-formed range
+    # that misses the file raises RangeNotSatisfiable.
+    match = RANGE_RE.match(range_header.strip())
+
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+
+    start, end = match.groups()
+
+    if start == '':
+        length: int = int(end)
+
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable
+
+        return max(size - length, 0), size - 1
+
+    start: int = int(start)
+
+    if end and int(end) < start:
+        return None
+
+    if start >= size:
+        raise RangeNotSatisfiable
+
+    end: int = min(int(end), size - 1) if end else size - 1
+    return start, end
+
+
+def read_range(path: str, start: int, end: int):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining: int = end - start + 1
+
+        while remaining > 0:
+            chunk: bytes = file.read(min(CHUNK_SIZE, remaining))
+
+            if not chunk:
+                break
+
+            remaining -= len(chunk)
+            yield chunk
+
+
+def accel_response(name: str, path: str, content_type: str) -> HttpResponse | None:
+    backend: str | None = getattr(settings, 'MEDIA_SENDFILE_BACKEND', None)
+
+    if backend == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        location: str = getattr(settings, 'MEDIA_ACCEL_REDIRECT_LOCATION', '/protected-data/')
+        response['X-Accel-Redirect'] = location.rstrip('/') + '/' + quote(name)
+        return response
+
+    if backend == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+
+    return None
+
+
+def serve_file(request, name: str, path: str) -> HttpResponse:
+    # The stored bytes are sent as they are, so a guessed encoding (.gz) must not become Content-Encoding.
+    content_type, _ = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+
+    response: HttpResponse | None = accel_response(name, path, content_type)
+
+    if response is not None:
+        return response
+
+    stat: os.stat_result = os.stat(path)
+    etag: str = file_etag(stat)
+
+    if is_not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        return response
+
+    byte_range: tuple[int, int] | None = None
+    range_header: str | None = request.headers.get('Range')
+    if_range: str | None = request.headers.get('If-Range')
+
+    if range_header and (if_range is None or if_range == etag or
+                         parse_http_date_safe(if_range) == int(stat.st_mtime)):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(read_range(path, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
@@ -1,15 +1,44 @@
 from typing import Union
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
 from django.db.models import QuerySet, Q
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 from django.db import models
+from django.utils import timezone
 
+from .storage import content_addressed_storage
 from .utils import course_dir_path, description_file_path, answer_file_path, eval_criteria_file_path
 from validators import validate_deadline_date, validate_positive_score, validate_eval_criteria_file
 
 
+class FallbackGinIndex(GinIndex):
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return models.Index.create_sql(self, model, schema_editor, using=using, **kwargs)
+
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+class FallbackOpClassIndex(models.Index):
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            expressions = [expression.get_source_expressions()[0] if isinstance(expression, OpClass) else expression
+                           for expression in self.expressions]
+            return models.Index(*expressions, name=self.name).create_sql(model, schema_editor, using=using, **kwargs)
+
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+def prefix_search_index(field_name: str, name: str) -> FallbackOpClassIndex:
+    # The admin's '^' search compiles to UPPER("column"::text) LIKE UPPER('term%'), which only an index on the same
+    # expression with a pattern operator class can serve.
+    return FallbackOpClassIndex(OpClass(Upper(field_name), name='text_pattern_ops'), name=name)
+
+
 class BaseTask(models.Model):
     class Meta:
         abstract = True
@@ -21,6 +50,7 @@ class BaseTask(models.Model):
     deadline_date = models.DateField(_('Крайний срок сдачи'), validators=[validate_deadline_date])
     final_score_is = models.CharField(max_length=2, default=FinalScoreIs.BEST_ATTEMPT, choices=FinalScoreIs.choices,
                                       verbose_name='Конечный результат оценивается, как')
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def get_final_attempt(self, student_id: int) -> int | None:
         base_task_filter = Q(**{'evaluation_test_id': self.id}) if isinstance(self, EvaluationTest) \
@@ -37,51 +67,84 @@ class BaseTask(models.Model):
         return student_results.last().id
 
 
+class FileBlob(models.Model):
+    name = models.CharField(_('Путь к файлу в хранилище'), max_length=100, unique=True)
+    size = models.BigIntegerField(_('Размер файла(байт)'), default=0)
+    ref_count = models.PositiveIntegerField(_('Количество ссылок на файл'), default=0)
+
+    def __str__(self) -> str:
+        return self.name
+
+
 class Subject(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('name', 'subject_name_prefix_idx')]
+
     name = models.CharField(_('Наименование дисциплины'), max_length=100, unique=True)
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return self.name
 
 
 class Chair(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('name', 'chair_name_prefix_idx')]
+
     name = models.CharField(_('Наименование института/факультета'), max_length=100, unique=True)
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return self.name
 
 
 class Department(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('name', 'department_name_prefix_idx')]
+
     name = models.CharField(_('Наименование кафедры'), max_length=100, unique=True)
     chair = models.ForeignKey(Chair, on_delete=models.RESTRICT, verbose_name='Наименование института/факультета')
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return self.name
 
 
 class Program(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('name', 'program_name_prefix_idx')]
+
     name = models.CharField(_('Наименование программы подготовки'), max_length=100)
     department = models.ForeignKey(Department, on_delete=models.RESTRICT, verbose_name='Наименование кафедры')
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return self.name
 
 
 class Major(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('name', 'major_name_prefix_idx')]
+
     name = models.CharField(_('Наименование направления подготовки'), max_length=100)
     code = models.CharField(_('Код'), max_length=12, unique=True)
     programs = models.ManyToManyField(Program, related_name='major_programs',
                                       verbose_name='Программы подготовки')
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.code} {self.name}"
 
 
 class Person(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('middle_name', 'person_middle_name_prefix_idx')]
+
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     first_name = models.CharField(_('Имя'), max_length=100)
     middle_name = models.CharField(_('Фамилия'), max_length=100)
     last_name = models.CharField(_('Отчество'), max_length=100)
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.first_name} {self.middle_name} {self.last_name}"
@@ -103,6 +166,9 @@ class Teacher(Person):
 
 
 class StudyGroup(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('name', 'study_group_name_prefix_idx')]
+
     class EducationDegree(models.TextChoices):
         BACHELOR = 'BC', 'Бакалавриат',
         MASTER = 'MS', 'Магистратура',
@@ -112,32 +178,41 @@ class StudyGroup(models.Model):
     name = models.CharField(_('Наименование учебной группы'), max_length=100)
     major = models.ForeignKey(Major, on_delete=models.RESTRICT, verbose_name='Наименование программы подготовки')
     education_degree = models.CharField(_('Уровень образования'), max_length=32, choices=EducationDegree)
+    students = models.ManyToManyField(Student, related_name='study_groups', verbose_name='Студенты', blank=True)
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return self.name
 
 
 class Lecture(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('title', 'lecture_title_prefix_idx')]
+
     title = models.TextField(_('Наименование лекции'))
     is_read = models.BooleanField(default=False, verbose_name='Прочтена ли лекция?')
     deadline_date = models.DateField(_('Крайний срок завершения'), validators=[validate_deadline_date])
-    materials = models.FileField(_('Материалы лекции'), upload_to=course_dir_path,
+    materials = models.FileField(_('Материалы лекции'), upload_to=course_dir_path, storage=content_addressed_storage,
                                  validators=[FileExtensionValidator(['md'])])
     module = models.ForeignKey('sdo_app.Module', on_delete=models.RESTRICT, verbose_name='Модуль')
     practice = models.ForeignKey('sdo_app.Practice', on_delete=models.RESTRICT, blank=True, null=True,
                                  verbose_name='Задание/контрольная работа')
     evaluation_test = models.ForeignKey('sdo_app.EvaluationTest', on_delete=models.RESTRICT, blank=True, null=True,
                                         verbose_name='Оценочный тест')
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return self.title
 
 
 class Practice(BaseTask):
+    class Meta:
+        indexes = [prefix_search_index('title', 'practice_title_prefix_idx')]
+
     title = models.TextField(_('Наименование задания'))
     max_score = models.FloatField(_('Максимальный балл'), default=0.0, validators=[validate_positive_score])
     description = models.FileField(_('Описание задания'), upload_to=description_file_path,
-                                   validators=[FileExtensionValidator(['json'])])
+                                   storage=content_addressed_storage, validators=[FileExtensionValidator(['json'])])
 
     def __str__(self) -> str:
         return self.title
@@ -151,10 +226,14 @@ class StudentResult(models.Model):
                                  blank=True, null=True)
     is_completed = models.BooleanField(default=False, verbose_name='Выполнено ли задание?')
     answer_file = models.FileField(_('Ответ на задание в виде файла'), upload_to=answer_file_path,
-                                   validators=[FileExtensionValidator(['json'])], blank=True)
+                                   storage=content_addressed_storage, validators=[FileExtensionValidator(['json'])],
+                                   blank=True)
     answer_text = models.TextField(_('Ответ на задание в виде текста'), blank=True)
     score = models.FloatField(_('Полученный балл'), blank=True, default=0.0, validators=[validate_positive_score])
     attempt = models.IntegerField(_('Попытка №'), default=1)
+    question_scores = models.BinaryField(_('Баллы по вопросам теста'), blank=True, null=True)
+    chosen_answers = models.BinaryField(_('Выбранные ответы теста'), blank=True, null=True)
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         to_print: str = f'Результат студента {self.student} по XXX'
@@ -168,11 +247,15 @@ class StudentResult(models.Model):
 
 
 class Module(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('title', 'module_title_prefix_idx')]
+
     title = models.CharField(_('Наименование модуля'), max_length=32)
     practice = models.ForeignKey(Practice, on_delete=models.RESTRICT, verbose_name='Контрольная работа',
                                  blank=True, null=True)
     evaluation_test = models.ForeignKey('sdo_app.EvaluationTest', on_delete=models.RESTRICT,
                                         verbose_name='Контрольный тест', blank=True, null=True)
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return self.title
@@ -183,11 +266,17 @@ class Module(models.Model):
 
 
 class Course(models.Model):
+    class Meta:
+        indexes = [prefix_search_index('title', 'course_title_prefix_idx')]
+
     title = models.TextField(_('Наименование курса'), unique=True)
     teacher = models.ForeignKey(Teacher, on_delete=models.RESTRICT, verbose_name='Преподаватель')
     majors = models.ManyToManyField(Major, related_name='course_majors', verbose_name='Направления подготовки')
     evaluation_criteria = models.FileField(_('Критерии оценивания'), upload_to=eval_criteria_file_path,
+                                           storage=content_addressed_storage,
                                            validators=[validate_eval_criteria_file])
+    evaluation_criteria_data = models.JSONField(_('Разобранные критерии оценивания'), default=dict, blank=True,
+                                                editable=False)
     members = models.ManyToManyField(StudyGroup, related_name='course_members', verbose_name='Участники курса',
                                      blank=True)
     modules = models.ManyToManyField(Module, related_name='course_modules', verbose_name='Модули', blank=True)
@@ -195,6 +284,10 @@ class Course(models.Model):
                                  verbose_name='Итоговая работа')
     evaluation_test = models.ForeignKey('sdo_app.EvaluationTest', on_delete=models.RESTRICT, blank=True, null=True,
                                         verbose_name='Итоговый тест')
+    end_date = models.DateField(_('Дата окончания курса'), blank=True, null=True)
+    lecture_layout = models.JSONField(_('Позиции лекций в битовых картах прогресса'), default=list, blank=True,
+                                      editable=False)
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return f'{self.title}'
@@ -204,6 +297,7 @@ class QuestionSection(models.Model):
     evaluation_test = models.ForeignKey('sdo_app.EvaluationTest', on_delete=models.CASCADE,
                                         verbose_name='Оценочный тест')
     question = models.TextField(verbose_name='Вопрос')
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return f'Вопрос по тесту {self.evaluation_test}'
@@ -223,12 +317,16 @@ class QuestionAnswers(models.Model):
     answer = models.TextField(verbose_name='Ответ на вопрос')
     is_correct = models.BooleanField(default=False, verbose_name='Это верный ответ')
     score = models.FloatField(default=0.0, verbose_name='Получаемый балл', validators=[validate_positive_score])
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
 
     def __str__(self) -> str:
         return f'Ответ на вопрос {self.question_section.question}'
 
 
 class EvaluationTest(BaseTask):
+    class Meta:
+        indexes = [prefix_search_index('title', 'eval_test_title_prefix_idx')]
+
     title = models.TextField(_('Наименование оценочной работы'))
     start_time = models.DateTimeField(_('Дата начала оценочной работы студентом'), null=True, blank=True)
     end_time = models.DateTimeField(_('Дата завершения оценочной работы студентом'), null=True, blank=True)
@@ -250,3 +348,192 @@ class EvaluationTest(BaseTask):
             return 0
 
         return sum(question_section.max_score for question_section in question_sections)
+
+
+class ExamSession(models.Model):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'evaluation_test'], condition=Q(is_finished=False),
+                                    name='unique_active_exam_session')
+        ]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name='Студент')
+    evaluation_test = models.ForeignKey(EvaluationTest, on_delete=models.CASCADE, verbose_name='Оценочный тест')
+    started_at = models.DateTimeField(_('Время начала'), auto_now_add=True)
+    expires_at = models.DateTimeField(_('Время окончания'), db_index=True)
+    answers = models.JSONField(_('Сохраненные ответы'), default=dict, blank=True)
+    is_finished = models.BooleanField(default=False, verbose_name='Завершена ли попытка?')
+    student_result = models.ForeignKey(StudentResult, on_delete=models.SET_NULL, blank=True, null=True,
+                                       verbose_name='Результат попытки')
+
+    def __str__(self) -> str:
+        return f'Попытка студента {self.student} по тесту {self.evaluation_test}'
+
+
+class BackgroundJob(models.Model):
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    class Status(models.TextChoices):
+        PENDING = 'PD', 'В очереди'
+        RUNNING = 'RN', 'Выполняется'
+        SUCCEEDED = 'SC', 'Выполнена'
+        FAILED = 'FL', 'Завершена с ошибкой'
+
+    name = models.CharField(_('Наименование задачи'), max_length=100)
+    payload = models.JSONField(_('Параметры задачи'), default=dict, blank=True)
+    status = models.CharField(_('Статус'), max_length=2, choices=Status.choices, default=Status.PENDING)
+    idempotency_key = models.CharField(_('Ключ идемпотентности'), max_length=255, unique=True, blank=True, null=True)
+    attempts = models.PositiveIntegerField(_('Количество запусков'), default=0)
+    progress = models.PositiveSmallIntegerField(_('Прогресс, %'), default=0)
+    max_attempts = models.PositiveIntegerField(_('Максимальное количество запусков'), default=3)
+    result = models.JSONField(_('Результат'), blank=True, null=True)
+    error = models.TextField(_('Ошибка'), blank=True)
+    run_after = models.DateTimeField(_('Запустить не ранее'), default=timezone.now)
+    locked_at = models.DateTimeField(_('Время запуска'), blank=True, null=True)
+    created_at = models.DateTimeField(_('Время создания'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('Время завершения'), blank=True, null=True)
+    updated_at = models.DateTimeField(_('Время изменения'), auto_now=True)
+
+    def __str__(self) -> str:
+        return f'{self.name} #{self.pk}'
+
+
+class PublishedTestSnapshot(models.Model):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['evaluation_test', 'version'], name='unique_published_test_version')
+        ]
+
+    evaluation_test = models.ForeignKey(EvaluationTest, on_delete=models.CASCADE, verbose_name='Оценочный тест')
+    version = models.PositiveIntegerField(_('Версия'))
+    etag = models.CharField(_('Хэш содержимого'), max_length=64)
+    payload = models.BinaryField(_('Содержимое теста(gzip)'))
+    created_at = models.DateTimeField(_('Время публикации'), auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f'Тест {self.evaluation_test}, версия {self.version}'
+
+
+class SearchDocument(models.Model):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document')
+        ]
+        indexes = [FallbackGinIndex(fields=['search_vector'], name='search_document_vector_idx')]
+
+    class Kind(models.TextChoices):
+        COURSE = 'CR', 'Курс'
+        LECTURE = 'LC', 'Лекция'
+        QUESTION_SECTION = 'QS', 'Вопрос теста'
+
+    kind = models.CharField(_('Тип документа'), max_length=2, choices=Kind.choices)
+    object_id = models.BigIntegerField(_('Идентификатор объекта'))
+    courses = models.ManyToManyField(Course, related_name='search_documents', verbose_name='Курсы', blank=True)
+    title = models.TextField(_('Заголовок'))
+    body = models.TextField(_('Текст'), blank=True)
+    search_vector = SearchVectorField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return self.title
+
+
+class StudentResultArchive(models.Model):
+    class Meta:
+        # One of evaluation_test / practice is always NULL, and NULLs never conflict in a plain unique constraint.
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'evaluation_test'], condition=Q(practice__isnull=True),
+                                    name='unique_student_test_result_archive'),
+            models.UniqueConstraint(fields=['student', 'practice'], condition=Q(evaluation_test__isnull=True),
+                                    name='unique_student_practice_result_archive')
+        ]
+
+    student = models.ForeignKey(Student, on_delete=models.RESTRICT, verbose_name='Студент')
+    evaluation_test = models.ForeignKey('EvaluationTest', on_delete=models.RESTRICT, verbose_name='Тест', blank=True,
+                                        null=True)
+    practice = models.ForeignKey('Practice', on_delete=models.RESTRICT, verbose_name='Практическое задание',
+                                 blank=True, null=True)
+    attempts = models.PositiveIntegerField(_('Количество попыток'), default=0)
+    final_result_id = models.PositiveIntegerField(_('Идентификатор итоговой попытки'), blank=True, null=True)
+    final_score = models.FloatField(_('Балл итоговой попытки'), default=0.0)
+    results = models.BinaryField(_('Сжатые результаты попыток'))
+    archived_at = models.DateTimeField(_('Время архивации'), auto_now=True)
+
+    def __str__(self) -> str:
+        return f'Архив результатов студента {self.student} по {self.evaluation_test or self.practice}'
+
+
+class LectureProgress(models.Model):
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['student', 'course'], name='unique_lecture_progress')]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name='Студент')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, verbose_name='Курс')
+    read_lectures = models.BinaryField(_('Битовая карта прочитанных лекций'), default=bytes)
+    updated_at = models.DateTimeField(_('Время обновления'), auto_now=True)
+
+    def __str__(self) -> str:
+        return f'Прогресс студента {self.student} по курсу {self.course}'
+
+
+class ChangeRecord(models.Model):
+    class Operation(models.TextChoices):
+        CREATED = 'C', 'Создание'
+        UPDATED = 'U', 'Изменение'
+        DELETED = 'D', 'Удаление'
+
+    class Meta:
+        indexes = [models.Index(fields=['model', 'object_id'])]
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(_('Модель'), max_length=64)
+    object_id = models.BigIntegerField(_('Идентификатор объекта'))
+    operation = models.CharField(_('Операция'), max_length=1, choices=Operation.choices)
+    created_at = models.DateTimeField(_('Время изменения'), auto_now_add=True, db_index=True)
+
+    def __str__(self) -> str:
+        return f'{self.operation} {self.model} #{self.object_id}'
+
+
+class IdempotentResponse(models.Model):
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Пользователь')
+    key = models.CharField(_('Ключ идемпотентности'), max_length=255)
+    fingerprint = models.CharField(_('Хэш запроса'), max_length=64)
+    status_code = models.PositiveSmallIntegerField(_('Код ответа'), blank=True, null=True)
+    response = models.JSONField(_('Сохраненный ответ'), blank=True, null=True)
+    created_at = models.DateTimeField(_('Время создания'), auto_now_add=True)
+    expires_at = models.DateTimeField(_('Хранить до'), db_index=True)
+
+    def __str__(self) -> str:
+        return f'{self.user} {self.key}'
+
+
+class AnswerSignature(models.Model):
+    student_result = models.OneToOneField(StudentResult, on_delete=models.CASCADE, primary_key=True,
+                                          verbose_name='Результат студента')
+    practice = models.ForeignKey('Practice', on_delete=models.CASCADE, verbose_name='Практическое задание')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name='Студент')
+    signature = models.BinaryField(_('MinHash-сигнатура ответа'))
+    updated_at = models.DateTimeField(_('Время обновления'), auto_now=True)
+
+    def __str__(self) -> str:
+        return f'Сигнатура ответа {self.student_result_id}'
+
+
+class OrgHierarchy(models.Model):
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['ancestor_model', 'ancestor_id', 'descendant_model',
+                                                       'descendant_id'], name='unique_org_hierarchy_path')]
+        indexes = [models.Index(fields=['descendant_model', 'descendant_id'])]
+
+    ancestor_model = models.CharField(_('Модель предка'), max_length=20)
+    ancestor_id = models.PositiveIntegerField(_('Идентификатор предка'))
+    descendant_model = models.CharField(_('Модель потомка'), max_length=20)
+    descendant_id = models.PositiveIntegerField(_('Идентификатор потомка'))
+    depth = models.PositiveSmallIntegerField(_('Глубина'))
+
+    def __str__(self) -> str:
+        return f'{self.ancestor_model} {self.ancestor_id} → {self.descendant_model} {self.descendant_id}'
@@ -0,0 +1,134 @@
+import html
+import posixpath
+import re
+from typing import Callable
+from urllib.parse import unquote, urlsplit
+
+FENCE_RE = re.compile(r'^\s*(```|~~~)\s*([\w+-]*)\s*$')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+RULE_RE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+QUOTE_RE = re.compile(r'^\s*>\s?(.*)$')
+UNORDERED_ITEM_RE = re.compile(r'^\s*[-+*]\s+(.*)$')
+ORDERED_ITEM_RE = re.compile(r'^\s*\d+[.)]\s+(.*)$')
+INLINE_RE = re.compile(r'(?P<code>`+)(?P<code_text>.+?)(?P=code)'
+                       r'|(?P<image>!)?\[(?P<text>[^\]]*)\]\(\s*(?P<url><[^>]*>|[^)\s]*)(?:\s+"(?P<title>[^"]*)")?\s*\)'
+                       r'|(?P<strong>\*\*|__)(?P<strong_text>.+?)(?P=strong)'
+                       r'|(?P<em>[*_])(?P<em_text>[^*_]+?)(?P=em)'
+                       r'|~~(?P<del_text>.+?)~~')
+SAFE_SCHEMES = {'', 'http', 'https', 'mailto'}
+
+
+def resolve_asset(asset_dir: str, url: str) -> str | None:
+    parts = urlsplit(url)
+
+    if parts.scheme or parts.netloc or not parts.path or parts.path.startswith('/'):
+        return None
+
+    name: str = posixpath.normpath(posixpath.join(asset_dir, unquote(parts.path)))
+    return None if name.startswith('..') else name
+
+
+def safe_url(url: str) -> str | None:
+    url = url.strip().strip('<>')
+    return url if urlsplit(url).scheme.lower() in SAFE_SCHEMES else None
+
+
+class MarkdownRenderer:
+    # Only the markup produced here reaches the output, any HTML in the source is escaped as text.
+    def __init__(self, rewrite_url: Callable[[str], str | None] = safe_url):
+        self.rewrite_url = rewrite_url
+
+    def render_inline(self, text: str) -> str:
+        rendered: list[str] = []
+        position: int = 0
+
+        for match in INLINE_RE.finditer(text):
+            rendered.append(html.escape(text[position:match.start()]))
+            position = match.end()
+
+            if match.group('code'):
+                rendered.append(f'<code>{html.escape(match.group("code_text").strip())}</code>')
+            elif match.group('url') is not None:
+                url: str | None = self.rewrite_url(match.group('url').strip('<>'))
+                title: str = f' title="{html.escape(match.group("title"))}"' if match.group('title') else ''
+
+                if match.group('image'):
+                    rendered.append(f'<img src="{html.escape(url)}" alt="{html.escape(match.group("text"))}"{title}>'
+                                    if url else html.escape(match.group('text')))
+                else:
+                    text_html: str = self.render_inline(match.group('text'))
+                    rendered.append(f'<a href="{html.escape(url)}" rel="noopener noreferrer"{title}>{text_html}</a>'
+                                    if url else text_html)
+            elif match.group('strong'):
+                rendered.append(f'<strong>{self.render_inline(match.group("strong_text"))}</strong>')
+            elif match.group('em'):
+                rendered.append(f'<em>{self.render_inline(match.group("em_text"))}</em>')
+            else:
+                rendered.append(f'<del>{self.render_inline(match.group("del_text"))}</del>')
+
+        rendered.append(html.escape(text[position:]))
+        return ''.join(rendered)
+
+    def render(self, markdown: str) -> str:
+        lines: list[str] = markdown.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+        blocks: list[str] = []
+        paragraph: list[str] = []
+        i: int = 0
+
+        def flush_paragraph() -> None:
+            if paragraph:
+                blocks.append(f'<p>{self.render_inline(" ".join(paragraph))}</p>')
+                paragraph.clear()
+
+        while i < len(lines):
+            line: str = lines[i]
+
+            if fence := FENCE_RE.match(line):
+                flush_paragraph()
+                code_lines: list[str] = []
+                i += 1
+
+                while i < len(lines) and not lines[i].strip().startswith(fence.group(1)):
+                    code_lines.append(lines[i])
+                    i += 1
+
+                language: str = f' class="language-{fence.group(2)}"' if fence.group(2) else ''
+                blocks.append(f'<pre><code{language}>{html.escape(chr(10).join(code_lines))}</code></pre>')
+            elif not line.strip():
+                flush_paragraph()
+            elif heading := HEADING_RE.match(line):
+                flush_paragraph()
+                level: int = len(heading.group(1))
+                blocks.append(f'<h{level}>{self.render_inline(heading.group(2))}</h{level}>')
+            elif RULE_RE.match(line):
+                flush_paragraph()
+                blocks.append('<hr>')
+            elif QUOTE_RE.match(line):
+                flush_paragraph()
+                quote_lines: list[str] = []
+
+                while i < len(lines) and (quote := QUOTE_RE.match(lines[i])):
+                    quote_lines.append(quote.group(1))
+                    i += 1
+
+                blocks.append(f'<blockquote>{self.render(chr(10).join(quote_lines))}</blockquote>')
+                continue
+            elif UNORDERED_ITEM_RE.match(line) or ORDERED_ITEM_RE.match(line):
+                flush_paragraph()
+                item_re: re.Pattern = UNORDERED_ITEM_RE if UNORDERED_ITEM_RE.match(line) else ORDERED_ITEM_RE
+                tag: str = 'ul' if item_re is UNORDERED_ITEM_RE else 'ol'
+                items: list[str] = []
+
+                while i < len(lines) and (item := item_re.match(lines[i])):
+                    items.append(f'<li>{self.render_inline(item.group(1))}</li>')
+                    i += 1
+
+                blocks.append(f'<{tag}>{"".join(items)}</{tag}>')
+                continue
+            else:
+                paragraph.append(line.strip())
+
+            i += 1
+
+        flush_paragraph()
+        return '\n'.join(blocks)
@@ -0,0 +1,81 @@
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, Set
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+MARKDOWN_LINK_RE = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+MARKDOWN_MARKUP_RE = re.compile(r'[#>*_`~|]+|^\s*[-+]\s+|^\s*\d+\.\s+', re.MULTILINE)
+
+RUSSIAN_ENDINGS = sorted([
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией', 'ий', 'ый', 'ой', 'ая', 'яя', 'ое', 'ее',
+    'ые', 'ие', 'ых', 'их', 'ую', 'юю', 'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'ей', 'ия', 'ью', 'ть',
+    'ться', 'ешь', 'ет', 'ют', 'ут', 'ит', 'ат', 'ят', 'ла', 'ли', 'ло', 'ся', 'сь', 'а', 'я', 'о', 'е', 'ы', 'и',
+    'у', 'ю', 'ь', 'й',
+], key=len, reverse=True)
+
+
+def markdown_to_text(markdown: str) -> str:
+    return MARKDOWN_MARKUP_RE.sub(' ', MARKDOWN_LINK_RE.sub(r'\1', markdown))
+
+
+def stem(word: str) -> str:
+    if not re.match(r'[а-я]', word):
+        return word
+
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            return word[:-len(ending)]
+
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(word) for word in WORD_RE.findall(text.lower().replace('ё', 'е'))]
+
+
+class InvertedIndex:
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.document_terms: Dict[int, Set[str]] = {}
+
+    def add(self, document_id: int, title: str, body: str) -> None:
+        self.remove(document_id)
+        weights: Dict[str, float] = defaultdict(float)
+
+        for term in tokenize(title):
+            weights[term] += 1.0
+
+        for term in tokenize(body):
+            weights[term] += 0.4
+
+        for term, weight in weights.items():
+            self.postings[term][document_id] = weight
+
+        self.document_terms[document_id] = set(weights)
+
+    def remove(self, document_id: int) -> None:
+        for term in self.document_terms.pop(document_id, set()):
+            self.postings[term].pop(document_id, None)
+
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def search(self, query: str, document_ids: Iterable[int] | None = None) -> list[tuple[int, float]]:
+        terms: list[str] = tokenize(query)
+
+        if not terms:
+            return []
+
+        ranks: Dict[int, float] | None = None
+
+        for term in terms:
+            postings: Dict[int, float] = self.postings.get(term, {})
+            ranks = dict(postings) if ranks is None else {document_id: rank + postings[document_id]
+                                                          for document_id, rank in ranks.items()
+                                                          if document_id in postings}
+
+        if document_ids is not None:
+            allowed_ids: set = set(document_ids)
+            ranks = {document_id: rank for document_id, rank in ranks.items() if document_id in allowed_ids}
+
+        return sorted(ranks.items(), key=lambda item: (-item[1], item[0]))
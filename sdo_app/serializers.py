@@ -1,6 +1,8 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import (Chair, Course, Department, EvaluationTest, Lecture, Major, Module, Person, Program, Practice,
-                     Subject, StudentResult, StudyGroup, Teacher, QuestionSection, Student, QuestionAnswers)
+                     Subject, StudentResult, StudyGroup, Teacher, QuestionSection, Student, QuestionAnswers,
+                     ExamSession, BackgroundJob, PublishedTestSnapshot)
 
 
 class ChairSerializer(serializers.ModelSerializer):
@@ -65,7 +67,7 @@ class StudyGroupSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StudyGroup
-        fields = ['id', 'name', 'major', 'education_degree']
+        fields = ['id', 'name', 'major', 'education_degree', 'students']
 
 
 class LectureSerializer(serializers.ModelSerializer):
@@ -102,7 +104,7 @@ class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ['id', 'title', 'teacher', 'majors', 'evaluation_criteria', 'members', 'modules', 'practice',
-                  'evaluation_test']
+                  'evaluation_test', 'end_date']
 
 
 class EvaluationTestSerializer(serializers.ModelSerializer):
@@ -117,6 +119,14 @@ class EvaluationTestSerializer(serializers.ModelSerializer):
         return QuestionAnswersSerializer(instance.answers, many=True).data
 
 
+class EvaluationTestFeedSerializer(EvaluationTestSerializer):
+    # The change feed leaves out the correct answers.
+    answers = None
+
+    class Meta(EvaluationTestSerializer.Meta):
+        fields = [field for field in EvaluationTestSerializer.Meta.fields if field != 'answers']
+
+
 class StudentResultSerializer(serializers.ModelSerializer):
     student = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all())
     evaluation_test = serializers.PrimaryKeyRelatedField(queryset=EvaluationTest.objects.all(), required=False)
@@ -156,3 +166,36 @@ class TQuestionAnswersSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuestionAnswers
         fields = ['id', 'question_section', 'answer', 'is_correct', 'score']
+
+
+class ExamSessionSerializer(serializers.ModelSerializer):
+    student = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all())
+    evaluation_test = serializers.PrimaryKeyRelatedField(queryset=EvaluationTest.objects.all())
+    remaining_seconds = serializers.SerializerMethodField('get_remaining_seconds')
+
+    class Meta:
+        model = ExamSession
+        fields = ['id', 'student', 'evaluation_test', 'started_at', 'expires_at', 'remaining_seconds', 'answers',
+                  'is_finished', 'student_result']
+        read_only_fields = ['started_at', 'expires_at', 'answers', 'is_finished', 'student_result']
+        validators = []
+
+    def get_remaining_seconds(self, instance: ExamSession) -> int:
+        if instance.is_finished:
+            return 0
+
+        return max(int((instance.expires_at - timezone.now()).total_seconds()), 0)
+
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BackgroundJob
+        fields = ['id', 'name', 'status', 'attempts', 'max_attempts', 'progress', 'result', 'error', 'created_at',
+                  'finished_at']
+        read_only_fields = fields
+
+
+class PublishedTestSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PublishedTestSnapshot
+        fields = ['id', 'evaluation_test', 'version', 'etag', 'created_at']
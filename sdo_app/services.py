@@ -1,21 +1,104 @@
+import gzip
+import base64
+import hashlib
+import json
+import logging
+import math
 import os.path
+import posixpath
+import random
 import shutil
-from typing import Dict, Iterable, Type, List, Union
-
+import threading
+import time
+import traceback
+from bisect import bisect_right
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Type, List, Union
+from weakref import WeakValueDictionary
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.mail import get_connection
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction, IntegrityError
 from django.db.models.base import Model
-from django.db.models import QuerySet, Q
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Avg, Count, Exists, F, Max, Min, OuterRef, QuerySet, Q
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
 from rest_framework.serializers import Serializer
 
 from sdo_core.settings import BASE_DIR, MEDIA_DIR
-from .models import (Chair, Course, Department, EvaluationTest, Lecture, Major, Module, Person, Program, Practice,
-                     Subject, Student, StudentResult, StudyGroup, Teacher, QuestionSection, QuestionAnswers)
+from .models import (BaseTask, Chair, Course, Department, EvaluationTest, Lecture, Major, Module, Person, Program,
+                     Practice, Subject, Student, StudentResult, StudyGroup, Teacher, QuestionSection, QuestionAnswers,
+                     ExamSession, BackgroundJob, PublishedTestSnapshot, SearchDocument, StudentResultArchive,
+                     LectureProgress, ChangeRecord, IdempotentResponse, AnswerSignature, OrgHierarchy)
 from .serializers import (ChairSerializer, CourseSerializer, DepartmentSerializer, EvaluationTestSerializer,
-                          LectureSerializer, MajorSerializer, ModuleSerializer, PersonSerializer, ProgramSerializer,
-                          PracticeSerializer, SubjectSerializer, StudentSerializer, StudentResultSerializer,
-                          StudyGroupSerializer, TeacherSerializer, QuestionSectionSerializer, QuestionAnswersSerializer)
+                          EvaluationTestFeedSerializer, LectureSerializer, MajorSerializer, ModuleSerializer,
+                          PersonSerializer, ProgramSerializer, PracticeSerializer, SubjectSerializer, StudentSerializer,
+                          StudentResultSerializer, StudyGroupSerializer, TeacherSerializer, QuestionSectionSerializer,
+                          QuestionAnswersSerializer, ExamSessionSerializer, BackgroundJobSerializer,
+                          PublishedTestSnapshotSerializer)
+from .email import DeadlineReminderEmail
+from .media import file_etag
+from .rendering import MarkdownRenderer, resolve_asset, safe_url
+from .search import InvertedIndex, markdown_to_text
+from .similarity import clusters, minhash, unpack_signature
+from .storage import BLOBS_DIR, content_addressed_fields, content_addressed_storage, release_files
+from .utils import (bitmap_to_int, course_dir_path, pack_chosen_answers, pack_question_scores, parse_id, set_bit,
+                    unpack_chosen_answers, unpack_question_scores)
+from validators import parse_json_file
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_CRITERIA_CACHE: Dict[int, tuple[float, dict]] = {}
+
+PUBLISHED_TEST_PAYLOADS: Dict[int, tuple[str, dict]] = {}
+
+SEARCH_INDEX: InvertedIndex | None = None
+
+JOB_HANDLERS: Dict[str, Callable[[dict], Any]] = {}
+CURRENT_JOB: ContextVar[BackgroundJob | None] = ContextVar('current_job', default=None)
+SCHEDULED_ON_COMMIT = threading.local()
+
+
+def job_handler(name: str):
+    def register(handler: Callable[[dict], Any]) -> Callable[[dict], Any]:
+        JOB_HANDLERS[name] = handler
+        return handler
+
+    return register
+
+
+def on_commit_once(key: str, callback: Callable[[], Any]) -> None:
+    # Callbacks are held weakly: Django drops the callbacks of a rolled back transaction (or savepoint), which
+    # forgets their key as well, so only callbacks still waiting for this commit suppress a duplicate.
+    scheduled: WeakValueDictionary = SCHEDULED_ON_COMMIT.__dict__.setdefault('callbacks', WeakValueDictionary())
+
+    if key in scheduled:
+        return
+
+    def run():
+        scheduled.pop(key, None)
+        callback()
+
+    scheduled[key] = run
+    transaction.on_commit(run)
 
 
 class BaseService:
+    # Lookups from Course to this model: editing an object refreshes the dashboards of the students enrolled in the
+    # courses that reach it through any of them
+    dashboard_course_lookups: tuple[str, ...] = ()
+    records_changes: bool = True
+    tracks_hierarchy: bool = False
+
     def __init__(self, model: Type[Model], serializer: Type[Serializer]):
         self.__model__ = model
         self.__serializer__ = serializer
@@ -32,23 +115,142 @@ class BaseService:
         serializer = self.__serializer__(data=request_data)
 
         if serializer.is_valid(raise_exception=True):
-            return self.__model__.objects.create(**serializer.validated_data)
+            with transaction.atomic():
+                model_obj: Model = self.__model__.objects.create(**serializer.validated_data)
+                self.record_changes(ChangeRecord.Operation.CREATED, [model_obj.pk])
+                self.refresh_hierarchy([model_obj.pk])
+
+            DashboardService().invalidate_courses(self.get_dashboard_course_ids([model_obj.pk]))
+            return model_obj
 
     def create_many(self, request_data) -> List[Model]:
         serializer = self.__serializer__(data=request_data, many=True)
 
         if serializer.is_valid(raise_exception=True):
-            return self.__model__.objects.bulk_create([self.__model__(**validated_data)
-                                                       for _, validated_data in enumerate(serializer.validated_data)])
+            with transaction.atomic():
+                model_objs: List[Model] = self.__model__.objects.bulk_create(
+                    [self.__model__(**validated_data) for _, validated_data in enumerate(serializer.validated_data)])
+                self.record_changes(ChangeRecord.Operation.CREATED, [model_obj.pk for model_obj in model_objs])
+                self.refresh_hierarchy([model_obj.pk for model_obj in model_objs])
+
+            DashboardService().invalidate_courses(
+                self.get_dashboard_course_ids([model_obj.pk for model_obj in model_objs]))
+            return model_objs
 
     def update(self, pk: int, request_data) -> int:
         serializer = self.__serializer__(data=request_data, partial=True)
 
         if serializer.is_valid(raise_exception=True):
-            return self.__model__.objects.filter(pk=pk).update(**serializer.validated_data)
+            course_ids: set[int] = self.get_dashboard_course_ids([pk])
+
+            with transaction.atomic():
+                validated_data: dict = self.save_files(pk, serializer.validated_data)
+
+                if self.has_updated_at():
+                    validated_data['updated_at'] = timezone.now()
+
+                updated: int = self.__model__.objects.filter(pk=pk).update(**validated_data)
+                self.record_changes(ChangeRecord.Operation.UPDATED, [pk] if updated else [])
+                self.refresh_hierarchy([pk] if updated else [])
+
+            # A moved object (a lecture in another module) leaves the courses it was shown in as well.
+            DashboardService().invalidate_courses(course_ids | self.get_dashboard_course_ids([pk]))
+            return updated
 
     def delete(self, pk: int, request_data=None):
-        return self.__model__.objects.get(pk=pk).delete()
+        course_ids: set[int] = self.get_dashboard_course_ids([pk])
+
+        with transaction.atomic():
+            model_obj: Model = self.__model__.objects.get(pk=pk)
+            release_files(model_obj)
+            deleted = model_obj.delete()
+            self.record_changes(ChangeRecord.Operation.DELETED, [pk])
+            self.remove_from_hierarchy([pk])
+
+        DashboardService().invalidate_courses(course_ids)
+        return deleted
+
+    def get_dashboard_course_ids(self, pks: Iterable[int]) -> set[int]:
+        pks = list(pks)
+
+        if not self.dashboard_course_lookups or not pks:
+            return set()
+
+        course_filter = Q()
+
+        for lookup in self.dashboard_course_lookups:
+            course_filter |= Q(**{f'{lookup}__in': pks})
+
+        return set(Course.objects.filter(course_filter).values_list('id', flat=True))
+
+    def record_changes(self, operation: str, object_ids: Iterable[int]) -> None:
+        if self.records_changes:
+            ChangeFeedService().record(self.__model__, operation, object_ids)
+
+    def has_updated_at(self) -> bool:
+        return any(field.name == 'updated_at' for field in self.__model__._meta.concrete_fields)
+
+    def touch(self, object_ids: Iterable[int]) -> None:
+        if self.has_updated_at():
+            self.__model__.objects.filter(pk__in=list(object_ids)).update(updated_at=timezone.now())
+
+    def get_validators(self, model_obj: Model) -> tuple[datetime, str] | None:
+        # Last-Modified and ETag of the serialized object, services whose serializers embed children extend them.
+        updated_at: datetime | None = getattr(model_obj, 'updated_at', None)
+
+        if updated_at is None:
+            return None
+
+        return updated_at, f'{model_obj.pk}-{int(updated_at.timestamp() * 1000000):x}'
+
+    def get_validators_with(self, model_obj: Model, *children: QuerySet) -> tuple[datetime, str] | None:
+        validators: tuple[datetime, str] | None = BaseService.get_validators(self, model_obj)
+
+        if validators is None:
+            return None
+
+        last_modified: datetime = validators[0]
+        counts: list[str] = []
+
+        for children_qs in children:
+            if any(field.name == 'updated_at' for field in children_qs.model._meta.concrete_fields):
+                aggregate: dict = children_qs.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+                last_modified = max(last_modified, aggregate['last_modified'] or last_modified)
+                counts.append(str(aggregate['count']))
+            else:
+                # Many-to-many rows carry no timestamp, but a member added in place of another gets a higher row id.
+                aggregate: dict = children_qs.aggregate(last_id=Max('pk'), count=Count('pk'))
+                counts.append(f'{aggregate["count"]}.{aggregate["last_id"] or 0}')
+
+        return last_modified, f'{model_obj.pk}-{int(last_modified.timestamp() * 1000000):x}-{"-".join(counts)}'
+
+    def refresh_hierarchy(self, object_ids: Iterable[int]) -> None:
+        if self.tracks_hierarchy and object_ids:
+            OrgHierarchyService().refresh(self.__model__._meta.model_name, object_ids)
+
+    def remove_from_hierarchy(self, object_ids: Iterable[int]) -> None:
+        if self.tracks_hierarchy:
+            OrgHierarchyService().remove(self.__model__._meta.model_name, object_ids)
+
+    def save_files(self, pk: int, validated_data: dict) -> dict:
+        model_obj: Model | None = None
+
+        for field in content_addressed_fields(self.__model__):
+            uploaded_file = validated_data.get(field.name)
+
+            if not uploaded_file:
+                continue
+
+            model_obj = model_obj or self.get(pk)
+            old_name: str = getattr(model_obj, field.attname).name
+            validated_data[field.name] = field.storage.save(field.generate_filename(model_obj, uploaded_file.name),
+                                                            uploaded_file)
+
+            if old_name:
+                # The old blob is released only once the row pointing at the new one is committed.
+                transaction.on_commit(lambda storage=field.storage, name=old_name: storage.delete(name))
+
+        return validated_data
 
     def validate_data(self, data) -> dict:
         model_serializer = self.__serializer__(data=data, many=isinstance(data, list))
@@ -56,8 +258,8 @@ class BaseService:
         if model_serializer.is_valid(raise_exception=True):
             return model_serializer.validated_data
 
-    def to_serialize(self, data: Union[Model, QuerySet[Model]]):
-        return self.__serializer__(data, many=isinstance(data, QuerySet)).data
+    def to_serialize(self, data: Union[Model, QuerySet[Model], List[Model]]):
+        return self.__serializer__(data, many=isinstance(data, (QuerySet, list))).data
 
     def is_exist(self, pk: int) -> bool:
         return self.__model__.objects.filter(pk=pk).exists()
@@ -75,15 +277,314 @@ class BaseService:
         return self.__serializer__.validated_data
 
 
+class AnalyticsService:
+    HISTOGRAM_BINS = 10
+
+    @staticmethod
+    def cache_key(evaluation_test_id: int) -> str:
+        return f'test_analytics:{evaluation_test_id}'
+
+    @staticmethod
+    def pass_ratio() -> float:
+        return getattr(settings, 'ANALYTICS_PASS_RATIO', 0.5)
+
+    def invalidate(self, evaluation_test_id: int) -> None:
+        cache.delete(self.cache_key(evaluation_test_id))
+
+    def get_item_max_scores(self, evaluation_test_id: int) -> Dict[int, float]:
+        item_max_scores: Dict[int, float] = defaultdict(float)
+
+        for question_section_id, score in EvaluationTest.objects.get(pk=evaluation_test_id).answers \
+                .values_list('question_section_id', 'score'):
+            item_max_scores[question_section_id] += score
+
+        return dict(item_max_scores)
+
+    def collect(self, evaluation_test_id: int) -> dict:
+        state: dict | None = cache.get(self.cache_key(evaluation_test_id))
+        updated: bool = state is None
+
+        if state is None:
+            item_max_scores: Dict[int, float] = self.get_item_max_scores(evaluation_test_id)
+            state = {'last_result_id': 0, 'item_max_scores': item_max_scores, 'max_score': sum(item_max_scores.values()),
+                     'attempts': 0, 'students': set(), 'sum': 0.0, 'sum_sq': 0.0, 'min': None, 'max': None,
+                     'passed': 0, 'histogram': [0] * self.HISTOGRAM_BINS, 'items': {}}
+
+        new_results: QuerySet = StudentResult.objects.filter(evaluation_test_id=evaluation_test_id,
+                                                             pk__gt=state['last_result_id']) \
+            .order_by('pk').values_list('pk', 'student_id', 'score', 'question_scores')
+
+        max_score: float = state['max_score']
+
+        for student_result_id, student_id, score, question_scores in new_results.iterator(chunk_size=2000):
+            updated = True
+            state['last_result_id'] = student_result_id
+            state['attempts'] += 1
+            state['students'].add(student_id)
+            state['sum'] += score
+            state['sum_sq'] += score * score
+            state['min'] = score if state['min'] is None else min(state['min'], score)
+            state['max'] = score if state['max'] is None else max(state['max'], score)
+            state['passed'] += score >= max_score * self.pass_ratio()
+            state['histogram'][min(int(score / max_score * self.HISTOGRAM_BINS), self.HISTOGRAM_BINS - 1)
+                               if max_score > 0 else 0] += 1
+
+            for question_section_id, item_score in unpack_question_scores(question_scores).items():
+                rest_score: float = score - item_score
+                item: list = state['items'].setdefault(question_section_id, [0, 0.0, 0.0, 0.0, 0.0, 0.0])
+                item[0] += 1
+                item[1] += item_score
+                item[2] += rest_score
+                item[3] += item_score * item_score
+                item[4] += rest_score * rest_score
+                item[5] += item_score * rest_score
+
+        if updated:
+            cache.set(self.cache_key(evaluation_test_id), state, None)
+
+        return state
+
+    @staticmethod
+    def correlation(n: int, sum_x: float, sum_y: float, sum_xx: float, sum_yy: float, sum_xy: float) -> float | None:
+        denominator: float = (n * sum_xx - sum_x * sum_x) * (n * sum_yy - sum_y * sum_y)
+
+        if denominator <= 0:
+            return None
+
+        return (n * sum_xy - sum_x * sum_y) / math.sqrt(denominator)
+
+    def evaluation_test_statistics(self, evaluation_test_id: int) -> dict:
+        state: dict = self.collect(evaluation_test_id)
+        attempts: int = state['attempts']
+        max_score: float = state['max_score']
+        mean: float | None = state['sum'] / attempts if attempts else None
+        bin_width: float = max_score / self.HISTOGRAM_BINS
+
+        items: list = []
+
+        for question_section_id, item_max_score in state['item_max_scores'].items():
+            n, sum_x, sum_y, sum_xx, sum_yy, sum_xy = state['items'].get(question_section_id, [0, 0, 0, 0, 0, 0])
+            items.append({'question_section': question_section_id, 'max_score': item_max_score, 'attempts': n,
+                          'mean_score': sum_x / n if n else None,
+                          'difficulty': sum_x / n / item_max_score if n and item_max_score else None,
+                          'discrimination': self.correlation(n, sum_x, sum_y, sum_xx, sum_yy, sum_xy)})
+
+        return {'evaluation_test': evaluation_test_id, 'max_score': max_score, 'attempts': attempts,
+                'students': len(state['students']), 'mean_score': mean,
+                'std_score': math.sqrt(max(state['sum_sq'] / attempts - mean * mean, 0.0)) if attempts else None,
+                'min_score': state['min'], 'max_achieved_score': state['max'],
+                'pass_rate': state['passed'] / attempts if attempts else None,
+                'histogram': [{'from': round(bin_width * i, 4), 'to': round(bin_width * (i + 1), 4), 'count': count}
+                              for i, count in enumerate(state['histogram'])],
+                'items': items}
+
+    def course_statistics(self, course_id: int) -> dict:
+        course_filter = Q(course=course_id) | Q(module__course_modules=course_id) | \
+            Q(lecture__module__course_modules=course_id)
+        evaluation_test_ids: QuerySet = EvaluationTest.objects.filter(course_filter).values('pk')
+        practice_ids: QuerySet = Practice.objects.filter(course_filter).values('pk')
+
+        evaluation_tests: QuerySet = StudentResult.objects.filter(evaluation_test__in=evaluation_test_ids) \
+            .values('evaluation_test', 'evaluation_test__title') \
+            .annotate(attempts=Count('pk'), students=Count('student', distinct=True), mean_score=Avg('score'),
+                      min_score=Min('score'), max_score=Max('score')).order_by('evaluation_test')
+        practices: QuerySet = StudentResult.objects.filter(practice__in=practice_ids) \
+            .values('practice', 'practice__title', 'practice__max_score') \
+            .annotate(attempts=Count('pk'), students=Count('student', distinct=True), mean_score=Avg('score'),
+                      min_score=Min('score'), max_score=Max('score'),
+                      passed=Count('pk', filter=Q(score__gte=F('practice__max_score') * self.pass_ratio())))\
+            .order_by('practice')
+
+        return {'course': course_id, 'evaluation_tests': list(evaluation_tests),
+                'practices': [{**practice, 'pass_rate': practice['passed'] / practice['attempts']}
+                              for practice in practices]}
+
+
+class BackgroundJobService(BaseService):
+    records_changes = False
+
+    def __init__(self):
+        super().__init__(BackgroundJob, BackgroundJobSerializer)
+
+    def enqueue(self, name: str, payload: dict | None = None, idempotency_key: str | None = None,
+                max_attempts: int = 3) -> BackgroundJob:
+        if idempotency_key:
+            background_job: BackgroundJob | None = BackgroundJob.objects.filter(idempotency_key=idempotency_key).first()
+
+            if background_job:
+                return background_job
+
+        try:
+            with transaction.atomic():
+                return BackgroundJob.objects.create(name=name, payload=payload or {}, idempotency_key=idempotency_key,
+                                                    max_attempts=max_attempts)
+        except IntegrityError:
+            return BackgroundJob.objects.get(idempotency_key=idempotency_key)
+
+    def claim(self) -> BackgroundJob | None:
+        now = timezone.now()
+        lock_timeout = timedelta(seconds=getattr(settings, 'BACKGROUND_JOB_LOCK_TIMEOUT', 600))
+        claimable = (Q(status=BackgroundJob.Status.PENDING, run_after__lte=now) |
+                     Q(status=BackgroundJob.Status.RUNNING, locked_at__lt=now - lock_timeout))
+
+        with transaction.atomic():
+            background_job: BackgroundJob | None = BackgroundJob.objects.select_for_update(skip_locked=True) \
+                .filter(claimable).order_by('run_after', 'id').first()
+
+            if background_job is None:
+                return None
+
+            claimed: int = BackgroundJob.objects.filter(claimable, pk=background_job.pk) \
+                .update(status=BackgroundJob.Status.RUNNING, locked_at=now, attempts=background_job.attempts + 1,
+                        updated_at=now)
+
+        if not claimed:
+            return self.claim()
+
+        background_job.refresh_from_db()
+        return background_job
+
+    def run(self, background_job: BackgroundJob) -> BackgroundJob:
+        try:
+            handler: Callable[[dict], Any] = JOB_HANDLERS[background_job.name]
+            current_job_token = CURRENT_JOB.set(background_job)
+
+            try:
+                background_job.result = handler(background_job.payload)
+            finally:
+                CURRENT_JOB.reset(current_job_token)
+        except Exception:
+            background_job.error = traceback.format_exc()
+
+            if background_job.attempts < background_job.max_attempts:
+                retry_delay: int = getattr(settings, 'BACKGROUND_JOB_RETRY_DELAY', 30)
+                background_job.status = BackgroundJob.Status.PENDING
+                background_job.run_after = timezone.now() + timedelta(
+                    seconds=retry_delay * 2 ** (background_job.attempts - 1))
+            else:
+                background_job.status = BackgroundJob.Status.FAILED
+                background_job.finished_at = timezone.now()
+        else:
+            background_job.status = BackgroundJob.Status.SUCCEEDED
+            background_job.progress = 100
+            background_job.error = ''
+            background_job.finished_at = timezone.now()
+
+        background_job.locked_at = None
+        background_job.save(update_fields=['result', 'error', 'status', 'progress', 'run_after', 'locked_at',
+                                           'finished_at', 'updated_at'])
+        return background_job
+
+    @staticmethod
+    def report_progress(done: int, total: int) -> None:
+        background_job: BackgroundJob | None = CURRENT_JOB.get()
+
+        if background_job is None:
+            return
+
+        background_job.progress = min(done * 100 // total, 100) if total else 100
+        background_job.locked_at = timezone.now()
+        BackgroundJob.objects.filter(pk=background_job.pk).update(progress=background_job.progress,
+                                                                  locked_at=background_job.locked_at,
+                                                                  updated_at=background_job.locked_at)
+
+    def has_pending(self, name: str, **payload) -> bool:
+        return BackgroundJob.objects.filter(name=name, status=BackgroundJob.Status.PENDING,
+                                            **{f'payload__{key}': value for key, value in payload.items()}).exists()
+
+
+class ChangeFeedService:
+    @staticmethod
+    def record(model: Type[Model], operation: str, object_ids: Iterable[int]) -> None:
+        ChangeRecord.objects.bulk_create([ChangeRecord(model=model._meta.model_name, object_id=object_id,
+                                                       operation=operation) for object_id in object_ids])
+
+    # Answer keys stay out of the feed: QuestionAnswersSerializer writes is_correct and score without reading them
+    # back, and tests are fed without their correct answers.
+    FEED_SERIALIZERS: Dict[Type[Model], Type[Serializer]] = {
+        Chair: ChairSerializer, Course: CourseSerializer, Department: DepartmentSerializer,
+        EvaluationTest: EvaluationTestFeedSerializer, Lecture: LectureSerializer, Major: MajorSerializer,
+        Module: ModuleSerializer, Person: PersonSerializer, Program: ProgramSerializer, Practice: PracticeSerializer,
+        Subject: SubjectSerializer, Student: StudentSerializer, StudentResult: StudentResultSerializer,
+        StudyGroup: StudyGroupSerializer, Teacher: TeacherSerializer, QuestionSection: QuestionSectionSerializer,
+        QuestionAnswers: QuestionAnswersSerializer,
+    }
+
+    @classmethod
+    def get_serializers(cls) -> Dict[str, tuple[Type[Model], Type[Serializer]]]:
+        return {model._meta.model_name: (model, serializer) for model, serializer in cls.FEED_SERIALIZERS.items()}
+
+    def hydrate(self, change_records: List[ChangeRecord]) -> Iterable[dict]:
+        model_serializers: Dict[str, tuple[Type[Model], Type[Serializer]]] = self.get_serializers()
+        object_ids: Dict[str, set] = defaultdict(set)
+
+        for change_record in change_records:
+            if change_record.operation != ChangeRecord.Operation.DELETED and change_record.model in model_serializers:
+                object_ids[change_record.model].add(change_record.object_id)
+
+        objects: Dict[tuple[str, int], dict] = {}
+
+        for model_name, ids in object_ids.items():
+            model, serializer = model_serializers[model_name]
+
+            for model_obj in model.objects.filter(pk__in=ids):
+                objects[(model_name, model_obj.pk)] = serializer(model_obj).data
+
+        for change_record in change_records:
+            yield {'id': change_record.pk, 'model': change_record.model, 'object_id': change_record.object_id,
+                   'operation': change_record.operation, 'created_at': change_record.created_at,
+                   'data': objects.get((change_record.model, change_record.object_id))}
+
+    def stream(self, since: int, limit: int, models: list[str] | None = None, batch_size: int = 500) -> Iterable[dict]:
+        visible_before = timezone.now() - timedelta(seconds=getattr(settings, 'CHANGE_FEED_VISIBILITY_DELAY', 5))
+        change_records: QuerySet[ChangeRecord] = ChangeRecord.objects.filter(created_at__lt=visible_before) \
+            .order_by('pk')
+
+        if models:
+            change_records = change_records.filter(model__in=models)
+
+        while limit > 0 and (batch := list(change_records.filter(pk__gt=since)[:min(batch_size, limit)])):
+            yield from self.hydrate(batch)
+            since = batch[-1].pk
+            limit -= len(batch)
+
+    def compact(self, before: int, max_age: timedelta | None = None, batch_size: int = 5000) -> int:
+        newer_records: QuerySet[ChangeRecord] = ChangeRecord.objects.filter(model=OuterRef('model'),
+                                                                            object_id=OuterRef('object_id'),
+                                                                            pk__gt=OuterRef('pk'))
+        superseded: QuerySet[ChangeRecord] = ChangeRecord.objects.filter(Exists(newer_records), pk__lt=before)
+
+        if max_age is not None:
+            superseded = ChangeRecord.objects.filter(Q(pk__in=superseded.values('pk')) |
+                                                     Q(created_at__lt=timezone.now() - max_age))
+
+        deleted: int = 0
+
+        while ids := list(superseded.values_list('pk', flat=True)[:batch_size]):
+            deleted += ChangeRecord.objects.filter(pk__in=ids).delete()[0]
+
+        return deleted
+
+
 class ChairService(BaseService):
+    tracks_hierarchy = True
+
     def __init__(self):
         super().__init__(Chair, ChairSerializer)
 
 
 class CourseService(BaseService):
+    dashboard_course_lookups = ('pk',)
+    tracks_hierarchy = True
+
     def __init__(self):
         super().__init__(Course, CourseSerializer)
 
+    def get_validators(self, model_obj: Model) -> tuple[datetime, str] | None:
+        return self.get_validators_with(model_obj, Course.majors.through.objects.filter(course_id=model_obj.pk),
+                                        Course.members.through.objects.filter(course_id=model_obj.pk),
+                                        Course.modules.through.objects.filter(course_id=model_obj.pk))
+
     def create(self, request_data) -> Model:
         serializer = self.__serializer__(data=request_data)
 
@@ -94,10 +595,19 @@ class CourseService(BaseService):
             members: list = validated_data.pop('members')
 
             validated_data['title'] += f' для {', '.join([major.__str__() for major in majors])}'
-            course: Course = Course.objects.create(**validated_data)
-            course.majors.set(majors)
-            course.modules.set(modules)
-            course.members.set(members)
+            validated_data['evaluation_criteria_data'] = parse_json_file(validated_data['evaluation_criteria'])
+
+            with transaction.atomic():
+                course: Course = Course.objects.create(**validated_data)
+                course.majors.set(majors)
+                course.modules.set(modules)
+                course.members.set(members)
+                self.record_changes(ChangeRecord.Operation.CREATED, [course.pk])
+                self.refresh_hierarchy([course.pk])
+
+            EnrollmentService().invalidate_groups(members)
+            SearchService().index_course(course.pk)
+            SearchService().link_modules([module.pk for module in modules])
 
             return course
 
@@ -111,7 +621,15 @@ class CourseService(BaseService):
         course.majors.add(*majors)
         course.modules.add(*modules)
         course.members.add(*members)
-        return super().update(pk, data)
+        EnrollmentService().invalidate_groups(members)
+        updated: int = super().update(pk, data)
+
+        if majors or members:
+            self.refresh_hierarchy([pk])
+
+        SearchService().index_course(pk)
+        SearchService().link_modules(modules)
+        return updated
 
     def delete(self, pk: int, request_data=None):
         course: Course = self.__model__.objects.get(pk=pk)
@@ -120,160 +638,1961 @@ class CourseService(BaseService):
         members_to_del: list = request_data.get('members', [])
 
         if len(majors_to_del) != 0 or len(modules_to_del) != 0 or len(members_to_del) != 0:
-            course.majors.remove(*majors_to_del)
-            course.modules.remove(*modules_to_del)
-            course.members.remove(*members_to_del)
+            with transaction.atomic():
+                course.majors.remove(*majors_to_del)
+                course.modules.remove(*modules_to_del)
+                course.members.remove(*members_to_del)
+                self.touch([pk])
+                self.record_changes(ChangeRecord.Operation.UPDATED, [pk])
+                self.refresh_hierarchy([pk])
+
+            EnrollmentService().invalidate_groups(members_to_del)
+            DashboardService().invalidate_courses([pk])
         else:
-            shutil.rmtree(os.path.join(MEDIA_DIR / 'courses', course.title))
-            course.delete()
+            course_dir: str = os.path.join(MEDIA_DIR / 'courses', course.title)
+
+            if os.path.isdir(course_dir):
+                shutil.rmtree(course_dir)
+
+            EnrollmentService().invalidate_groups(course.members.all())
+
+            with transaction.atomic():
+                release_files(course)
+                course.delete()
+                self.record_changes(ChangeRecord.Operation.DELETED, [pk])
+                self.remove_from_hierarchy([pk])
+
+            EVALUATION_CRITERIA_CACHE.pop(pk, None)
+            SearchService().remove(SearchDocument.Kind.COURSE, pk)
+
+        SearchService().link_modules(modules_to_del)
+
+    def clone(self, pk: int, request_data) -> Course:
+        source: Course = Course.objects.get(pk=pk)
+        deadline_shift = timedelta(days=int(request_data.get('deadline_shift', 0)))
+        members: list = request_data.get('members', [])
+
+        module_ids: list[int] = list(source.modules.values_list('pk', flat=True))
+        modules: list[Module] = list(Module.objects.filter(pk__in=module_ids).order_by('pk'))
+        lectures: list[Lecture] = list(Lecture.objects.filter(module__in=module_ids).order_by('pk'))
+
+        practice_ids: set[int] = {task.practice_id for task in [source, *modules, *lectures] if task.practice_id}
+        evaluation_test_ids: set[int] = {task.evaluation_test_id for task in [source, *modules, *lectures]
+                                         if task.evaluation_test_id}
+        practices: list[Practice] = list(Practice.objects.filter(pk__in=practice_ids).order_by('pk'))
+        evaluation_tests: list[EvaluationTest] = list(EvaluationTest.objects.filter(pk__in=evaluation_test_ids)
+                                                      .order_by('pk'))
+        question_sections: list[QuestionSection] = list(QuestionSection.objects
+                                                        .filter(evaluation_test__in=evaluation_test_ids).order_by('pk'))
+        question_answers: list[QuestionAnswers] = list(QuestionAnswers.objects
+                                                       .filter(question_section__in=question_sections).order_by('pk'))
+
+        def copy_level(objects: list[Model], **remap: Dict[int, int]) -> Dict[int, int]:
+            old_ids: list[int] = [model_obj.pk for model_obj in objects]
+
+            for model_obj in objects:
+                model_obj.pk = model_obj.id = None
+                model_obj._state.adding = True
+
+                for date_field in ('deadline_date', 'start_time', 'end_time'):
+                    if getattr(model_obj, date_field, None) is not None:
+                        setattr(model_obj, date_field, getattr(model_obj, date_field) + deadline_shift)
+
+                for attname, id_map in remap.items():
+                    if getattr(model_obj, attname) is not None:
+                        setattr(model_obj, attname, id_map[getattr(model_obj, attname)])
+
+            return dict(zip(old_ids, (model_obj.pk for model_obj in type(objects[0]).objects.bulk_create(objects)))) \
+                if objects else {}
+
+        with transaction.atomic():
+            content_addressed_storage.retain_many([source.evaluation_criteria.name,
+                                                   *(lecture.materials.name for lecture in lectures),
+                                                   *(practice.description.name for practice in practices)])
+
+            practice_map: Dict[int, int] = copy_level(practices)
+            evaluation_test_map: Dict[int, int] = copy_level(evaluation_tests)
+            question_section_map: Dict[int, int] = copy_level(question_sections,
+                                                              evaluation_test_id=evaluation_test_map)
+            question_answer_map: Dict[int, int] = copy_level(question_answers, question_section_id=question_section_map)
+            module_map: Dict[int, int] = copy_level(modules, practice_id=practice_map,
+                                                    evaluation_test_id=evaluation_test_map)
+            lecture_map: Dict[int, int] = copy_level(lectures, module_id=module_map, practice_id=practice_map,
+                                                     evaluation_test_id=evaluation_test_map)
+
+            course: Course = Course.objects.create(
+                title=request_data.get('title') or f'{source.title} (копия)',
+                teacher_id=request_data.get('teacher') or source.teacher_id,
+                evaluation_criteria=source.evaluation_criteria.name,
+                evaluation_criteria_data=source.evaluation_criteria_data,
+                practice_id=practice_map.get(source.practice_id),
+                evaluation_test_id=evaluation_test_map.get(source.evaluation_test_id),
+                end_date=request_data.get('end_date') or None)
+            course.majors.set(source.majors.all())
+            course.modules.set(module_map.values())
+            course.members.set(members)
+
+            change_feed_service = ChangeFeedService()
+            change_feed_service.record(Practice, ChangeRecord.Operation.CREATED, practice_map.values())
+            change_feed_service.record(EvaluationTest, ChangeRecord.Operation.CREATED, evaluation_test_map.values())
+            change_feed_service.record(QuestionSection, ChangeRecord.Operation.CREATED, question_section_map.values())
+            change_feed_service.record(QuestionAnswers, ChangeRecord.Operation.CREATED, question_answer_map.values())
+            change_feed_service.record(Module, ChangeRecord.Operation.CREATED, module_map.values())
+            change_feed_service.record(Lecture, ChangeRecord.Operation.CREATED, lecture_map.values())
+            change_feed_service.record(Course, ChangeRecord.Operation.CREATED, [course.pk])
+            self.refresh_hierarchy([course.pk])
+
+            EnrollmentService().invalidate_groups(members)
+
+            for evaluation_test_id in evaluation_test_map.values():
+                PublishedTestService().schedule_publish(evaluation_test_id)
+
+            transaction.on_commit(lambda: BackgroundJobService().enqueue(
+                'course.index', {'course': course.pk, 'lectures': list(lecture_map.values()),
+                                 'question_sections': list(question_section_map.values())}))
+
+        return course
+
+    def save_files(self, pk: int, validated_data: dict) -> dict:
+        if validated_data.get('evaluation_criteria'):
+            validated_data['evaluation_criteria_data'] = parse_json_file(validated_data['evaluation_criteria'])
+
+        return super().save_files(pk, validated_data)
+
+    def get_evaluation_criteria(self, pk: int) -> dict:
+        course: Course = Course.objects.only('evaluation_criteria', 'evaluation_criteria_data').get(pk=pk)
+        criteria_file = course.evaluation_criteria
+        mtime: float = criteria_file.storage.get_modified_time(criteria_file.name).timestamp() \
+            if criteria_file.name and criteria_file.storage.exists(criteria_file.name) else 0.0
+
+        cached: tuple[float, dict] | None = EVALUATION_CRITERIA_CACHE.get(pk)
+
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        evaluation_criteria: dict = course.evaluation_criteria_data
+
+        if not evaluation_criteria and mtime:
+            with criteria_file.open('rb'):
+                evaluation_criteria = parse_json_file(criteria_file)
+
+            Course.objects.filter(pk=pk).update(evaluation_criteria_data=evaluation_criteria)
+
+        EVALUATION_CRITERIA_CACHE[pk] = (mtime, evaluation_criteria)
+        return evaluation_criteria
+
+    def grade(self, pk: int, totals: Iterable[float]) -> list[int | bool]:
+        evaluation_criteria: dict = self.get_evaluation_criteria(pk)
+        thresholds: list[tuple[float, int]] = sorted((float(threshold), int(grade_key.removeprefix('grade_')))
+                                                     for grade_key, threshold in
+                                                     evaluation_criteria.get('grades', {}).items())
+        scores: list[float] = [threshold for threshold, _ in thresholds]
+        grades: list[int] = [grade for _, grade in thresholds]
+
+        final_grades: list[int] = [grades[position - 1] if (position := bisect_right(scores, total)) else 2
+                                   for total in totals]
+
+        if evaluation_criteria.get('credit'):
+            return [final_grade >= 3 for final_grade in final_grades]
+
+        return final_grades
+
+
+class DashboardService:
+    def cache_key(self, student_id: int) -> str:
+        return f'student_dashboard:{timezone.localdate()}:{student_id}'
+
+    def invalidate(self, student_ids: Iterable[int]) -> None:
+        student_ids = set(student_ids)
+
+        if student_ids:
+            transaction.on_commit(lambda: cache.delete_many([self.cache_key(student_id) for student_id in student_ids]))
+
+    def invalidate_courses(self, course_ids: Iterable[int]) -> None:
+        course_ids = set(course_ids)
+
+        if course_ids:
+            self.invalidate(StudyGroup.students.through.objects.filter(studygroup__course_members__in=course_ids)
+                            .values_list('student_id', flat=True))
+            LectureProgressService().invalidate(course_ids)
+
+    def get(self, student_id: int) -> dict:
+        cache_key: str = self.cache_key(student_id)
+        dashboard: dict | None = cache.get(cache_key)
+
+        if dashboard is None:
+            dashboard = self.build(student_id)
+            cache.set(cache_key, dashboard, getattr(settings, 'STUDENT_DASHBOARD_CACHE_TIMEOUT', 600))
+
+        return dashboard
+
+    def build(self, student_id: int) -> dict:
+        course_ids: frozenset[int] = EnrollmentService().get_course_ids(student_id)
+        courses: list[dict] = list(Course.objects.filter(pk__in=course_ids).order_by('title')
+                                   .values('id', 'title', 'end_date', 'practice_id', 'evaluation_test_id'))
+        course_modules: list[tuple[int, int]] = list(Course.modules.through.objects.filter(course_id__in=course_ids)
+                                                     .values_list('course_id', 'module_id'))
+        module_ids: set[int] = {module_id for _, module_id in course_modules}
+        modules: Dict[int, dict] = {module['id']: module for module in Module.objects.filter(pk__in=module_ids)
+                                    .values('id', 'practice_id', 'evaluation_test_id')}
+        lectures: list[dict] = list(Lecture.objects.filter(module_id__in=module_ids)
+                                    .values('id', 'title', 'deadline_date', 'module_id', 'practice_id',
+                                            'evaluation_test_id'))
+
+        task_courses: Dict[tuple[str, int], set] = defaultdict(set)
+        module_courses: Dict[int, set] = defaultdict(set)
+
+        for course_id, module_id in course_modules:
+            module_courses[module_id].add(course_id)
+
+        for course in courses:
+            task_courses[('practice', course['practice_id'])].add(course['id'])
+            task_courses[('evaluation_test', course['evaluation_test_id'])].add(course['id'])
+
+        for module_id, module in modules.items():
+            task_courses[('practice', module['practice_id'])] |= module_courses[module_id]
+            task_courses[('evaluation_test', module['evaluation_test_id'])] |= module_courses[module_id]
+
+        for lecture in lectures:
+            task_courses[('lecture', lecture['id'])] |= module_courses[lecture['module_id']]
+            task_courses[('practice', lecture['practice_id'])] |= module_courses[lecture['module_id']]
+            task_courses[('evaluation_test', lecture['evaluation_test_id'])] |= module_courses[lecture['module_id']]
+
+        practice_ids: set[int] = {pk for kind, pk in task_courses if kind == 'practice' and pk}
+        evaluation_test_ids: set[int] = {pk for kind, pk in task_courses if kind == 'evaluation_test' and pk}
+        tasks: list[dict] = [
+            *({**lecture, 'kind': 'lecture'} for lecture in lectures),
+            *({**practice, 'kind': 'practice'} for practice in Practice.objects.filter(pk__in=practice_ids)
+              .values('id', 'title', 'deadline_date', 'final_score_is', 'max_score')),
+            *({**evaluation_test, 'kind': 'evaluation_test'} for evaluation_test in EvaluationTest.objects
+              .filter(pk__in=evaluation_test_ids).values('id', 'title', 'deadline_date', 'final_score_is'))]
+
+        task_filter = Q(practice_id__in=practice_ids) | Q(evaluation_test_id__in=evaluation_test_ids)
+        task_results: Dict[tuple[str, int], list] = defaultdict(list)
+
+        for student_result in StudentResult.objects.filter(task_filter, student_id=student_id).order_by('pk') \
+                .values('id', 'practice_id', 'evaluation_test_id', 'score'):
+            task_key: tuple[str, int] = ('practice', student_result['practice_id']) if student_result['practice_id'] \
+                else ('evaluation_test', student_result['evaluation_test_id'])
+            task_results[task_key].append((student_result['id'], student_result['score']))
+
+        archived_results: Dict[tuple[str, int], dict] = {
+            ('practice', archive['practice_id']) if archive['practice_id'] else
+            ('evaluation_test', archive['evaluation_test_id']): archive
+            for archive in StudentResultArchive.objects.filter(task_filter, student_id=student_id)
+            .values('practice_id', 'evaluation_test_id', 'attempts', 'final_result_id', 'final_score')}
+
+        today = timezone.localdate()
+        deadlines: list[dict] = []
+        results: list[dict] = []
+
+        for task in tasks:
+            task_key: tuple[str, int] = (task['kind'], task['id'])
+
+            if task['deadline_date'] >= today:
+                deadlines.append({'kind': task['kind'], 'id': task['id'], 'title': task['title'],
+                                  'deadline_date': task['deadline_date'], 'courses': sorted(task_courses[task_key])})
+
+            if task['kind'] == 'lecture':
+                continue
+
+            attempts: list[tuple[int, float]] = task_results.get(task_key, [])
+            archive: dict | None = archived_results.get(task_key)
+
+            if archive:
+                attempts = [(archive['final_result_id'], archive['final_score']), *attempts]
+
+            if not attempts:
+                continue
+
+            final_result_id, final_score = max(attempts, key=lambda attempt: (attempt[1], -attempt[0])) \
+                if task['final_score_is'] == BaseTask.FinalScoreIs.BEST_ATTEMPT else attempts[-1]
+            results.append({'kind': task['kind'], 'id': task['id'], 'title': task['title'],
+                            'attempts': len(task_results.get(task_key, [])) + (archive['attempts'] if archive else 0),
+                            'final_result_id': final_result_id, 'final_score': final_score,
+                            'max_score': task.get('max_score')})
+
+        return {'student': student_id,
+                'courses': [{'id': course['id'], 'title': course['title'], 'end_date': course['end_date']}
+                            for course in courses],
+                'deadlines': sorted(deadlines, key=lambda deadline: (deadline['deadline_date'], deadline['kind'],
+                                                                     deadline['id'])),
+                'results': results}
+
+
+class DeadlineReminderService:
+    KIND_DISPLAY = {'lecture': 'Лекция', 'practice': 'Практическое задание', 'evaluation_test': 'Оценочный тест'}
+
+    def get_reminder_dates(self, day: date) -> list[date]:
+        return [day + timedelta(days=days) for days in getattr(settings, 'DEADLINE_REMINDER_DAYS', (1, 3))]
+
+    def get_due_tasks(self, dates: list[date]) -> Dict[tuple[str, int], dict]:
+        return {(kind, task['id']): {**task, 'kind': kind, 'kind_display': self.KIND_DISPLAY[kind], 'courses': set()}
+                for kind, model in (('lecture', Lecture), ('practice', Practice), ('evaluation_test', EvaluationTest))
+                for task in model.objects.filter(deadline_date__in=dates).values('id', 'title', 'deadline_date')}
+
+    def link_courses(self, tasks: Dict[tuple[str, int], dict]) -> None:
+        task_ids: Dict[str, list[int]] = {kind: [pk for task_kind, pk in tasks if task_kind == kind]
+                                          for kind in self.KIND_DISPLAY}
+        course_modules: QuerySet = Course.modules.through.objects
+        links: list[tuple[int, list[tuple[str, int]]]] = [
+            *((course_id, [('practice', practice_id), ('evaluation_test', evaluation_test_id)])
+              for course_id, practice_id, evaluation_test_id in Course.objects
+              .filter(Q(practice__in=task_ids['practice']) | Q(evaluation_test__in=task_ids['evaluation_test']))
+              .values_list('id', 'practice_id', 'evaluation_test_id')),
+            *((course_id, [('practice', practice_id), ('evaluation_test', evaluation_test_id)])
+              for course_id, practice_id, evaluation_test_id in course_modules
+              .filter(Q(module__practice__in=task_ids['practice']) |
+                      Q(module__evaluation_test__in=task_ids['evaluation_test']))
+              .values_list('course_id', 'module__practice_id', 'module__evaluation_test_id')),
+            *((course_id, [('lecture', lecture_id), ('practice', practice_id), ('evaluation_test', evaluation_test_id)])
+              for course_id, lecture_id, practice_id, evaluation_test_id in course_modules
+              .filter(Q(module__lecture__in=task_ids['lecture']) |
+                      Q(module__lecture__practice__in=task_ids['practice']) |
+                      Q(module__lecture__evaluation_test__in=task_ids['evaluation_test']))
+              .values_list('course_id', 'module__lecture__id', 'module__lecture__practice_id',
+                           'module__lecture__evaluation_test_id'))]
+
+        for course_id, task_keys in links:
+            for task_key in task_keys:
+                if task_key in tasks:
+                    tasks[task_key]['courses'].add(course_id)
+
+    def get_reminders(self, day: date) -> list[dict]:
+        # A fixed number of set-based queries covers every enrolled student, however many there are.
+        tasks: Dict[tuple[str, int], dict] = self.get_due_tasks(self.get_reminder_dates(day))
+        self.link_courses(tasks)
+
+        course_tasks: Dict[int, list[dict]] = defaultdict(list)
+
+        for task in tasks.values():
+            for course_id in task['courses']:
+                course_tasks[course_id].append(task)
+
+        if not course_tasks:
+            return []
+
+        task_filter = Q(practice_id__in=[pk for kind, pk in tasks if kind == 'practice']) | \
+            Q(evaluation_test_id__in=[pk for kind, pk in tasks if kind == 'evaluation_test'])
+        submitted: set[tuple[int, str, int]] = {
+            (student_id, 'practice', practice_id) if practice_id else
+            (student_id, 'evaluation_test', evaluation_test_id)
+            for model, model_filter in ((StudentResult, Q(is_completed=True)), (StudentResultArchive, Q()))
+            for student_id, practice_id, evaluation_test_id in model.objects.filter(task_filter, model_filter)
+            .values_list('student_id', 'practice_id', 'evaluation_test_id').distinct()}
+
+        reminders: Dict[int, dict] = {}
+
+        for course_id, course_title, student_id, email, first_name in StudyGroup.students.through.objects \
+                .filter(studygroup__course_members__in=list(course_tasks)) \
+                .values_list('studygroup__course_members', 'studygroup__course_members__title', 'student_id',
+                             'student__user__email', 'student__first_name').distinct():
+            if not email:
+                continue
+
+            reminder: dict = reminders.setdefault(student_id, {'student': student_id, 'email': email,
+                                                               'student_name': first_name, 'deadlines': {}})
+
+            for task in course_tasks[course_id]:
+                if (student_id, task['kind'], task['id']) in submitted:
+                    continue
+
+                deadline: dict = reminder['deadlines'].setdefault(
+                    (task['kind'], task['id']), {key: task[key] for key in ('kind', 'kind_display', 'id', 'title',
+                                                                            'deadline_date')} | {'courses': []})
+
+                if course_title not in deadline['courses']:
+                    deadline['courses'].append(course_title)
+
+        return [{**reminder, 'deadlines': sorted(reminder['deadlines'].values(),
+                                                 key=lambda deadline: (deadline['deadline_date'], deadline['title']))}
+                for reminder in reminders.values() if reminder['deadlines']]
+
+    def send(self, day: date | None = None, batch_size: int | None = None, backend: str | None = None,
+             dry_run: bool = False) -> int:
+        reminders: list[dict] = self.get_reminders(day or timezone.localdate())
+        batch_size = batch_size or getattr(settings, 'DEADLINE_REMINDER_BATCH_SIZE', 100)
+
+        if dry_run or not reminders:
+            return len(reminders)
+
+        sent: int = 0
+
+        # One connection is opened for all batches instead of one per message.
+        with get_connection(backend) as connection:
+            for start in range(0, len(reminders), batch_size):
+                sent += connection.send_messages([DeadlineReminderEmail(context=reminder).prepare([reminder['email']])
+                                                  for reminder in reminders[start:start + batch_size]]) or 0
+
+        return sent
 
 
 class DepartmentService(BaseService):
+    tracks_hierarchy = True
+
     def __init__(self):
         super().__init__(Department, DepartmentSerializer)
 
 
+class EnrollmentService:
+    @staticmethod
+    def cache_key(student_id: int) -> str:
+        return f'student_courses:{student_id}'
+
+    @staticmethod
+    def user_cache_key(user_id: int) -> str:
+        return f'user_student:{user_id}'
+
+    def get_student_id(self, user) -> int | None:
+        student_id: int | None = cache.get(self.user_cache_key(user.pk))
+
+        if student_id is None:
+            student_id = Student.objects.filter(user=user).values_list('id', flat=True).first() or 0
+            cache.set(self.user_cache_key(user.pk), student_id, getattr(settings, 'ENROLLMENT_CACHE_TIMEOUT', 60 * 60))
+
+        return student_id or None
+
+    def get_course_ids(self, student_id: int) -> frozenset[int]:
+        course_ids: frozenset[int] | None = cache.get(self.cache_key(student_id))
+
+        if course_ids is None:
+            course_ids = frozenset(Course.objects.filter(members__students=student_id).values_list('id', flat=True))
+            cache.set(self.cache_key(student_id), course_ids, getattr(settings, 'ENROLLMENT_CACHE_TIMEOUT', 60 * 60))
+
+        return course_ids
+
+    def get_user_course_ids(self, user) -> frozenset[int]:
+        student_id: int | None = self.get_student_id(user)
+        return self.get_course_ids(student_id) if student_id else frozenset()
+
+    def is_enrolled(self, student_id: int, course_id: int) -> bool:
+        return int(course_id) in self.get_course_ids(student_id)
+
+    def invalidate(self, student_ids: Iterable[int]) -> None:
+        student_ids = set(student_ids)
+        cache_keys: list[str] = [self.cache_key(student_id) for student_id in student_ids]
+
+        if cache_keys:
+            transaction.on_commit(lambda: cache.delete_many(cache_keys))
+            DashboardService().invalidate(student_ids)
+
+    def invalidate_groups(self, study_groups: Iterable[StudyGroup | int]) -> None:
+        study_group_ids: list[int] = [getattr(study_group, 'pk', study_group) for study_group in study_groups]
+
+        if study_group_ids:
+            self.invalidate(StudyGroup.students.through.objects.filter(studygroup_id__in=study_group_ids)
+                            .values_list('student_id', flat=True))
+
+
 class EvaluationTestService(BaseService):
+    dashboard_course_lookups = ('evaluation_test', 'modules__evaluation_test', 'modules__lecture__evaluation_test')
+
     def __init__(self):
         super().__init__(EvaluationTest, EvaluationTestSerializer)
 
-    def check(self, student_id: int, evaluation_test_id: int, answers: list) -> float:
-        student_score: float = 0.0
+    def get_validators(self, model_obj: Model) -> tuple[datetime, str] | None:
+        return self.get_validators_with(model_obj, QuestionSection.objects.filter(evaluation_test=model_obj.pk),
+                                        QuestionAnswers.objects.filter(question_section__evaluation_test=model_obj.pk))
+
+    def update(self, pk: int, request_data) -> int:
+        updated: int = super().update(pk, request_data)
+        PublishedTestService().schedule_publish(pk)
+        return updated
+
+    def get_answer_key(self, evaluation_test_id: int) -> Dict[int, tuple[int, float]]:
         eval_test_answers: QuerySet[QuestionAnswers] = EvaluationTest.objects.get(pk=evaluation_test_id).answers
-        student: Student = Student.objects.get(pk=student_id)
+        return {answer_id: (question_section_id, score) for answer_id, question_section_id, score
+                in eval_test_answers.values_list('id', 'question_section_id', 'score')}
 
-        for _, answer in enumerate(answers):
-            if isinstance(answer['answer'], list):
-                for answer_id in answer['answer']:
-                    eval_test_answer: QuestionAnswers = eval_test_answers.filter(pk=answer_id,
-                                                                                 question_section_id=
-                                                                                 answer['question_section']).first()
+    def get_chosen_answers(self, answers: list) -> List[tuple[int, int]]:
+        chosen_answers: set = set()
 
-                    if eval_test_answer:
-                        student_score += eval_test_answer.score
+        # Answers without a usable id (null, '', text) choose nothing, as unknown ids do.
+        for answer in answers:
+            question_section_id: int | None = parse_id(answer['question_section'])
+            answer_ids: list = answer['answer'] if isinstance(answer['answer'], list) else [answer['answer']]
 
+            if question_section_id is None:
                 continue
 
-            eval_test_answer: QuestionAnswers = eval_test_answers.filter(pk=answer['answer'],
-                                                                         question_section_id=answer['question_section']
-                                                                         ).first()
+            chosen_answers.update((question_section_id, answer_id) for answer_id in map(parse_id, answer_ids)
+                                  if answer_id is not None)
+
+        return sorted(chosen_answers)
+
+    def score_answers(self, answer_key: Dict[int, tuple[int, float]],
+                      chosen_answers: List[tuple[int, int]]) -> Dict[int, float]:
+        question_scores: Dict[int, float] = {question_section_id: 0.0
+                                             for question_section_id, _ in sorted(answer_key.values())}
+
+        for question_section_id, answer_id in chosen_answers:
+            answer_section_id, score = answer_key.get(answer_id, (None, 0.0))
+
+            if answer_section_id == question_section_id:
+                question_scores[question_section_id] += score
+
+        return question_scores
 
-            if eval_test_answer:
-                student_score += eval_test_answer.score
+    def check(self, student_id: int, evaluation_test_id: int, answers: list) -> float:
+        chosen_answers: List[tuple[int, int]] = self.get_chosen_answers(answers)
+        question_scores: Dict[int, float] = self.score_answers(self.get_answer_key(evaluation_test_id), chosen_answers)
+        student_score: float = sum(question_scores.values())
+        student: Student = Student.objects.get(pk=student_id)
 
         student_result: StudentResult = StudentResult.objects.filter(student_id=student_id,
                                                                      evaluation_test_id=evaluation_test_id).last()
-        if student_result:
-            StudentResult.objects.create(student=student_result.student, is_completed=True, score=student_score,
-                                         evaluation_test=student_result.evaluation_test,
-                                         attempt=student_result.attempt + 1)
-        else:
-            StudentResult.objects.create(student=student, is_completed=True, score=student_score,
-                                         evaluation_test=self.get(evaluation_test_id))
 
+        with transaction.atomic():
+            if student_result:
+                student_result = StudentResult.objects.create(
+                    student=student_result.student, is_completed=True, score=student_score,
+                    evaluation_test=student_result.evaluation_test, attempt=student_result.attempt + 1,
+                    question_scores=pack_question_scores(question_scores),
+                    chosen_answers=pack_chosen_answers(chosen_answers))
+            else:
+                archived_attempts: int = StudentResultArchive.objects.filter(
+                    student_id=student_id, evaluation_test_id=evaluation_test_id) \
+                    .values_list('attempts', flat=True).first()
+                student_result = StudentResult.objects.create(
+                    student=student, is_completed=True, score=student_score,
+                    evaluation_test=self.get(evaluation_test_id), attempt=(archived_attempts or 0) + 1,
+                    question_scores=pack_question_scores(question_scores),
+                    chosen_answers=pack_chosen_answers(chosen_answers))
+
+            ChangeFeedService().record(StudentResult, ChangeRecord.Operation.CREATED, [student_result.pk])
+
+        DashboardService().invalidate([student_id])
         return student_score
 
+    def regrade(self, evaluation_test_id: int, batch_size: int = 1000,
+                progress: Callable[[int, int], None] | None = None) -> int:
+        answer_key: Dict[int, tuple[int, float]] = self.get_answer_key(evaluation_test_id)
+        student_results: QuerySet = StudentResult.objects.filter(evaluation_test_id=evaluation_test_id,
+                                                                 chosen_answers__isnull=False) \
+            .only('pk', 'score', 'question_scores', 'chosen_answers').order_by('pk')
+        total: int = student_results.count()
+        last_id: int = 0
+        regraded: int = 0
 
-class LectureService(BaseService):
-    def __init__(self):
-        super().__init__(Lecture, LectureSerializer)
+        while batch := list(student_results.filter(pk__gt=last_id)[:batch_size]):
+            for student_result in batch:
+                question_scores: Dict[int, float] = self.score_answers(
+                    answer_key, unpack_chosen_answers(student_result.chosen_answers))
+                student_result.score = sum(question_scores.values())
+                student_result.question_scores = pack_question_scores(question_scores)
+                student_result.updated_at = timezone.now()
 
+            with transaction.atomic():
+                StudentResult.objects.bulk_update(batch, ['score', 'question_scores', 'updated_at'])
+                ChangeFeedService().record(StudentResult, ChangeRecord.Operation.UPDATED,
+                                           [student_result.pk for student_result in batch])
 
-class MajorService(BaseService):
-    def __init__(self):
-        super().__init__(Major, MajorSerializer)
+            last_id = batch[-1].pk
+            regraded += len(batch)
 
+            if progress:
+                progress(regraded, total)
 
-class ModuleService(BaseService):
-    def __init__(self):
-        super().__init__(Module, ModuleSerializer)
+        AnalyticsService().invalidate(evaluation_test_id)
+        DashboardService().invalidate(student_results.values_list('student_id', flat=True).distinct())
+        return regraded
 
+    def schedule_regrade(self, evaluation_test_id: int | None) -> None:
+        if evaluation_test_id is None:
+            return
 
-class PersonService(BaseService):
-    def __init__(self):
-        super().__init__(Person, PersonSerializer)
+        def enqueue():
+            if BackgroundJobService().has_pending('evaluation_test.regrade', evaluation_test=evaluation_test_id):
+                return
 
+            if StudentResult.objects.filter(evaluation_test_id=evaluation_test_id,
+                                            chosen_answers__isnull=False).exists():
+                BackgroundJobService().enqueue('evaluation_test.regrade', {'evaluation_test': evaluation_test_id})
 
-class ProgramService(BaseService):
-    def __init__(self):
-        super().__init__(Program, ProgramSerializer)
+        on_commit_once(f'evaluation_test.regrade:{evaluation_test_id}', enqueue)
 
 
-class PracticeService(BaseService):
+class ExamSessionService(BaseService):
+    records_changes = False
+
     def __init__(self):
-        super().__init__(Practice, PracticeSerializer)
+        super().__init__(ExamSession, ExamSessionSerializer)
 
-    def check(self, student_id: int, practice_id: int, score: float):
-        student: Student = Student.objects.get(pk=student_id)
+    @staticmethod
+    def cache_key(pk: int) -> str:
+        return f'exam_session:{pk}'
 
-        student_result: StudentResult = StudentResult.objects.filter(student_id=student_id,
-                                                                     practice_id=practice_id).last()
-        if student_result:
-            StudentResult.objects.create(student=student_result.student, is_completed=True, score=score,
-                                         practice=student_result.practice,
-                                         attempt=student_result.attempt + 1)
-        else:
-            StudentResult.objects.create(student=student, is_completed=True, score=score,
-                                         evaluation_test=self.get(practice_id))
+    @staticmethod
+    def grace_period() -> timedelta:
+        return timedelta(seconds=getattr(settings, 'EXAM_SESSION_GRACE_PERIOD', 15))
 
+    def get(self, pk: int) -> ExamSession | None:
+        exam_session: ExamSession | None = super().get(pk)
 
-class SubjectService(BaseService):
-    def __init__(self):
-        super().__init__(Subject, SubjectSerializer)
+        if exam_session is None or exam_session.is_finished:
+            return exam_session
 
+        if self.finish_if_expired(exam_session):
+            return super().get(pk)
 
-class StudentService(BaseService):
-    def __init__(self):
-        super().__init__(Student, StudentSerializer)
+        exam_session.answers = self.get_answers(exam_session)
+        return exam_session
 
+    def start(self, request_data) -> ExamSession:
+        validated_data: dict = self.validate_data(request_data)
+        student: Student = validated_data['student']
+        evaluation_test: EvaluationTest = validated_data['evaluation_test']
 
-class StudentResultService(BaseService):
-    def __init__(self):
-        super().__init__(StudentResult, StudentResultSerializer)
+        active_session: ExamSession | None = ExamSession.objects.filter(student=student, evaluation_test=evaluation_test,
+                                                                        is_finished=False).first()
 
-    def get_final_result(self, student_id: int = None, evaluation_test_id: int = None, practice_id: int = None) -> int | None:
-        if evaluation_test_id:
-            return EvaluationTest.objects.get(pk=evaluation_test_id).get_final_attempt(student_id)
+        if active_session and not self.finish_if_expired(active_session):
+            return active_session
 
-        return Practice.objects.get(pk=practice_id).get_final_attempt(student_id)
+        course_ids: set[int] = set(Course.objects.filter(Q(evaluation_test=evaluation_test) |
+                                                         Q(modules__evaluation_test=evaluation_test) |
+                                                         Q(modules__lecture__evaluation_test=evaluation_test))
+                                   .values_list('id', flat=True))
 
-    def get_by(self, **kwargs) -> QuerySet[Model] | None:
-        if kwargs.get('evaluation_test_id'):
-            return StudentResult.objects.filter(evaluation_test_id=kwargs.get('evaluation_test_id'))
-        elif kwargs.get('practice_id'):
-            return StudentResult.objects.filter(practice_id=kwargs.get('practice_id'))
-        elif kwargs.get('student'):
-            if kwargs.get('evaluation_test'):
-                return StudentResult.objects.filter(student_id=kwargs.get('student'),
-                                                    evaluation_test_id=kwargs.get('evaluation_test'))
-            elif kwargs.get('practice'):
-                return StudentResult.objects.filter(student_id=kwargs.get('student'),
-                                                    practice_id=kwargs.get('practice'))
+        if course_ids and course_ids.isdisjoint(EnrollmentService().get_course_ids(student.pk)):
+            raise ValidationError('Student is not enrolled in the course.')
 
-        return None
+        now = timezone.now()
 
+        if evaluation_test.start_time and now < evaluation_test.start_time:
+            raise ValidationError('Evaluation test has not started yet.')
 
-class StudyGroupService(BaseService):
-    def __init__(self):
-        super().__init__(StudyGroup, StudyGroupSerializer)
+        if evaluation_test.end_time and now >= evaluation_test.end_time:
+            raise ValidationError('Evaluation test is already over.')
 
+        if StudentResultService().count_attempts(student.pk, evaluation_test.pk) >= evaluation_test.allowed_attempts:
+            raise ValidationError('No attempts left.')
 
-class TeacherService(BaseService):
-    def __init__(self):
-        super().__init__(Teacher, TeacherSerializer)
+        expires_at = now + timedelta(minutes=evaluation_test.complete_time)
 
+        if evaluation_test.end_time:
+            expires_at = min(expires_at, evaluation_test.end_time)
 
-class QuestionSectionService(BaseService):
-    def __init__(self):
-        super().__init__(QuestionSection, QuestionSectionSerializer)
+        try:
+            with transaction.atomic():
+                return ExamSession.objects.create(student=student, evaluation_test=evaluation_test,
+                                                  expires_at=expires_at)
+        except IntegrityError:
+            return ExamSession.objects.get(student=student, evaluation_test=evaluation_test, is_finished=False)
 
+    def get_answers(self, exam_session: ExamSession) -> dict:
+        cached: dict | None = cache.get(self.cache_key(exam_session.pk))
+        return {**exam_session.answers, **cached['answers']} if cached else exam_session.answers
 
-class QuestionAnswersService(BaseService):
-    def __init__(self):
-        super().__init__(QuestionAnswers, QuestionAnswersSerializer)
+    def autosave(self, pk: int, answers: list) -> ExamSession:
+        exam_session: ExamSession = ExamSession.objects.get(pk=pk)
 
-    def update(self, pk: int, request_data) -> int:
-        if not request_data['is_correct']:
-            request_data['score'] = 0.0
+        if exam_session.is_finished or self.finish_if_expired(exam_session):
+            raise ValidationError('Exam session is already finished.')
+
+        # The session row lock serializes concurrent autosaves (and finish) around the cache read-modify-write.
+        with transaction.atomic():
+            exam_session = ExamSession.objects.select_for_update().get(pk=pk)
+
+            if exam_session.is_finished:
+                raise ValidationError('Exam session is already finished.')
+
+            cached: dict = cache.get(self.cache_key(pk)) or {'answers': {}, 'pending': 0, 'flushed_at': time.time()}
+
+            try:
+                for answer in answers:
+                    question_section_id: int | None = parse_id(answer['question_section'])
+                    is_multiple: bool = isinstance(answer['answer'], list)
+                    answer_ids: list = [parse_id(answer_id) for answer_id in
+                                        (answer['answer'] if is_multiple else [answer['answer']])]
+
+                    if question_section_id is None or None in answer_ids:
+                        raise ValueError
+
+                    cached['answers'][str(question_section_id)] = answer_ids if is_multiple else answer_ids[0]
+            except (KeyError, TypeError, ValueError):
+                raise ValidationError('Each answer must contain \'question_section\' and \'answer\' ids.')
+
+            cached['pending'] += 1
+
+            if cached['pending'] >= getattr(settings, 'EXAM_AUTOSAVE_FLUSH_EVERY', 10) or \
+                    time.time() - cached['flushed_at'] >= getattr(settings, 'EXAM_AUTOSAVE_FLUSH_INTERVAL', 60):
+                self.flush(exam_session, cached['answers'])
+            else:
+                timeout: float = (exam_session.expires_at - timezone.now() + self.grace_period()).total_seconds()
+                cache.set(self.cache_key(pk), cached, timeout=int(timeout) + 3600)
+
+        return exam_session
+
+    def flush(self, exam_session: ExamSession, answers: dict) -> None:
+        exam_session.answers = {**exam_session.answers, **answers}
+        ExamSession.objects.filter(pk=exam_session.pk).update(answers=exam_session.answers)
+        cache.delete(self.cache_key(exam_session.pk))
+
+    def finish(self, pk: int) -> ExamSession:
+        with transaction.atomic():
+            exam_session: ExamSession = ExamSession.objects.select_for_update().get(pk=pk)
+
+            if exam_session.is_finished:
+                return exam_session
+
+            exam_session.answers = self.get_answers(exam_session)
+            EvaluationTestService().check(exam_session.student_id, exam_session.evaluation_test_id,
+                                          [{'question_section': int(question_section_id), 'answer': answer}
+                                           for question_section_id, answer in exam_session.answers.items()])
+
+            exam_session.is_finished = True
+            exam_session.student_result = StudentResult.objects.filter(
+                student_id=exam_session.student_id, evaluation_test_id=exam_session.evaluation_test_id).last()
+            exam_session.save(update_fields=['answers', 'is_finished', 'student_result'])
+
+        cache.delete(self.cache_key(pk))
+        return exam_session
+
+    def finish_if_expired(self, exam_session: ExamSession) -> bool:
+        if timezone.now() <= exam_session.expires_at + self.grace_period():
+            return False
+
+        self.finish(exam_session.pk)
+        return True
+
+    def finish_expired(self) -> int:
+        expired_ids: list = list(ExamSession.objects.filter(is_finished=False,
+                                                            expires_at__lt=timezone.now() - self.grace_period())
+                                 .values_list('pk', flat=True))
+
+        finished: int = 0
+
+        # A session that cannot be graded is logged and left for the next sweep, the others are still finished.
+        for _, exam_session_id in enumerate(expired_ids):
+            try:
+                with transaction.atomic():
+                    self.finish(exam_session_id)
+            except Exception:
+                logger.exception('Could not finish expired exam session %s', exam_session_id)
+                continue
+
+            finished += 1
+
+        return finished
+
+
+class IdempotencyService:
+    IN_PROGRESS = 'in_progress'
+    MISMATCH = 'mismatch'
+
+    @staticmethod
+    def cache_key(user_id: int, key: str) -> str:
+        return f'idempotency:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+    @staticmethod
+    def ttl() -> int:
+        return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+
+    @staticmethod
+    def lease() -> int:
+        return getattr(settings, 'IDEMPOTENCY_LEASE_SECONDS', 5 * 60)
+
+    @staticmethod
+    def fingerprint(*parts) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, cls=DjangoJSONEncoder).encode()).hexdigest()
+
+    def get_stored(self, user_id: int, key: str) -> dict | None:
+        stored: dict | None = cache.get(self.cache_key(user_id, key))
+
+        if stored is not None:
+            return stored
+
+        stored = IdempotentResponse.objects.filter(user_id=user_id, key=key, expires_at__gt=timezone.now()) \
+            .values('fingerprint', 'status_code', 'response', 'expires_at').first()
 
-        return super().update(pk, request_data)
+        if stored is not None and stored['status_code'] is not None:
+            cache.set(self.cache_key(user_id, key), stored,
+                      max(int((stored['expires_at'] - timezone.now()).total_seconds()), 1))
+
+        return stored
+
+    def execute(self, user_id: int, key: str, fingerprint: str,
+                handler: Callable[[], tuple[int, dict]]) -> tuple[str | None, int, dict]:
+        stored: dict | None = self.get_stored(user_id, key)
+
+        if stored is not None:
+            if stored['fingerprint'] != fingerprint:
+                return self.MISMATCH, 422, {}
+
+            if stored['status_code'] is None:
+                return self.IN_PROGRESS, 409, {}
+
+            return None, stored['status_code'], stored['response']
+
+        now = timezone.now()
+
+        # The placeholder only holds the key for a short lease, so a worker that dies mid-request leaves a row that
+        # expires and is reclaimed by the next retry instead of answering 409 for the whole TTL.
+        try:
+            with transaction.atomic():
+                IdempotentResponse.objects.filter(user_id=user_id, key=key, expires_at__lte=now).delete()
+                idempotent_response: IdempotentResponse = IdempotentResponse.objects.create(
+                    user_id=user_id, key=key, fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=self.lease()))
+        except IntegrityError:
+            return self.IN_PROGRESS, 409, {}
+
+        try:
+            status_code, response = handler()
+        except BaseException:
+            idempotent_response.delete()
+            raise
+
+        expires_at = timezone.now() + timedelta(seconds=self.ttl())
+        IdempotentResponse.objects.filter(pk=idempotent_response.pk).update(status_code=status_code,
+                                                                             response=response, expires_at=expires_at)
+        cache.set(self.cache_key(user_id, key), {'fingerprint': fingerprint, 'status_code': status_code,
+                                                 'response': response, 'expires_at': expires_at}, self.ttl())
+        return None, status_code, response
+
+    def cleanup(self, batch_size: int = 5000) -> int:
+        expired: QuerySet[IdempotentResponse] = IdempotentResponse.objects.filter(expires_at__lte=timezone.now())
+        deleted: int = 0
+
+        while ids := list(expired.values_list('pk', flat=True)[:batch_size]):
+            deleted += IdempotentResponse.objects.filter(pk__in=ids).delete()[0]
+
+        return deleted
+
+
+class LectureService(BaseService):
+    dashboard_course_lookups = ('modules__lecture',)
+
+    def __init__(self):
+        super().__init__(Lecture, LectureSerializer)
+
+    def create(self, request_data) -> Model:
+        lecture: Lecture = super().create(request_data)
+        SearchService().index_lecture(lecture.pk)
+        LectureMaterialsService().render_lecture(lecture)
+        return lecture
+
+    def update(self, pk: int, request_data) -> int:
+        updated: int = super().update(pk, request_data)
+        SearchService().index_lecture(pk)
+
+        if 'materials' in request_data:
+            LectureMaterialsService().get(pk)
+
+        return updated
+
+    def delete(self, pk: int, request_data=None):
+        deleted = super().delete(pk, request_data)
+        SearchService().remove(SearchDocument.Kind.LECTURE, pk)
+        return deleted
+
+
+class LectureMaterialsService:
+    # Rendered materials sit next to their source blob, so they share its lifetime and never go stale by name.
+    RENDERED_SUFFIX = '.rendered.v1.json'
+
+    def get_rendered_paths(self, name: str, asset_dir: str) -> tuple[str, str]:
+        # Lectures sharing a blob (cloned courses) keep their assets in their own directories.
+        asset_dir_hash: str = hashlib.sha256(asset_dir.encode()).hexdigest()[:12]
+        path: str = content_addressed_storage.path(f'{name}.{asset_dir_hash}{self.RENDERED_SUFFIX}')
+        return path, path + '.gz'
+
+    @staticmethod
+    def get_asset_dir(lecture: Lecture) -> str:
+        # Blobs are named by content, relative links in the materials point into the lecture's upload directory.
+        name: str = lecture.materials.name
+
+        if not name.startswith(f'{BLOBS_DIR}/'):
+            return posixpath.dirname(name)
+
+        try:
+            return posixpath.dirname(course_dir_path(lecture, posixpath.basename(name)))
+        except IndexError:
+            return posixpath.dirname(name)
+
+    def get_asset(self, asset_dir: str, url: str, assets: Dict[str, dict]) -> str | None:
+        name: str | None = resolve_asset(asset_dir, url)
+
+        if name is None or not content_addressed_storage.exists(name):
+            return safe_url(url)
+
+        if name not in assets:
+            stat: os.stat_result = os.stat(content_addressed_storage.path(name))
+            assets[name] = {'src': url, 'name': name, 'url': reverse('media', kwargs={'path': name}),
+                            'size': stat.st_size, 'etag': file_etag(stat)}
+
+        return assets[name]['url']
+
+    def render(self, name: str, force: bool = False, asset_dir: str | None = None) -> dict | None:
+        if not name or not content_addressed_storage.exists(name):
+            return None
+
+        asset_dir = posixpath.dirname(name) if asset_dir is None else asset_dir
+        source_path: str = content_addressed_storage.path(name)
+        source_stat: os.stat_result = os.stat(source_path)
+        asset_dir_path: str = content_addressed_storage.path(asset_dir) if asset_dir else ''
+        # Adding or removing an asset touches the directory, which makes the manifest stale as well.
+        changed_at: float = max(source_stat.st_mtime,
+                                os.path.getmtime(asset_dir_path) if os.path.isdir(asset_dir_path) else 0.0)
+        rendered_path, gzip_path = self.get_rendered_paths(name, asset_dir)
+        rendered: dict = {'path': rendered_path, 'gzip_path': gzip_path,
+                          'version': hashlib.sha256(f'{name}:{file_etag(source_stat)}:{asset_dir}:{changed_at}'
+                                                    .encode()).hexdigest()[:16]}
+
+        if not force and os.path.isfile(gzip_path) and os.path.getmtime(gzip_path) >= changed_at:
+            return rendered
+
+        with open(source_path, 'rb') as source:
+            markdown: str = source.read().decode('utf-8', errors='replace')
+
+        assets: Dict[str, dict] = {}
+        html: str = MarkdownRenderer(lambda url: self.get_asset(asset_dir, url, assets)).render(markdown)
+        payload: bytes = json.dumps({'materials': name, 'version': rendered['version'], 'html': html,
+                                     'assets': list(assets.values())},
+                                    ensure_ascii=False, separators=(',', ':')).encode()
+
+        for path, content in ((rendered_path, payload), (gzip_path, gzip.compress(payload, compresslevel=9))):
+            tmp_path: str = f'{path}.{os.getpid()}.tmp'
+
+            with open(tmp_path, 'wb') as tmp_file:
+                tmp_file.write(content)
+
+            os.replace(tmp_path, path)
+
+        return rendered
+
+    def render_lecture(self, lecture: Lecture, force: bool = False) -> dict | None:
+        return self.render(lecture.materials.name, force, self.get_asset_dir(lecture))
+
+    def get(self, lecture_id: int) -> dict | None:
+        lecture: Lecture | None = Lecture.objects.select_related('module').filter(pk=lecture_id).first()
+        return self.render_lecture(lecture) if lecture is not None and lecture.materials.name else None
+
+
+class LectureProgressService:
+    @staticmethod
+    def cache_key(course_id: int) -> str:
+        # Content edits drop the layouts of the courses they touch (DashboardService.invalidate_courses).
+        return f'lecture_layout:{course_id}'
+
+    def invalidate(self, course_ids: Iterable[int]) -> None:
+        cache_keys: list[str] = [self.cache_key(course_id) for course_id in course_ids]
+
+        if cache_keys:
+            transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+    def get_layout(self, course_id: int) -> tuple[Dict[int, int], int]:
+        layout: tuple[Dict[int, int], int] | None = cache.get(self.cache_key(course_id))
+
+        if layout is not None:
+            return layout
+
+        lecture_ids: set[int] = set(Lecture.objects.filter(module__course_modules=course_id)
+                                    .values_list('pk', flat=True))
+        lecture_layout: list[int] = Course.objects.filter(pk=course_id).values_list('lecture_layout', flat=True)[0]
+
+        if not lecture_ids.issubset(lecture_layout):
+            with transaction.atomic():
+                course: Course = Course.objects.select_for_update().only('lecture_layout').get(pk=course_id)
+                course.lecture_layout += sorted(lecture_ids.difference(course.lecture_layout))
+                course.save(update_fields=['lecture_layout'])
+                lecture_layout = course.lecture_layout
+
+        positions: Dict[int, int] = {lecture_id: position for position, lecture_id in enumerate(lecture_layout)}
+        active_mask: int = sum(1 << positions[lecture_id] for lecture_id in lecture_ids)
+
+        cache.set(self.cache_key(course_id), (positions, active_mask), None)
+        return positions, active_mask
+
+    def mark_read(self, student_id: int, lecture_id: int) -> list[int]:
+        course_ids: list[int] = list(Course.objects.filter(modules__lecture=lecture_id).values_list('pk', flat=True))
+
+        for course_id in course_ids:
+            position: int = self.get_layout(course_id)[0][int(lecture_id)]
+
+            with transaction.atomic():
+                lecture_progress, _ = LectureProgress.objects.select_for_update() \
+                    .get_or_create(student_id=student_id, course_id=course_id)
+                read_lectures: bytes = set_bit(lecture_progress.read_lectures, position)
+
+                if read_lectures != bytes(lecture_progress.read_lectures):
+                    lecture_progress.read_lectures = read_lectures
+                    lecture_progress.save(update_fields=['read_lectures', 'updated_at'])
+
+        return course_ids
+
+    def to_progress(self, course_id: int, read_lectures: bytes | memoryview | None) -> dict:
+        positions, active_mask = self.get_layout(course_id)
+        read_mask: int = bitmap_to_int(read_lectures) & active_mask
+        total: int = active_mask.bit_count()
+
+        return {'course': int(course_id), 'read': read_mask.bit_count(), 'total': total,
+                'completion': read_mask.bit_count() / total if total else 0.0,
+                'read_lectures': sorted(lecture_id for lecture_id, position in positions.items()
+                                        if read_mask >> position & 1)}
+
+    def get_progress(self, student_id: int, course_id: int) -> dict:
+        read_lectures: bytes | None = LectureProgress.objects.filter(student_id=student_id, course_id=course_id) \
+            .values_list('read_lectures', flat=True).first()
+        return {'student': int(student_id), **self.to_progress(course_id, read_lectures)}
+
+    def get_course_progress(self, course_id: int) -> dict:
+        active_mask: int = self.get_layout(course_id)[1]
+        total: int = active_mask.bit_count()
+        students: list[dict] = []
+
+        for student_id, read_lectures in LectureProgress.objects.filter(course_id=course_id).order_by('student_id') \
+                .values_list('student_id', 'read_lectures').iterator():
+            read: int = (bitmap_to_int(read_lectures) & active_mask).bit_count()
+            students.append({'student': student_id, 'read': read, 'completion': read / total if total else 0.0})
+
+        return {'course': int(course_id), 'total': total, 'students': students,
+                'average_completion': sum(student['completion'] for student in students) / len(students)
+                if students else 0.0}
+
+
+class MajorService(BaseService):
+    tracks_hierarchy = True
+
+    def __init__(self):
+        super().__init__(Major, MajorSerializer)
+
+    def get_validators(self, model_obj: Model) -> tuple[datetime, str] | None:
+        return self.get_validators_with(model_obj, Major.programs.through.objects.filter(major_id=model_obj.pk))
+
+    def create(self, request_data) -> Model:
+        serializer = self.__serializer__(data=request_data)
+
+        if serializer.is_valid(raise_exception=True):
+            validated_data: dict = serializer.validated_data
+            programs: list = validated_data.pop('programs')
+
+            with transaction.atomic():
+                major: Major = Major.objects.create(**validated_data)
+                major.programs.set(programs)
+                self.record_changes(ChangeRecord.Operation.CREATED, [major.pk])
+                self.refresh_hierarchy([major.pk])
+
+            return major
+
+    def update(self, pk: int, request_data) -> int:
+        serializer = self.__serializer__(data=request_data, partial=True)
+
+        if serializer.is_valid(raise_exception=True):
+            data: dict = {**request_data}
+            data.pop('programs', None)
+            programs: list | None = serializer.validated_data.get('programs')
+
+            with transaction.atomic():
+                major: Major | None = Major.objects.filter(pk=pk).first()
+
+                if major is not None and programs is not None:
+                    major.programs.set(programs)
+
+                # The hierarchy is refreshed by the update, after the programs are in place.
+                return super().update(pk, data)
+
+
+class MediaService:
+    def get_path(self, name: str) -> str | None:
+        try:
+            path: str = content_addressed_storage.path(name)
+        except SuspiciousFileOperation:
+            return None
+
+        return path if os.path.isfile(path) else None
+
+    def get_course_ids(self, name: str) -> set[int]:
+        course_filter = (Q(evaluation_criteria=name) | Q(modules__lecture__materials=name) |
+                         Q(practice__description=name) | Q(modules__practice__description=name) |
+                         Q(modules__lecture__practice__description=name))
+
+        if name.startswith('courses/'):
+            course_filter |= Q(title=name.split('/')[1])
+
+        return set(Course.objects.filter(course_filter).values_list('id', flat=True))
+
+    def has_access(self, user, name: str) -> bool:
+        if user.is_staff:
+            return True
+
+        answer_results: QuerySet[StudentResult] = StudentResult.objects.filter(answer_file=name)
+
+        if answer_results.filter(student__user=user).exists():
+            return True
+
+        practice_ids: list = list(answer_results.exclude(practice=None).values_list('practice_id', flat=True))
+
+        if practice_ids and Course.objects.filter(Q(practice_id__in=practice_ids) |
+                                                  Q(modules__practice_id__in=practice_ids) |
+                                                  Q(modules__lecture__practice_id__in=practice_ids),
+                                                  teacher__user=user).exists():
+            return True
+
+        course_ids: set[int] = self.get_course_ids(name)
+
+        if not course_ids.isdisjoint(EnrollmentService().get_user_course_ids(user)):
+            return True
+
+        return Course.objects.filter(teacher__user=user, id__in=course_ids).exists()
+
+
+class ModuleService(BaseService):
+    dashboard_course_lookups = ('modules',)
+
+    def __init__(self):
+        super().__init__(Module, ModuleSerializer)
+
+    def get_validators(self, model_obj: Model) -> tuple[datetime, str] | None:
+        return self.get_validators_with(model_obj, Lecture.objects.filter(module=model_obj.pk))
+
+
+class OrgHierarchyService:
+    # Closure rows link every chair, department, program, major and study group to all study groups and courses below
+    # it, so a roll-up is one indexed lookup instead of a join along the whole chain.
+    MODELS = ['chair', 'department', 'program', 'major', 'studygroup', 'course']
+    PARENT_LINKS: Dict[str, list[tuple[str, Callable[[Iterable[int]], QuerySet]]]] = {
+        'department': [('chair', lambda ids: Department.objects.filter(pk__in=ids).values_list('pk', 'chair_id'))],
+        'program': [('department', lambda ids: Program.objects.filter(pk__in=ids).values_list('pk', 'department_id'))],
+        'major': [('program', lambda ids: Major.programs.through.objects.filter(major_id__in=ids)
+                   .values_list('major_id', 'program_id'))],
+        'studygroup': [('major', lambda ids: StudyGroup.objects.filter(pk__in=ids).values_list('pk', 'major_id'))],
+        'course': [('studygroup', lambda ids: Course.members.through.objects.filter(course_id__in=ids)
+                    .values_list('course_id', 'studygroup_id')),
+                   ('major', lambda ids: Course.majors.through.objects.filter(course_id__in=ids)
+                    .values_list('course_id', 'major_id'))],
+    }
+
+    def get_known_ancestors(self, nodes: set[tuple[str, int]]) -> Dict[tuple[str, int], Dict[tuple[str, int], int]]:
+        ancestors: Dict[tuple[str, int], Dict[tuple[str, int], int]] = {node: {} for node in nodes}
+        node_ids: Dict[str, set[int]] = defaultdict(set)
+
+        for model_name, pk in nodes:
+            node_ids[model_name].add(pk)
+
+        if not node_ids:
+            return ancestors
+
+        node_filter = Q()
+
+        for model_name, ids in node_ids.items():
+            node_filter |= Q(descendant_model=model_name, descendant_id__in=ids)
+
+        for descendant_model, descendant_id, ancestor_model, ancestor_id, depth in OrgHierarchy.objects \
+                .filter(node_filter).values_list('descendant_model', 'descendant_id', 'ancestor_model', 'ancestor_id',
+                                                 'depth'):
+            ancestors[(descendant_model, descendant_id)][(ancestor_model, ancestor_id)] = depth
+
+        return ancestors
+
+    def build(self, nodes: Dict[str, set[int]]) -> int:
+        nodes = {model_name: ids for model_name, ids in nodes.items() if ids}
+
+        if not nodes:
+            return 0
+
+        ancestors: Dict[tuple[str, int], Dict[tuple[str, int], int]] = {}
+
+        # Parents always belong to a higher level, so walking the levels top-down finds their ancestors ready.
+        for model_name in self.MODELS:
+            ids: set[int] = nodes.get(model_name, set())
+
+            if not ids:
+                continue
+
+            parent_links: list[tuple[int, tuple[str, int]]] = [
+                (pk, (parent_model, parent_id)) for parent_model, query in self.PARENT_LINKS.get(model_name, [])
+                for pk, parent_id in query(list(ids)) if parent_id is not None]
+            ancestors.update(self.get_known_ancestors({parent for _, parent in parent_links
+                                                       if parent not in ancestors}))
+
+            for pk in ids:
+                ancestors[(model_name, pk)] = {}
+
+            for pk, parent in parent_links:
+                node_ancestors: Dict[tuple[str, int], int] = ancestors[(model_name, pk)]
+
+                for ancestor, depth in [(parent, 0), *ancestors[parent].items()]:
+                    node_ancestors[ancestor] = min(node_ancestors.get(ancestor, depth + 1), depth + 1)
+
+        rows: list[OrgHierarchy] = [
+            OrgHierarchy(ancestor_model=ancestor_model, ancestor_id=ancestor_id, descendant_model=model_name,
+                         descendant_id=pk, depth=depth)
+            for model_name, ids in nodes.items() for pk in ids
+            for (ancestor_model, ancestor_id), depth in ancestors[(model_name, pk)].items()]
+        node_filter = Q()
+
+        for model_name, ids in nodes.items():
+            node_filter |= Q(descendant_model=model_name, descendant_id__in=list(ids))
+
+        with transaction.atomic():
+            OrgHierarchy.objects.filter(node_filter).delete()
+            OrgHierarchy.objects.bulk_create(rows, batch_size=5000)
+
+        return len(rows)
+
+    def get_descendant_nodes(self, model_name: str, ids: Iterable[int]) -> Dict[str, set[int]]:
+        nodes: Dict[str, set[int]] = defaultdict(set)
+
+        for descendant_model, descendant_id in OrgHierarchy.objects.filter(ancestor_model=model_name,
+                                                                           ancestor_id__in=list(ids)) \
+                .values_list('descendant_model', 'descendant_id'):
+            nodes[descendant_model].add(descendant_id)
+
+        return nodes
+
+    def refresh(self, model_name: str, ids: Iterable[int]) -> None:
+        # Ids taken from the request arrive as strings, while the parent links are read back from the database.
+        ids = {int(pk) for pk in ids}
+        nodes: Dict[str, set[int]] = self.get_descendant_nodes(model_name, ids)
+        nodes[model_name] |= ids
+        self.build(nodes)
+
+    def remove(self, model_name: str, ids: Iterable[int]) -> None:
+        ids = [int(pk) for pk in ids]
+        nodes: Dict[str, set[int]] = self.get_descendant_nodes(model_name, ids)
+        OrgHierarchy.objects.filter(Q(ancestor_model=model_name, ancestor_id__in=ids) |
+                                    Q(descendant_model=model_name, descendant_id__in=ids)).delete()
+        self.build(nodes)
+
+    def rebuild(self) -> int:
+        nodes: Dict[str, set[int]] = {model_name: set(apps.get_model('sdo_app', model_name).objects
+                                                      .values_list('pk', flat=True)) for model_name in self.MODELS}
+
+        with transaction.atomic():
+            OrgHierarchy.objects.all().delete()
+            return self.build(nodes)
+
+    def get_descendant_ids(self, model_name: str, pk: int, descendant_model: str) -> QuerySet:
+        return OrgHierarchy.objects.filter(ancestor_model=model_name, ancestor_id=pk,
+                                           descendant_model=descendant_model).values('descendant_id')
+
+    def rollup(self, model_name: str, pk: int) -> dict:
+        study_group_ids: QuerySet = self.get_descendant_ids(model_name, pk, 'studygroup')
+        student_ids: QuerySet = StudyGroup.students.through.objects.filter(studygroup_id__in=study_group_ids) \
+            .values('student_id')
+        results: dict = StudentResult.objects.filter(student_id__in=student_ids) \
+            .aggregate(attempts=Count('pk'), students=Count('student', distinct=True), mean_score=Avg('score'))
+
+        return {'model': model_name, 'id': pk,
+                'courses': list(Course.objects.filter(pk__in=self.get_descendant_ids(model_name, pk, 'course'))
+                                .order_by('title').values('id', 'title', 'end_date')),
+                'study_groups': StudyGroup.objects.filter(pk__in=study_group_ids).count(),
+                'students': Student.objects.filter(pk__in=student_ids).count(),
+                'results': results}
+
+
+class PersonService(BaseService):
+    def __init__(self):
+        super().__init__(Person, PersonSerializer)
+
+
+class ProgramService(BaseService):
+    tracks_hierarchy = True
+
+    def __init__(self):
+        super().__init__(Program, ProgramSerializer)
+
+
+class PracticeService(BaseService):
+    dashboard_course_lookups = ('practice', 'modules__practice', 'modules__lecture__practice')
+
+    def __init__(self):
+        super().__init__(Practice, PracticeSerializer)
+
+    def check(self, student_id: int, practice_id: int, score: float):
+        student: Student = Student.objects.get(pk=student_id)
+
+        student_result: StudentResult = StudentResult.objects.filter(student_id=student_id,
+                                                                     practice_id=practice_id).last()
+
+        with transaction.atomic():
+            if student_result:
+                student_result = StudentResult.objects.create(student=student_result.student, is_completed=True,
+                                                              score=score, practice=student_result.practice,
+                                                              attempt=student_result.attempt + 1)
+            else:
+                student_result = StudentResult.objects.create(student=student, is_completed=True, score=score,
+                                                              practice=self.get(practice_id))
+
+            ChangeFeedService().record(StudentResult, ChangeRecord.Operation.CREATED, [student_result.pk])
+
+        DashboardService().invalidate([student_id])
+
+
+class PublishedTestService(BaseService):
+    records_changes = False
+
+    def __init__(self):
+        super().__init__(PublishedTestSnapshot, PublishedTestSnapshotSerializer)
+
+    @staticmethod
+    def cache_key(evaluation_test_id: int) -> str:
+        return f'published_test:{evaluation_test_id}'
+
+    def build_payload(self, evaluation_test_id: int) -> dict:
+        evaluation_test: EvaluationTest = EvaluationTest.objects.get(pk=evaluation_test_id)
+        question_sections: QuerySet = QuestionSection.objects.filter(evaluation_test_id=evaluation_test_id) \
+            .order_by('id').values('id', 'question')
+        question_answers: QuerySet = QuestionAnswers.objects \
+            .filter(question_section__evaluation_test_id=evaluation_test_id) \
+            .order_by('question_section_id', 'id').values('id', 'question_section_id', 'answer', 'score')
+
+        section_answers: Dict[int, list] = defaultdict(list)
+        max_score: float = 0.0
+
+        for _, question_answer in enumerate(question_answers):
+            section_answers[question_answer['question_section_id']].append({'id': question_answer['id'],
+                                                                            'answer': question_answer['answer']})
+            max_score += question_answer['score']
+
+        return {'id': evaluation_test.pk, 'title': evaluation_test.title, 'max_score': max_score,
+                'deadline_date': evaluation_test.deadline_date, 'start_time': evaluation_test.start_time,
+                'end_time': evaluation_test.end_time, 'allowed_attempts': evaluation_test.allowed_attempts,
+                'complete_time': evaluation_test.complete_time, 'final_score_is': evaluation_test.final_score_is,
+                'question_sections': [{'id': question_section['id'], 'question': question_section['question'],
+                                       'answers': section_answers[question_section['id']]}
+                                      for question_section in question_sections]}
+
+    def publish(self, evaluation_test_id: int) -> dict:
+        payload: bytes = json.dumps(self.build_payload(evaluation_test_id), cls=DjangoJSONEncoder, ensure_ascii=False,
+                                    separators=(',', ':')).encode()
+        etag: str = hashlib.sha256(payload).hexdigest()[:32]
+        snapshot: PublishedTestSnapshot | None = PublishedTestSnapshot.objects \
+            .filter(evaluation_test_id=evaluation_test_id).order_by('-version').first()
+
+        if snapshot is None or snapshot.etag != etag:
+            try:
+                with transaction.atomic():
+                    snapshot = PublishedTestSnapshot.objects.create(
+                        evaluation_test_id=evaluation_test_id, version=snapshot.version + 1 if snapshot else 1,
+                        etag=etag, payload=gzip.compress(payload, mtime=0))
+            except IntegrityError:
+                snapshot = PublishedTestSnapshot.objects.filter(evaluation_test_id=evaluation_test_id) \
+                    .order_by('-version').first()
+
+        return self.cache_snapshot(snapshot)
+
+    def cache_snapshot(self, snapshot: PublishedTestSnapshot) -> dict:
+        cached_snapshot: dict = {'version': snapshot.version, 'etag': snapshot.etag, 'payload': bytes(snapshot.payload)}
+        cache.set(self.cache_key(snapshot.evaluation_test_id), cached_snapshot, None)
+        return cached_snapshot
+
+    def get_latest(self, evaluation_test_id: int) -> dict:
+        cached_snapshot: dict | None = cache.get(self.cache_key(evaluation_test_id))
+
+        if cached_snapshot:
+            return cached_snapshot
+
+        snapshot: PublishedTestSnapshot | None = PublishedTestSnapshot.objects \
+            .filter(evaluation_test_id=evaluation_test_id).order_by('-version').first()
+
+        return self.cache_snapshot(snapshot) if snapshot else self.publish(evaluation_test_id)
+
+    def get_version(self, evaluation_test_id: int, version: int) -> dict | None:
+        cached_snapshot: dict = self.get_latest(evaluation_test_id)
+
+        if cached_snapshot['version'] == version:
+            return cached_snapshot
+
+        snapshot: PublishedTestSnapshot | None = PublishedTestSnapshot.objects \
+            .filter(evaluation_test_id=evaluation_test_id, version=version).first()
+
+        return {'version': snapshot.version, 'etag': snapshot.etag, 'payload': bytes(snapshot.payload)} \
+            if snapshot else None
+
+    def get_payload(self, evaluation_test_id: int, snapshot: dict) -> dict:
+        cached_payload: tuple[str, dict] | None = PUBLISHED_TEST_PAYLOADS.get(evaluation_test_id)
+
+        if cached_payload and cached_payload[0] == snapshot['etag']:
+            return cached_payload[1]
+
+        payload: dict = json.loads(gzip.decompress(snapshot['payload']))
+        PUBLISHED_TEST_PAYLOADS[evaluation_test_id] = (snapshot['etag'], payload)
+        return payload
+
+    @staticmethod
+    def shuffle_seed(student_id: int, evaluation_test_id: int, version: int) -> int:
+        return int.from_bytes(hashlib.sha256(f'{student_id}:{evaluation_test_id}:{version}'.encode()).digest()[:8])
+
+    def shuffle(self, payload: dict, seed: int) -> dict:
+        shuffler = random.Random(seed)
+        question_sections: list = [{**question_section, 'answers': shuffler.sample(question_section['answers'],
+                                                                                   len(question_section['answers']))}
+                                   for question_section in payload['question_sections']]
+        shuffler.shuffle(question_sections)
+
+        return {**payload, 'question_sections': question_sections}
+
+    def schedule_publish(self, evaluation_test_id: int | None) -> None:
+        if evaluation_test_id is None:
+            return
+
+        on_commit_once(f'evaluation_test.publish:{evaluation_test_id}', lambda: self.publish(evaluation_test_id))
+
+
+class SearchService:
+    MATERIALS_MAX_SIZE = 1024 * 1024
+
+    @staticmethod
+    def is_postgres() -> bool:
+        return connection.vendor == 'postgresql'
+
+    def index(self, kind: str, object_id: int, title: str, body: str, course_ids: Iterable[int]) -> None:
+        search_document, _ = SearchDocument.objects.update_or_create(kind=kind, object_id=object_id,
+                                                                     defaults={'title': title, 'body': body})
+        search_document.courses.set(list(course_ids))
+
+        if self.is_postgres():
+            SearchDocument.objects.filter(pk=search_document.pk).update(
+                search_vector=SearchVector('title', weight='A', config='russian') +
+                SearchVector('body', weight='B', config='russian'))
+        elif SEARCH_INDEX is not None:
+            SEARCH_INDEX.add(search_document.pk, title, body)
+
+    def remove(self, kind: str, object_id: int) -> None:
+        search_documents: QuerySet[SearchDocument] = SearchDocument.objects.filter(kind=kind, object_id=object_id)
+
+        if SEARCH_INDEX is not None:
+            for search_document_id in search_documents.values_list('pk', flat=True):
+                SEARCH_INDEX.remove(search_document_id)
+
+        search_documents.delete()
+
+    def read_materials(self, lecture: Lecture) -> str:
+        if not lecture.materials.name:
+            return ''
+
+        try:
+            with lecture.materials.open('rb') as materials:
+                return markdown_to_text(materials.read(self.MATERIALS_MAX_SIZE).decode('utf-8', errors='ignore'))
+        except OSError:
+            return ''
+
+    def get_lecture_course_ids(self, lecture_id: int) -> list[int]:
+        return list(Course.objects.filter(modules__lecture=lecture_id).values_list('id', flat=True).distinct())
+
+    def get_question_section_course_ids(self, evaluation_test_id: int) -> list[int]:
+        return list(Course.objects.filter(Q(evaluation_test=evaluation_test_id) |
+                                          Q(modules__evaluation_test=evaluation_test_id) |
+                                          Q(modules__lecture__evaluation_test=evaluation_test_id))
+                    .values_list('id', flat=True).distinct())
+
+    def index_course(self, course_id: int) -> None:
+        course: Course | None = Course.objects.filter(pk=course_id).first()
+
+        if course is None:
+            return self.remove(SearchDocument.Kind.COURSE, course_id)
+
+        self.index(SearchDocument.Kind.COURSE, course.pk, course.title, '', [course.pk])
+
+    def index_lecture(self, lecture_id: int) -> None:
+        lecture: Lecture | None = Lecture.objects.filter(pk=lecture_id).first()
+
+        if lecture is None:
+            return self.remove(SearchDocument.Kind.LECTURE, lecture_id)
+
+        self.index(SearchDocument.Kind.LECTURE, lecture.pk, lecture.title, self.read_materials(lecture),
+                   self.get_lecture_course_ids(lecture.pk))
+
+    def index_question_section(self, question_section_id: int) -> None:
+        question_section: QuestionSection | None = QuestionSection.objects.filter(pk=question_section_id).first()
+
+        if question_section is None:
+            return self.remove(SearchDocument.Kind.QUESTION_SECTION, question_section_id)
+
+        self.index(SearchDocument.Kind.QUESTION_SECTION, question_section.pk, question_section.question, '',
+                   self.get_question_section_course_ids(question_section.evaluation_test_id))
+
+    def link_modules(self, module_ids: Iterable) -> None:
+        module_ids: list = [getattr(module_id, 'pk', module_id) for module_id in module_ids]
+
+        if not module_ids:
+            return
+
+        lecture_ids: QuerySet = Lecture.objects.filter(module__in=module_ids).values_list('pk', flat=True)
+
+        for search_document in SearchDocument.objects.filter(kind=SearchDocument.Kind.LECTURE,
+                                                             object_id__in=lecture_ids):
+            search_document.courses.set(self.get_lecture_course_ids(search_document.object_id))
+
+        evaluation_test_ids: set = set(Module.objects.filter(pk__in=module_ids).exclude(evaluation_test=None)
+                                       .values_list('evaluation_test_id', flat=True))
+        evaluation_test_ids.update(Lecture.objects.filter(module__in=module_ids).exclude(evaluation_test=None)
+                                   .values_list('evaluation_test_id', flat=True))
+
+        for evaluation_test_id in evaluation_test_ids:
+            course_ids: list[int] = self.get_question_section_course_ids(evaluation_test_id)
+            question_section_ids: QuerySet = QuestionSection.objects.filter(evaluation_test_id=evaluation_test_id) \
+                .values_list('pk', flat=True)
+
+            for search_document in SearchDocument.objects.filter(kind=SearchDocument.Kind.QUESTION_SECTION,
+                                                                 object_id__in=question_section_ids):
+                search_document.courses.set(course_ids)
+
+    def rebuild(self) -> int:
+        global SEARCH_INDEX
+
+        SearchDocument.objects.all().delete()
+        SEARCH_INDEX = None
+
+        for course_id in Course.objects.values_list('pk', flat=True):
+            self.index_course(course_id)
+
+        for lecture_id in Lecture.objects.values_list('pk', flat=True):
+            self.index_lecture(lecture_id)
+
+        for question_section_id in QuestionSection.objects.values_list('pk', flat=True):
+            self.index_question_section(question_section_id)
+
+        return SearchDocument.objects.count()
+
+    def get_fallback_index(self) -> InvertedIndex:
+        global SEARCH_INDEX
+
+        if SEARCH_INDEX is None:
+            search_index = InvertedIndex()
+
+            for search_document_id, title, body in SearchDocument.objects.values_list('pk', 'title', 'body') \
+                    .iterator():
+                search_index.add(search_document_id, title, body)
+
+            SEARCH_INDEX = search_index
+
+        return SEARCH_INDEX
+
+    def search(self, user, query: str, course_id: int | None = None, limit: int = 20) -> list[dict]:
+        search_documents: QuerySet[SearchDocument] = SearchDocument.objects.all()
+
+        if not user.is_staff:
+            search_documents = search_documents.filter(
+                courses__in=Course.objects.filter(Q(teacher__user=user) |
+                                                  Q(id__in=EnrollmentService().get_user_course_ids(user))))
+
+            if not Teacher.objects.filter(user=user).exists():
+                search_documents = search_documents.exclude(kind=SearchDocument.Kind.QUESTION_SECTION)
+
+        if course_id:
+            search_documents = search_documents.filter(courses=course_id)
+
+        if self.is_postgres():
+            search_query = SearchQuery(query, config='russian', search_type='websearch')
+            found_documents: list = [(search_document, search_document.rank) for search_document in
+                                     SearchDocument.objects.filter(pk__in=search_documents.values('pk'),
+                                                                   search_vector=search_query)
+                                     .annotate(rank=SearchRank(F('search_vector'), search_query))
+                                     .order_by('-rank', 'pk')[:limit]]
+        else:
+            ranks: list[tuple[int, float]] = self.get_fallback_index().search(
+                query, search_documents.values_list('pk', flat=True))[:limit]
+            search_documents_by_id: dict = SearchDocument.objects.in_bulk([pk for pk, _ in ranks])
+            found_documents: list = [(search_documents_by_id[pk], rank) for pk, rank in ranks
+                                     if pk in search_documents_by_id]
+
+        return [{'kind': search_document.kind, 'id': search_document.object_id, 'title': search_document.title,
+                 'rank': rank} for search_document, rank in found_documents]
+
+
+class SubjectService(BaseService):
+    def __init__(self):
+        super().__init__(Subject, SubjectSerializer)
+
+
+class StudentService(BaseService):
+    def __init__(self):
+        super().__init__(Student, StudentSerializer)
+
+
+class SimilarityService:
+    ANSWER_MAX_SIZE = 1024 * 1024
+
+    @staticmethod
+    def version_key(practice_id: int) -> str:
+        return f'near_duplicates_version:{practice_id}'
+
+    def read_answer(self, student_result: StudentResult) -> str:
+        answer: str = student_result.answer_text or ''
+
+        if student_result.answer_file.name:
+            try:
+                with student_result.answer_file.open('rb') as answer_file:
+                    answer += '\n' + answer_file.read(self.ANSWER_MAX_SIZE).decode('utf-8', errors='ignore')
+            except OSError:
+                pass
+
+        return answer
+
+    def store(self, student_results: List[StudentResult], signatures: Iterable[bytes | None]) -> int:
+        answer_signatures: list[AnswerSignature] = [
+            AnswerSignature(student_result_id=student_result.pk, practice_id=student_result.practice_id,
+                            student_id=student_result.student_id, signature=signature)
+            for student_result, signature in zip(student_results, signatures) if signature is not None]
+
+        with transaction.atomic():
+            AnswerSignature.objects.filter(student_result__in=[student_result.pk
+                                                               for student_result in student_results]).delete()
+            AnswerSignature.objects.bulk_create(answer_signatures)
+
+        for practice_id in {student_result.practice_id for student_result in student_results}:
+            cache.delete(self.version_key(practice_id))
+
+        return len(answer_signatures)
+
+    def index(self, student_result_ids: Iterable[int]) -> int:
+        student_results: List[StudentResult] = list(StudentResult.objects.filter(pk__in=list(student_result_ids),
+                                                                                 practice__isnull=False))
+
+        return self.store(student_results, [minhash(self.read_answer(student_result))
+                                            for student_result in student_results])
+
+    def get_clusters(self, practice_id: int, threshold: float | None = None) -> list[dict]:
+        threshold = threshold if threshold is not None else getattr(settings, 'NEAR_DUPLICATE_THRESHOLD', 0.8)
+        version: int = cache.get_or_set(self.version_key(practice_id), lambda: time.time_ns(), None)
+        cache_key: str = f'near_duplicates:{practice_id}:{version}:{threshold}'
+        practice_clusters: list[dict] | None = cache.get(cache_key)
+
+        if practice_clusters is not None:
+            return practice_clusters
+
+        students: Dict[int, int] = {}
+        signatures: Dict[int, Any] = {}
+
+        for student_result_id, student_id, signature in AnswerSignature.objects.filter(practice_id=practice_id) \
+                .values_list('student_result_id', 'student_id', 'signature'):
+            students[student_result_id] = student_id
+            signatures[student_result_id] = unpack_signature(signature)
+
+        practice_clusters = []
+
+        for pairs in clusters(signatures, students, threshold):
+            student_result_ids: set[int] = {student_result_id for pair in pairs for student_result_id in pair[:2]}
+            practice_clusters.append({
+                'similarity': max(score for _, _, score in pairs),
+                'students': sorted({students[student_result_id] for student_result_id in student_result_ids}),
+                'student_results': sorted(student_result_ids),
+                'pairs': [{'student_results': [a, b], 'similarity': score} for a, b, score in pairs]})
+
+        cache.set(cache_key, practice_clusters, 60 * 60)
+        return practice_clusters
+
+
+class StudentResultService(BaseService):
+    ARCHIVED_FIELDS = ['id', 'is_completed', 'answer_file', 'answer_text', 'score', 'attempt']
+    ARCHIVED_BINARY_FIELDS = ['question_scores', 'chosen_answers']
+
+    def __init__(self):
+        super().__init__(StudentResult, StudentResultSerializer)
+
+    def create(self, request_data) -> Model:
+        student_result: StudentResult = super().create(request_data)
+        DashboardService().invalidate([student_result.student_id])
+
+        if student_result.practice_id:
+            SimilarityService().index([student_result.pk])
+
+        return student_result
+
+    def update(self, pk: int, request_data) -> int:
+        updated: int = super().update(pk, request_data)
+        DashboardService().invalidate(StudentResult.objects.filter(pk=pk).values_list('student_id', flat=True))
+
+        if 'answer_text' in request_data or 'answer_file' in request_data or 'practice' in request_data:
+            SimilarityService().index([pk])
+
+        return updated
+
+    def delete(self, pk: int, request_data=None):
+        student_ids: list[int] = list(StudentResult.objects.filter(pk=pk).values_list('student_id', flat=True))
+        deleted = super().delete(pk, request_data)
+        DashboardService().invalidate(student_ids)
+        return deleted
+
+    @staticmethod
+    def get_task_filter(student_id: int, evaluation_test_id: int | None = None,
+                        practice_id: int | None = None) -> dict:
+        return {'student_id': student_id, 'evaluation_test_id': evaluation_test_id or None,
+                'practice_id': practice_id or None}
+
+    def count_attempts(self, student_id: int, evaluation_test_id: int | None = None,
+                       practice_id: int | None = None) -> int:
+        task_filter: dict = self.get_task_filter(student_id, evaluation_test_id, practice_id)
+        archived_attempts: int | None = StudentResultArchive.objects.filter(**task_filter) \
+            .values_list('attempts', flat=True).first()
+        return StudentResult.objects.filter(**task_filter).count() + (archived_attempts or 0)
+
+    def get_final_result(self, student_id: int = None, evaluation_test_id: int = None, practice_id: int = None) -> int | None:
+        task_filter: dict = self.get_task_filter(student_id, evaluation_test_id, practice_id)
+        final_score_is: str = (EvaluationTest if evaluation_test_id else Practice).objects \
+            .values_list('final_score_is', flat=True).get(pk=evaluation_test_id or practice_id)
+        # Archived attempts are older than the live ones and take part through their final attempt.
+        attempts: list[tuple[int, float]] = [
+            *StudentResultArchive.objects.filter(**task_filter).exclude(final_result_id=None)
+            .values_list('final_result_id', 'final_score'),
+            *StudentResult.objects.filter(**task_filter).order_by('pk').values_list('id', 'score')]
+
+        if not attempts:
+            return None
+
+        final_result_id, _ = max(attempts, key=lambda attempt: (attempt[1], -attempt[0])) \
+            if final_score_is == BaseTask.FinalScoreIs.BEST_ATTEMPT else attempts[-1]
+        return final_result_id
+
+    def get_by(self, **kwargs) -> List[StudentResult] | None:
+        task_filter: dict | None = None
+
+        if kwargs.get('evaluation_test_id'):
+            task_filter = {'evaluation_test_id': kwargs.get('evaluation_test_id')}
+        elif kwargs.get('practice_id'):
+            task_filter = {'practice_id': kwargs.get('practice_id')}
+        elif kwargs.get('student'):
+            if kwargs.get('evaluation_test'):
+                task_filter = {'student_id': kwargs.get('student'), 'evaluation_test_id': kwargs.get('evaluation_test')}
+            elif kwargs.get('practice'):
+                task_filter = {'student_id': kwargs.get('student'), 'practice_id': kwargs.get('practice')}
+
+        if task_filter is None:
+            return None
+
+        student_results: QuerySet[StudentResult] = StudentResult.objects.filter(**task_filter).order_by('pk')
+        archives: QuerySet[StudentResultArchive] = StudentResultArchive.objects.filter(**task_filter)
+
+        if not archives.exists():
+            return list(student_results)
+
+        return sorted([*self.unpack_archives(archives), *student_results], key=lambda student_result: student_result.pk)
+
+    def pack_results(self, student_results: List[dict]) -> bytes:
+        for student_result in student_results:
+            for field in self.ARCHIVED_BINARY_FIELDS:
+                if student_result[field] is not None:
+                    student_result[field] = base64.b64encode(bytes(student_result[field])).decode()
+
+        return gzip.compress(json.dumps(student_results, separators=(',', ':')).encode())
+
+    def unpack_results(self, packed: bytes | memoryview) -> List[dict]:
+        student_results: List[dict] = json.loads(gzip.decompress(bytes(packed)))
+
+        for student_result in student_results:
+            for field in self.ARCHIVED_BINARY_FIELDS:
+                if student_result[field] is not None:
+                    student_result[field] = base64.b64decode(student_result[field])
+
+        return student_results
+
+    def unpack_archives(self, archives: QuerySet[StudentResultArchive]) -> List[StudentResult]:
+        return [StudentResult(student_id=archive.student_id, evaluation_test_id=archive.evaluation_test_id,
+                              practice_id=archive.practice_id, **student_result)
+                for archive in archives for student_result in self.unpack_results(archive.results)]
+
+    def get_archivable_tasks(self, course_ids: Iterable[int] | None = None) -> tuple[QuerySet, QuerySet]:
+        finished_courses: QuerySet[Course] = Course.objects.filter(end_date__lt=timezone.localdate())
+
+        if course_ids is not None:
+            finished_courses = finished_courses.filter(pk__in=course_ids)
+
+        def course_tasks(task_model: Type[Model], courses: QuerySet[Course]) -> QuerySet:
+            return task_model.objects.filter(Q(course__in=courses) | Q(module__course_modules__in=courses) |
+                                             Q(lecture__module__course_modules__in=courses)).values('pk')
+
+        active_courses: QuerySet[Course] = Course.objects.filter(Q(end_date__isnull=True) |
+                                                                 Q(end_date__gte=timezone.localdate()))
+
+        return tuple(task_model.objects.filter(pk__in=course_tasks(task_model, finished_courses))
+                     .exclude(pk__in=course_tasks(task_model, active_courses)).values('pk')
+                     for task_model in (EvaluationTest, Practice))
+
+    def archive(self, course_ids: Iterable[int] | None = None, batch_size: int = 500,
+                progress: Callable[[int], None] | None = None) -> int:
+        evaluation_test_ids, practice_ids = self.get_archivable_tasks(course_ids)
+        archivable: QuerySet[StudentResult] = StudentResult.objects.filter(Q(evaluation_test__in=evaluation_test_ids) |
+                                                                           Q(practice__in=practice_ids))
+        archived: int = 0
+
+        while groups := list(archivable.values_list('student_id', 'evaluation_test_id', 'practice_id')
+                             .distinct().order_by('student_id', 'evaluation_test_id', 'practice_id')[:batch_size]):
+            with transaction.atomic():
+                archived += self.archive_groups(groups)
+
+            if progress:
+                progress(archived)
+
+        return archived
+
+    def archive_groups(self, groups: List[tuple[int, int | None, int | None]]) -> int:
+        group_filter = Q()
+
+        for student_id, evaluation_test_id, practice_id in groups:
+            group_filter |= Q(student_id=student_id, evaluation_test_id=evaluation_test_id, practice_id=practice_id)
+
+        student_results: List[dict] = list(StudentResult.objects.select_for_update().filter(group_filter)
+                                           .order_by('pk').values('student_id', 'evaluation_test_id', 'practice_id',
+                                                                  *self.ARCHIVED_FIELDS, *self.ARCHIVED_BINARY_FIELDS))
+        final_scores_are: Dict[tuple, str] = {
+            **{('evaluation_test', pk): final_score_is for pk, final_score_is in EvaluationTest.objects.filter(
+                pk__in={group[1] for group in groups if group[1]}).values_list('pk', 'final_score_is')},
+            **{('practice', pk): final_score_is for pk, final_score_is in Practice.objects.filter(
+                pk__in={group[2] for group in groups if group[2]}).values_list('pk', 'final_score_is')}}
+
+        grouped_results: Dict[tuple, List[dict]] = defaultdict(list)
+
+        for student_result in student_results:
+            grouped_results[(student_result.pop('student_id'), student_result.pop('evaluation_test_id'),
+                             student_result.pop('practice_id'))].append(student_result)
+
+        existing_archives: Dict[tuple, StudentResultArchive] = {
+            (archive.student_id, archive.evaluation_test_id, archive.practice_id): archive
+            for archive in StudentResultArchive.objects.select_for_update().filter(group_filter)}
+        new_archives: List[StudentResultArchive] = []
+
+        for (student_id, evaluation_test_id, practice_id), results in grouped_results.items():
+            archive: StudentResultArchive = existing_archives.get((student_id, evaluation_test_id, practice_id)) or \
+                StudentResultArchive(student_id=student_id, evaluation_test_id=evaluation_test_id,
+                                     practice_id=practice_id)
+
+            if archive.pk:
+                results = [*self.unpack_results(archive.results), *results]
+
+            task_key: tuple = ('evaluation_test', evaluation_test_id) if evaluation_test_id else \
+                ('practice', practice_id)
+            final_result: dict = max(results, key=lambda result: (result['score'], -result['id'])) \
+                if final_scores_are[task_key] == BaseTask.FinalScoreIs.BEST_ATTEMPT else results[-1]
+
+            archive.attempts = len(results)
+            archive.final_result_id = final_result['id']
+            archive.final_score = final_result['score']
+            archive.results = self.pack_results(results)
+
+            if archive.pk:
+                archive.save()
+            else:
+                new_archives.append(archive)
+
+        StudentResultArchive.objects.bulk_create(new_archives)
+        StudentResult.objects.filter(pk__in=[student_result['id'] for student_result in student_results]).delete()
+        return len(student_results)
+
+
+class StudyGroupService(BaseService):
+    tracks_hierarchy = True
+
+    def __init__(self):
+        super().__init__(StudyGroup, StudyGroupSerializer)
+
+    def get_validators(self, model_obj: Model) -> tuple[datetime, str] | None:
+        return self.get_validators_with(model_obj,
+                                        StudyGroup.students.through.objects.filter(studygroup_id=model_obj.pk))
+
+    def create(self, request_data) -> Model:
+        serializer = self.__serializer__(data=request_data)
+
+        if serializer.is_valid(raise_exception=True):
+            validated_data: dict = serializer.validated_data
+            students: list = validated_data.pop('students', [])
+
+            with transaction.atomic():
+                study_group: StudyGroup = StudyGroup.objects.create(**validated_data)
+                study_group.students.set(students)
+                self.record_changes(ChangeRecord.Operation.CREATED, [study_group.pk])
+                self.refresh_hierarchy([study_group.pk])
+
+            EnrollmentService().invalidate([student.pk for student in students])
+            return study_group
+
+    def update(self, pk: int, request_data) -> int:
+        data: dict = {**request_data}
+        students: list = data.pop('students', [])
+
+        StudyGroup.objects.get(pk=pk).students.add(*students)
+        EnrollmentService().invalidate(students)
+        return super().update(pk, data)
+
+    def delete(self, pk: int, request_data=None):
+        study_group: StudyGroup = self.__model__.objects.get(pk=pk)
+        students_to_del: list = (request_data or {}).get('students', [])
+
+        if len(students_to_del) != 0:
+            with transaction.atomic():
+                study_group.students.remove(*students_to_del)
+                self.touch([pk])
+                self.record_changes(ChangeRecord.Operation.UPDATED, [pk])
+
+            EnrollmentService().invalidate(students_to_del)
+            return
+
+        EnrollmentService().invalidate_groups([pk])
+        return super().delete(pk, request_data)
+
+
+class TeacherService(BaseService):
+    def __init__(self):
+        super().__init__(Teacher, TeacherSerializer)
+
+
+class QuestionSectionService(BaseService):
+    def __init__(self):
+        super().__init__(QuestionSection, QuestionSectionSerializer)
+
+    def get_validators(self, model_obj: Model) -> tuple[datetime, str] | None:
+        return self.get_validators_with(model_obj, QuestionAnswers.objects.filter(question_section=model_obj.pk))
+
+    def create(self, request_data) -> Model:
+        question_section: QuestionSection = super().create(request_data)
+        PublishedTestService().schedule_publish(question_section.evaluation_test_id)
+        SearchService().index_question_section(question_section.pk)
+        return question_section
+
+    def update(self, pk: int, request_data) -> int:
+        updated: int = super().update(pk, request_data)
+        PublishedTestService().schedule_publish(self.get(pk).evaluation_test_id)
+        SearchService().index_question_section(pk)
+        return updated
+
+    def delete(self, pk: int, request_data=None):
+        evaluation_test_id: int = self.get(pk).evaluation_test_id
+        deleted = super().delete(pk, request_data)
+        PublishedTestService().schedule_publish(evaluation_test_id)
+        EvaluationTestService().schedule_regrade(evaluation_test_id)
+        SearchService().remove(SearchDocument.Kind.QUESTION_SECTION, pk)
+        return deleted
+
+
+class QuestionAnswersService(BaseService):
+    def __init__(self):
+        super().__init__(QuestionAnswers, QuestionAnswersSerializer)
+
+    def get_evaluation_test_id(self, pk: int) -> int | None:
+        return QuestionAnswers.objects.filter(pk=pk).values_list('question_section__evaluation_test_id',
+                                                                 flat=True).first()
+
+    def key_changed(self, evaluation_test_id: int | None) -> None:
+        PublishedTestService().schedule_publish(evaluation_test_id)
+        EvaluationTestService().schedule_regrade(evaluation_test_id)
+
+    def create(self, request_data) -> Model:
+        question_answer: QuestionAnswers = super().create(request_data)
+        self.key_changed(self.get_evaluation_test_id(question_answer.pk))
+        return question_answer
+
+    def create_many(self, request_data) -> List[Model]:
+        question_answers: List[QuestionAnswers] = super().create_many(request_data)
+
+        for evaluation_test_id in {question_answer.question_section.evaluation_test_id
+                                   for question_answer in question_answers}:
+            self.key_changed(evaluation_test_id)
+
+        return question_answers
+
+    def update(self, pk: int, request_data) -> int:
+        if not request_data['is_correct']:
+            request_data['score'] = 0.0
+
+        updated: int = super().update(pk, request_data)
+        self.key_changed(self.get_evaluation_test_id(pk))
+        return updated
+
+    def delete(self, pk: int, request_data=None):
+        evaluation_test_id: int | None = self.get_evaluation_test_id(pk)
+        deleted = super().delete(pk, request_data)
+        self.key_changed(evaluation_test_id)
+        return deleted
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Course, Student, StudyGroup
+from .services import EnrollmentService
+
+# Enrollment sets are cached without a timeout, so membership changes made outside the services (the admin, shell
+# scripts) must invalidate them as well. Deletes are handled before the membership rows are removed with the object.
+
+
+@receiver(m2m_changed, sender=StudyGroup.students.through)
+def study_group_students_changed(sender, instance, action: str, reverse: bool, pk_set: set | None, **kwargs) -> None:
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        EnrollmentService().invalidate([instance.pk])
+    elif action == 'pre_clear':
+        EnrollmentService().invalidate_groups([instance.pk])
+    else:
+        EnrollmentService().invalidate(pk_set)
+
+
+@receiver(m2m_changed, sender=Course.members.through)
+def course_members_changed(sender, instance, action: str, reverse: bool, pk_set: set | None, **kwargs) -> None:
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        EnrollmentService().invalidate_groups([instance.pk])
+    elif action == 'pre_clear':
+        EnrollmentService().invalidate_groups(instance.members.values_list('pk', flat=True))
+    else:
+        EnrollmentService().invalidate_groups(pk_set)
+
+
+@receiver(pre_delete, sender=Course)
+def course_deleted(sender, instance: Course, **kwargs) -> None:
+    EnrollmentService().invalidate_groups(instance.members.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=StudyGroup)
+def study_group_deleted(sender, instance: StudyGroup, **kwargs) -> None:
+    EnrollmentService().invalidate_groups([instance.pk])
+
+
+@receiver(post_save, sender=Student)
+@receiver(pre_delete, sender=Student)
+def student_changed(sender, instance: Student, **kwargs) -> None:
+    EnrollmentService().invalidate([instance.pk])
+    cache.delete(EnrollmentService.user_cache_key(instance.user_id))
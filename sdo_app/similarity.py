@@ -0,0 +1,89 @@
+import random
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from .search import tokenize
+
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS = SIGNATURE_SIZE // BANDS
+SHINGLE_SIZE = 3
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+_random = random.Random(20240229)
+PERMUTATIONS: List[Tuple[int, int]] = [(_random.randrange(1, MERSENNE_PRIME), _random.randrange(MERSENNE_PRIME))
+                                       for _ in range(SIGNATURE_SIZE)]
+
+
+def shingles(text: str) -> set[int]:
+    words: list[str] = tokenize(text)
+
+    if len(words) < SHINGLE_SIZE:
+        return {zlib.crc32(' '.join(words).encode())} if words else set()
+
+    return {zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode()) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> bytes | None:
+    # Signatures are computed without Django, so a process pool can build them for a whole practice.
+    text_shingles: set[int] = shingles(text)
+
+    if not text_shingles:
+        return None
+
+    return array('I', [min(((a * shingle + b) % MERSENNE_PRIME) & MAX_HASH for shingle in text_shingles)
+                       for a, b in PERMUTATIONS]).tobytes()
+
+
+def unpack_signature(packed: bytes | memoryview) -> array:
+    return array('I', bytes(packed))
+
+
+def similarity(signature: array, other_signature: array) -> float:
+    return sum(a == b for a, b in zip(signature, other_signature)) / SIGNATURE_SIZE
+
+
+def band_keys(signature: array) -> list[tuple]:
+    return [(band, *signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+def clusters(signatures: Dict[int, array], groups: Dict[int, int],
+             threshold: float) -> list[list[Tuple[int, int, float]]]:
+    # With 16 bands of 4 rows, pairs above ~0.5 Jaccard similarity share at least one bucket with high probability.
+    buckets: Dict[tuple, list[int]] = defaultdict(list)
+
+    for signature_id, signature in signatures.items():
+        for key in band_keys(signature):
+            buckets[key].append(signature_id)
+
+    candidates: set[tuple[int, int]] = {(a, b) for bucket in buckets.values() if len(bucket) > 1
+                                        for i, a in enumerate(bucket) for b in bucket[i + 1:]
+                                        if groups.get(a) != groups.get(b)}
+    parents: Dict[int, int] = {}
+
+    def find(signature_id: int) -> int:
+        while parents.setdefault(signature_id, signature_id) != signature_id:
+            parents[signature_id] = parents[parents[signature_id]]
+            signature_id = parents[signature_id]
+
+        return signature_id
+
+    pairs: Dict[int, list[Tuple[int, int, float]]] = defaultdict(list)
+    matched: list[Tuple[int, int, float]] = []
+
+    for a, b in candidates:
+        score: float = similarity(signatures[a], signatures[b])
+
+        if score >= threshold:
+            parents[find(a)] = find(b)
+            matched.append((min(a, b), max(a, b), score))
+
+    for a, b, score in matched:
+        pairs[find(a)].append((a, b, score))
+
+    return sorted((sorted(cluster_pairs) for cluster_pairs in pairs.values()),
+                  key=lambda cluster_pairs: -max(score for _, _, score in cluster_pairs))
+
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import tempfile
+import time
+from collections import Counter
+from typing import Iterable
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F, FileField, Model
+from django.utils.deconstruct import deconstructible
+
+BLOBS_DIR = 'blobs'
+CHUNK_SIZE = 64 * 1024
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    # Every upload is stored once as blobs/<aa>/<bb>/<sha256><ext>, FileBlob.ref_count tells when it may be removed.
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def blob_name(self, digest: str, name: str) -> str:
+        ext: str = os.path.splitext(name)[1].lower()
+        return f'{BLOBS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def _save(self, name, content):
+        tmp_dir: str = self.path(os.path.join(BLOBS_DIR, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        sha256 = hashlib.sha256()
+        size: int = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    tmp_file.write(chunk)
+
+            digest: str = sha256.hexdigest()
+            blob_name: str = self.blob_name(digest, name)
+            blob_path: str = self.path(blob_name)
+
+            # The reference is taken under the blob's row lock before the file is kept, so a pending delete of its
+            # last reference either removes the file first or sees the new reference and leaves it alone.
+            with transaction.atomic():
+                self.retain(blob_name, size=size)
+
+                if os.path.exists(blob_path):
+                    os.remove(tmp_path)
+                    # A fresh mtime keeps the file out of sweep() until this reference is committed.
+                    os.utime(blob_path)
+                else:
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    os.replace(tmp_path, blob_path)
+
+                    if self.file_permissions_mode is not None:
+                        os.chmod(blob_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return blob_name
+
+    def retain(self, name: str, size: int | None = None) -> None:
+        from .models import FileBlob
+
+        with transaction.atomic():
+            blob, created = FileBlob.objects.select_for_update().get_or_create(
+                name=name, defaults={'size': size if size is not None else self.size(name), 'ref_count': 1})
+
+            if not created:
+                FileBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+    def retain_many(self, names: Iterable[str]) -> None:
+        from .models import FileBlob
+
+        name_counts: Counter = Counter(name for name in names if name)
+
+        if not name_counts:
+            return
+
+        with transaction.atomic():
+            known_names: set = set(FileBlob.objects.select_for_update().filter(name__in=name_counts)
+                                   .values_list('name', flat=True))
+            # Files saved before blobs were tracked get a blob counting the reference they already have.
+            FileBlob.objects.bulk_create([FileBlob(name=name, size=self.size(name), ref_count=count + 1)
+                                          for name, count in name_counts.items() if name not in known_names])
+
+            names_by_count: dict = {}
+
+            for name in known_names:
+                names_by_count.setdefault(name_counts[name], []).append(name)
+
+            for count, count_names in names_by_count.items():
+                FileBlob.objects.filter(name__in=count_names).update(ref_count=F('ref_count') + count)
+
+    def delete(self, name):
+        from .models import FileBlob
+
+        if not name:
+            raise ValueError('The name must be given to delete().')
+
+        with transaction.atomic():
+            blob: FileBlob | None = FileBlob.objects.select_for_update().filter(name=name).first()
+
+            if blob is None:
+                return self.delete_blob(name)
+
+            if blob.ref_count > 1:
+                FileBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+
+            # The row stays with no references until the file is gone, it is what a concurrent save locks on.
+            FileBlob.objects.filter(pk=blob.pk).update(ref_count=0)
+            transaction.on_commit(lambda: self.delete_blob(name))
+
+    def delete_blob(self, name: str) -> None:
+        from .models import FileBlob
+
+        with transaction.atomic():
+            blob: FileBlob | None = FileBlob.objects.select_for_update().filter(name=name).first()
+
+            # A save may have taken the blob again after its last reference was released.
+            if blob is not None and blob.ref_count > 0:
+                return
+
+            FileBlob.objects.filter(name=name).delete()
+
+            # Files derived from a blob (rendered materials and their compressed variants) are named <blob>.<suffix>.
+            directory, prefix = os.path.split(self.path(name))
+
+            for file_name in os.listdir(directory) if os.path.isdir(directory) else []:
+                if file_name.startswith(prefix + '.'):
+                    os.remove(os.path.join(directory, file_name))
+
+            super().delete(name)
+
+    def sweep(self, min_age: float) -> int:
+        # Files whose save was rolled back (or whose worker died) are left on disk without a FileBlob row.
+        from .models import FileBlob
+
+        cutoff: float = time.time() - min_age
+        removed: int = 0
+
+        for directory, _, file_names in os.walk(self.path(BLOBS_DIR)):
+            stale_names: list[str] = [file_name for file_name in file_names
+                                      if os.path.getmtime(os.path.join(directory, file_name)) < cutoff]
+
+            if not stale_names:
+                continue
+
+            prefix: str = os.path.relpath(directory, self.location).replace(os.sep, '/') + '/'
+            # Derived files (<blob>.<suffix>) share the digest their blob is named by.
+            digests: set[str] = {name[len(prefix):len(prefix) + 64] for name in FileBlob.objects
+                                 .filter(name__startswith=prefix).values_list('name', flat=True)}
+
+            for file_name in stale_names:
+                if file_name[:64] not in digests:
+                    os.remove(os.path.join(directory, file_name))
+                    removed += 1
+
+        return removed
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def content_addressed_fields(model_obj: Model) -> list[FileField]:
+    return [field for field in model_obj._meta.get_fields()
+            if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)]
+
+
+def release_files(model_obj: Model) -> None:
+    for field in content_addressed_fields(model_obj):
+        name: str = getattr(model_obj, field.attname).name
+
+        if name:
+            field.storage.delete(name)
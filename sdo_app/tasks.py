@@ -0,0 +1,79 @@
+from datetime import date
+
+from django.db import transaction
+
+from .models import BackgroundJob
+from .services import (CURRENT_JOB, job_handler, BackgroundJobService, CourseService, DeadlineReminderService,
+                       EvaluationTestService, ExamSessionService, IdempotencyService, SearchService)
+
+
+@job_handler('evaluation_test.check')
+def check_evaluation_test(payload: dict) -> dict:
+    background_job: BackgroundJob | None = CURRENT_JOB.get()
+
+    # The result is stored on the job together with the attempt, so a retry of a job whose worker died after
+    # grading returns it instead of grading another attempt.
+    with transaction.atomic():
+        if background_job is not None:
+            result: dict | None = BackgroundJob.objects.select_for_update().values_list('result', flat=True) \
+                .get(pk=background_job.pk)
+
+            if result is not None:
+                return result
+
+        student_score: float = EvaluationTestService().check(payload['student'], payload['evaluation_test'],
+                                                             payload['answers'])
+        result = {'student_score': student_score}
+
+        if background_job is not None:
+            BackgroundJob.objects.filter(pk=background_job.pk).update(result=result)
+
+    return result
+
+
+@job_handler('course.delete')
+def delete_course(payload: dict) -> None:
+    if CourseService().is_exist(payload['course']):
+        CourseService().delete(payload['course'], payload.get('data', {}))
+
+
+@job_handler('course.clone')
+def clone_course(payload: dict) -> dict:
+    return {'course': CourseService().clone(payload['course'], payload.get('data', {})).pk}
+
+
+@job_handler('course.index')
+def index_course(payload: dict) -> None:
+    search_service = SearchService()
+    search_service.index_course(payload['course'])
+
+    for lecture_id in payload.get('lectures', []):
+        search_service.index_lecture(lecture_id)
+
+    for question_section_id in payload.get('question_sections', []):
+        search_service.index_question_section(question_section_id)
+
+
+@job_handler('exam_session.finish_expired')
+def finish_expired_exam_sessions(payload: dict) -> dict:
+    return {'finished': ExamSessionService().finish_expired()}
+
+
+@job_handler('evaluation_test.regrade')
+def regrade_evaluation_test(payload: dict) -> dict:
+    if not EvaluationTestService().is_exist(payload['evaluation_test']):
+        return {'regraded': 0}
+
+    return {'regraded': EvaluationTestService().regrade(payload['evaluation_test'],
+                                                        progress=BackgroundJobService.report_progress)}
+
+
+@job_handler('idempotency.cleanup')
+def cleanup_idempotency_keys(payload: dict) -> dict:
+    return {'deleted': IdempotencyService().cleanup(payload.get('batch_size', 5000))}
+
+
+@job_handler('deadline.remind')
+def send_deadline_reminders(payload: dict) -> dict:
+    day: date | None = date.fromisoformat(payload['date']) if payload.get('date') else None
+    return {'sent': DeadlineReminderService().send(day, payload.get('batch_size'))}
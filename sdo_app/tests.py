@@ -1,3 +1,1263 @@
-from django.test import TestCase
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin import site
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError as APIValidationError
+
+from sdo_app.media import serve_file
+from sdo_app.models import (AnswerSignature, BackgroundJob, Chair, ChangeRecord, Course, Department, EvaluationTest,
+                            ExamSession, FileBlob, IdempotentResponse, Lecture, Major, Module, OrgHierarchy, Practice,
+                            Program, QuestionAnswers, QuestionSection, SearchDocument, Student, StudentResult,
+                            StudentResultArchive, StudyGroup, Teacher)
+from sdo_app.services import (EVALUATION_CRITERIA_CACHE, JOB_HANDLERS, PUBLISHED_TEST_PAYLOADS, AnalyticsService,
+                              BackgroundJobService, ChairService, ChangeFeedService, CourseService, DashboardService,
+                              DeadlineReminderService, DepartmentService, EnrollmentService, EvaluationTestService,
+                              ExamSessionService, IdempotencyService, LectureMaterialsService, LectureProgressService,
+                              LectureService, MajorService, OrgHierarchyService, PracticeService, ProgramService,
+                              PublishedTestService, QuestionAnswersService, SearchService, SimilarityService,
+                              StudentResultService)
+from sdo_app.storage import content_addressed_storage
+from sdo_app.utils import (pack_chosen_answers, pack_question_scores, parse_id, unpack_chosen_answers,
+                           unpack_question_scores)
+from validators import parse_json_file, validate_eval_criteria_file
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+# Query counts are asserted for the app's own tables, so the shared database cache is swapped for a local one.
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CACHES=LOCAL_CACHES)
+class SdoTestCase(TestCase):
+    # A course with one module, lecture, practice and a three-question test, one enrolled and one outside student.
+    @classmethod
+    def setUpTestData(cls):
+        cls.deadline = datetime.date.today() + datetime.timedelta(days=3)
+        cls.chair = Chair.objects.create(name='chair')
+        cls.department = Department.objects.create(name='department', chair=cls.chair)
+        cls.program = Program.objects.create(name='program', department=cls.department)
+        cls.major = Major.objects.create(name='major', code='01.01.01')
+        cls.major.programs.add(cls.program)
+        cls.teacher = Teacher.objects.create(user=User.objects.create_user('teacher', 'teacher@example.com', 'p'),
+                                             first_name='T', middle_name='T', last_name='T',
+                                             department=cls.department)
+        cls.student = Student.objects.create(user=User.objects.create_user('student', 'student@example.com', 'p'),
+                                             first_name='S', middle_name='S', last_name='S')
+        cls.outsider = Student.objects.create(user=User.objects.create_user('outsider', 'outsider@example.com', 'p'),
+                                              first_name='O', middle_name='O', last_name='O')
+        cls.study_group = StudyGroup.objects.create(name='group', major=cls.major, education_degree='BC')
+        cls.study_group.students.add(cls.student)
+        cls.module = Module.objects.create(title='module')
+        cls.course = Course.objects.create(
+            title='course', teacher=cls.teacher,
+            evaluation_criteria=SimpleUploadedFile('criteria.json', b'{"credit": false, "grades": '
+                                                                    b'{"grade_3": 1, "grade_4": 2, "grade_5": 3}}'))
+        cls.course.majors.add(cls.major)
+        cls.course.members.add(cls.study_group)
+        cls.course.modules.add(cls.module)
+        cls.lecture = Lecture.objects.create(title='lecture', deadline_date=cls.deadline, module=cls.module,
+                                             materials=SimpleUploadedFile('lecture.md', b'# Lecture\n\nText'))
+        cls.evaluation_test = EvaluationTest.objects.create(title='test', deadline_date=cls.deadline,
+                                                            complete_time=30, allowed_attempts=3)
+        cls.practice = Practice.objects.create(title='practice', deadline_date=cls.deadline, max_score=10,
+                                               description=SimpleUploadedFile('description.json', b'{}'))
+        cls.module.evaluation_test = cls.evaluation_test
+        cls.module.practice = cls.practice
+        cls.module.save()
+        cls.sections = []
+        cls.correct_answers = []
+
+        for question_number in range(3):
+            section = QuestionSection.objects.create(evaluation_test=cls.evaluation_test,
+                                                     question=f'question {question_number}')
+            cls.sections.append(section)
+
+            for answer_number in range(3):
+                answer = QuestionAnswers.objects.create(question_section=section, answer=f'answer {answer_number}',
+                                                        is_correct=answer_number == 0,
+                                                        score=1.0 if answer_number == 0 else 0.0)
+
+                if answer.is_correct:
+                    cls.correct_answers.append(answer)
+
+        cls.teacher_token = Token.objects.create(user=cls.teacher.user).key
+        cls.student_token = Token.objects.create(user=cls.student.user).key
+        cls.outsider_token = Token.objects.create(user=cls.outsider.user).key
+
+    def setUp(self):
+        cache.clear()
+        EVALUATION_CRITERIA_CACHE.clear()
+        PUBLISHED_TEST_PAYLOADS.clear()
+
+    def authorize(self, token: str) -> None:
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token}'
+
+
+class ContentAddressedStorageTest(SdoTestCase):
+    def test_same_content_is_stored_once(self):
+        name = content_addressed_storage.save('a/one.md', SimpleUploadedFile('one.md', b'same'))
+        other_name = content_addressed_storage.save('b/two.md', SimpleUploadedFile('two.md', b'same'))
+
+        self.assertEqual(name, other_name)
+        self.assertEqual(FileBlob.objects.get(name=name).ref_count, 2)
+
+    def test_blob_is_removed_with_its_last_reference(self):
+        name = content_addressed_storage.save('a/one.md', SimpleUploadedFile('one.md', b'removed'))
+        content_addressed_storage.retain(name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            content_addressed_storage.delete(name)
+
+        self.assertEqual(FileBlob.objects.get(name=name).ref_count, 1)
+        self.assertTrue(content_addressed_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            content_addressed_storage.delete(name)
+
+        self.assertFalse(FileBlob.objects.filter(name=name).exists())
+        self.assertFalse(content_addressed_storage.exists(name))
+
+    def test_pending_delete_keeps_blob_saved_again(self):
+        name = content_addressed_storage.save('a/one.md', SimpleUploadedFile('one.md', b'saved again'))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            content_addressed_storage.delete(name)
+
+        self.assertEqual(content_addressed_storage.save('b/two.md', SimpleUploadedFile('two.md', b'saved again')),
+                         name)
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(FileBlob.objects.get(name=name).ref_count, 1)
+        self.assertTrue(content_addressed_storage.exists(name))
+
+    def test_sweep_removes_only_old_unreferenced_files(self):
+        kept = content_addressed_storage.save('a/one.md', SimpleUploadedFile('one.md', b'kept'))
+        orphan = content_addressed_storage.save('b/two.md', SimpleUploadedFile('two.md', b'orphan'))
+        fresh_orphan = content_addressed_storage.save('c/three.md', SimpleUploadedFile('three.md', b'fresh'))
+        FileBlob.objects.filter(name__in=[orphan, fresh_orphan]).delete()
+        an_hour_ago = time.time() - 60 * 60
+
+        for name in (kept, orphan):
+            os.utime(content_addressed_storage.path(name), (an_hour_ago, an_hour_ago))
+
+        self.assertEqual(content_addressed_storage.sweep(60), 1)
+        self.assertTrue(content_addressed_storage.exists(kept))
+        self.assertFalse(content_addressed_storage.exists(orphan))
+        self.assertTrue(content_addressed_storage.exists(fresh_orphan))
+
+    def test_update_releases_replaced_file_after_commit(self):
+        old_name = self.lecture.materials.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LectureService().update(self.lecture.pk, {'materials': SimpleUploadedFile('lecture.md', b'# New')})
+
+        self.assertFalse(FileBlob.objects.filter(name=old_name).exists())
+        self.assertFalse(content_addressed_storage.exists(old_name))
+        self.assertEqual(FileBlob.objects.get(name=Lecture.objects.get(pk=self.lecture.pk).materials.name).ref_count,
+                         1)
+
+    def test_failed_update_keeps_replaced_file(self):
+        old_name = self.lecture.materials.name
+
+        with mock.patch.object(ChangeFeedService, 'record', side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True):
+            LectureService().update(self.lecture.pk, {'materials': SimpleUploadedFile('lecture.md', b'# Failed')})
+
+        self.assertEqual(Lecture.objects.get(pk=self.lecture.pk).materials.name, old_name)
+        self.assertEqual(FileBlob.objects.get(name=old_name).ref_count, 1)
+        self.assertTrue(content_addressed_storage.exists(old_name))
+
+
+class MediaDeliveryTest(SdoTestCase):
+    def get_media(self, token: str, name: str, **headers):
+        self.authorize(token)
+        return self.client.get(f'/api/media/{name}', headers=headers)
+
+    def test_enrolled_student_gets_file_with_validators(self):
+        response = self.get_media(self.student_token, self.lecture.materials.name)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'# Lecture\n\nText')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.get_media(self.student_token, self.lecture.materials.name,
+                                        if_none_match=response['ETag']).status_code, 304)
+
+    def test_range_requests(self):
+        name = self.lecture.materials.name
+        response = self.get_media(self.student_token, name, range='bytes=2-8')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-8/15')
+        self.assertEqual(b''.join(response.streaming_content), b'Lecture')
+        self.assertEqual(b''.join(self.get_media(self.student_token, name, range='bytes=-4').streaming_content),
+                         b'Text')
+        self.assertEqual(self.get_media(self.student_token, name, range='bytes=20-30').status_code, 416)
+        self.assertEqual(self.get_media(self.student_token, name, range='bytes=2-8',
+                                        if_range='"stale"').status_code, 200)
+
+    def test_unparsable_range_is_ignored(self):
+        name = self.lecture.materials.name
+
+        for header in ('bytes=8-2', 'bytes=0-1,4-5', 'lines=1-2', 'bytes=x-'):
+            response = self.get_media(self.student_token, name, range=header)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), b'# Lecture\n\nText')
+
+        self.assertEqual(self.get_media(self.student_token, name, range='bytes=-0').status_code, 416)
+
+    def test_compressed_file_is_not_sent_with_content_encoding(self):
+        path = os.path.join(MEDIA_ROOT, 'notes.gz')
+
+        with open(path, 'wb') as file:
+            file.write(gzip.compress(b'notes'))
+
+        response = serve_file(RequestFactory().get('/api/media/notes.gz'), 'notes.gz', path)
+        response.close()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_access_is_checked(self):
+        self.assertEqual(self.get_media(self.outsider_token, self.lecture.materials.name).status_code, 403)
+        self.assertEqual(self.get_media(self.student_token, 'blobs/00/00/missing.md').status_code, 404)
+        self.assertEqual(self.get_media(self.student_token, '../settings.py').status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect')
+    def test_delivery_is_delegated_to_the_web_server(self):
+        name = self.lecture.materials.name
+        response = self.get_media(self.student_token, name)
+
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-data/{name}')
+        self.assertEqual(response.content, b'')
+
+
+class JSONFileValidatorTest(TestCase):
+    def test_parses_file_once(self):
+        upload = SimpleUploadedFile('data.json', b'{"a": ["\\"]", {"b": 1}]}')
+
+        self.assertEqual(parse_json_file(upload), {'a': ['"]', {'b': 1}]})
+
+        with mock.patch('json.loads') as loads:
+            self.assertEqual(parse_json_file(upload), {'a': ['"]', {'b': 1}]})
+
+        loads.assert_not_called()
+        self.assertEqual(upload.tell(), 0)
+
+    @override_settings(JSON_UPLOAD_MAX_DEPTH=3)
+    def test_rejects_deep_nesting_before_parsing(self):
+        parse_json_file(SimpleUploadedFile('data.json', b'[[["[[[[["]]]'))
+
+        with self.assertRaisesMessage(ValidationError, 'maximum depth is 3'):
+            parse_json_file(SimpleUploadedFile('data.json', b'[[[[]]]]'))
+
+    @override_settings(JSON_UPLOAD_MAX_SIZE=8)
+    def test_rejects_large_files(self):
+        with self.assertRaisesMessage(ValidationError, 'File is too large'):
+            parse_json_file(SimpleUploadedFile('data.json', b'[1, 2, 3, 4]'))
+
+    def test_rejects_invalid_json_and_unexpected_keys(self):
+        with self.assertRaisesMessage(ValidationError, 'Invalid JSON file'):
+            parse_json_file(SimpleUploadedFile('data.json', b'{"a": '))
+
+        with self.assertRaisesMessage(ValidationError, 'Unexpected key'):
+            validate_eval_criteria_file(SimpleUploadedFile('criteria.json', b'{"grades": {}, "other": 1}'))
+
+
+class EvaluationCriteriaTest(SdoTestCase):
+    def test_grades_by_thresholds(self):
+        self.assertEqual(CourseService().grade(self.course.pk, [0, 0.5, 1, 2.5, 3, 10]), [2, 2, 3, 4, 5, 5])
+
+    def test_criteria_are_parsed_once(self):
+        CourseService().grade(self.course.pk, [1])
+
+        self.assertEqual(Course.objects.get(pk=self.course.pk).evaluation_criteria_data['grades']['grade_5'], 3)
+
+        with mock.patch('sdo_app.services.parse_json_file') as parse:
+            CourseService().grade(self.course.pk, [1])
+
+        parse.assert_not_called()
+
+    def test_updated_criteria_are_used(self):
+        CourseService().grade(self.course.pk, [1])
+        CourseService().update(self.course.pk, {'evaluation_criteria': SimpleUploadedFile(
+            'criteria.json', b'{"credit": true, "grades": {"grade_3": 5}}')})
+
+        self.assertEqual(CourseService().grade(self.course.pk, [4, 5]), [False, True])
+
+
+class ExamSessionTest(SdoTestCase):
+    def start(self, student: Student) -> ExamSession:
+        return ExamSessionService().start({'student': student.pk, 'evaluation_test': self.evaluation_test.pk})
+
+    def expire(self, exam_session: ExamSession) -> None:
+        ExamSession.objects.filter(pk=exam_session.pk).update(expires_at=timezone.now() - datetime.timedelta(hours=1))
+
+    def test_autosaved_answers_are_graded_on_finish(self):
+        exam_session = self.start(self.student)
+
+        self.assertEqual(self.start(self.student).pk, exam_session.pk)
+
+        ExamSessionService().autosave(exam_session.pk, [
+            {'question_section': self.sections[0].pk, 'answer': self.correct_answers[0].pk},
+            {'question_section': str(self.sections[1].pk), 'answer': [str(self.correct_answers[1].pk)]}])
+        exam_session = ExamSessionService().finish(exam_session.pk)
+
+        self.assertTrue(exam_session.is_finished)
+        self.assertEqual(exam_session.student_result.score, 2.0)
+
+        with self.assertRaises(APIValidationError):
+            ExamSessionService().autosave(exam_session.pk, [])
+
+    def test_autosave_rechecks_session_finished_before_the_lock(self):
+        exam_session = self.start(self.student)
+
+        def finish_concurrently(service, _):
+            ExamSessionService().finish(exam_session.pk)
+            return False
+
+        with mock.patch.object(ExamSessionService, 'finish_if_expired', finish_concurrently), \
+                self.assertRaises(APIValidationError):
+            ExamSessionService().autosave(exam_session.pk, [{'question_section': self.sections[0].pk,
+                                                             'answer': self.correct_answers[0].pk}])
+
+        self.assertIsNone(cache.get(ExamSessionService().cache_key(exam_session.pk)))
+
+    def test_enrollment_is_required(self):
+        with self.assertRaisesMessage(APIValidationError, 'not enrolled'):
+            self.start(self.outsider)
+
+    def test_autosave_rejects_answers_without_ids(self):
+        exam_session = self.start(self.student)
+
+        for answer in [None, '', 'first', True, [self.correct_answers[0].pk, None]]:
+            with self.subTest(answer=answer), self.assertRaises(APIValidationError):
+                ExamSessionService().autosave(exam_session.pk, [{'question_section': self.sections[0].pk,
+                                                                 'answer': answer}])
+
+        with self.assertRaises(APIValidationError):
+            ExamSessionService().autosave(exam_session.pk, [{'answer': self.correct_answers[0].pk}])
+
+        self.assertEqual(ExamSessionService().finish(exam_session.pk).student_result.score, 0.0)
+
+    def test_expired_sessions_are_finished_on_access(self):
+        exam_session = self.start(self.student)
+        self.expire(exam_session)
+
+        self.assertTrue(ExamSessionService().get(exam_session.pk).is_finished)
+
+    def test_failing_session_does_not_stop_the_sweep(self):
+        broken_session = self.start(self.student)
+        exam_session = ExamSession.objects.create(student=self.outsider, evaluation_test=self.evaluation_test,
+                                                  expires_at=timezone.now())
+        self.expire(broken_session)
+        self.expire(exam_session)
+        finish = ExamSessionService.finish
+
+        def finish_or_fail(service, pk):
+            if pk == broken_session.pk:
+                raise RuntimeError('broken')
+
+            return finish(service, pk)
+
+        with mock.patch.object(ExamSessionService, 'finish', finish_or_fail), \
+                self.assertLogs('sdo_app.services', 'ERROR'):
+            self.assertEqual(ExamSessionService().finish_expired(), 1)
+
+        self.assertFalse(ExamSession.objects.get(pk=broken_session.pk).is_finished)
+        self.assertTrue(ExamSession.objects.get(pk=exam_session.pk).is_finished)
+        self.assertTrue(StudentResult.objects.filter(student=self.outsider).exists())
+
+
+class BackgroundJobTest(TestCase):
+    def test_idempotency_key_enqueues_once(self):
+        background_job = BackgroundJobService().enqueue('test.job', {'a': 1}, idempotency_key='key')
+
+        self.assertEqual(BackgroundJobService().enqueue('test.job', {'a': 2}, idempotency_key='key').pk,
+                         background_job.pk)
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+    def test_claim_takes_due_jobs_once(self):
+        later_job = BackgroundJobService().enqueue('test.job')
+        BackgroundJob.objects.filter(pk=later_job.pk).update(run_after=timezone.now() - datetime.timedelta(minutes=1))
+        BackgroundJobService().enqueue('test.job', idempotency_key='future')
+        BackgroundJob.objects.filter(idempotency_key='future').update(
+            run_after=timezone.now() + datetime.timedelta(minutes=1))
+        first_job = BackgroundJobService().enqueue('test.job')
+        BackgroundJob.objects.filter(pk=first_job.pk).update(run_after=timezone.now() - datetime.timedelta(minutes=2))
+
+        claimed = BackgroundJobService().claim()
+
+        self.assertEqual(claimed.pk, first_job.pk)
+        self.assertEqual((claimed.status, claimed.attempts), (BackgroundJob.Status.RUNNING, 1))
+        self.assertEqual(BackgroundJobService().claim().pk, later_job.pk)
+        self.assertIsNone(BackgroundJobService().claim())
+
+    @override_settings(BACKGROUND_JOB_LOCK_TIMEOUT=60)
+    def test_lost_jobs_are_reclaimed(self):
+        BackgroundJobService().enqueue('test.job')
+        claimed = BackgroundJobService().claim()
+        BackgroundJob.objects.filter(pk=claimed.pk).update(locked_at=timezone.now() - datetime.timedelta(minutes=2))
+
+        reclaimed = BackgroundJobService().claim()
+
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (claimed.pk, 2))
+
+    def test_run_records_result_and_progress(self):
+        def handler(payload: dict) -> dict:
+            BackgroundJobService.report_progress(1, 4)
+            self.assertEqual(BackgroundJob.objects.get(name='test.job').progress, 25)
+            return {'doubled': payload['value'] * 2}
+
+        BackgroundJobService().enqueue('test.job', {'value': 21})
+
+        with mock.patch.dict(JOB_HANDLERS, {'test.job': handler}):
+            background_job = BackgroundJobService().run(BackgroundJobService().claim())
+
+        self.assertEqual(background_job.status, BackgroundJob.Status.SUCCEEDED)
+        self.assertEqual(BackgroundJob.objects.get(pk=background_job.pk).result, {'doubled': 42})
+
+    @override_settings(BACKGROUND_JOB_RETRY_DELAY=30)
+    def test_failed_jobs_are_retried_with_backoff(self):
+        BackgroundJobService().enqueue('test.job', max_attempts=2)
+
+        with mock.patch.dict(JOB_HANDLERS, {'test.job': mock.Mock(side_effect=RuntimeError('failed'))}):
+            background_job = BackgroundJobService().run(BackgroundJobService().claim())
+
+            self.assertEqual(background_job.status, BackgroundJob.Status.PENDING)
+            self.assertIn('RuntimeError', background_job.error)
+            self.assertGreater(background_job.run_after, timezone.now() + datetime.timedelta(seconds=25))
+
+            BackgroundJob.objects.filter(pk=background_job.pk).update(run_after=timezone.now())
+            background_job = BackgroundJobService().run(BackgroundJobService().claim())
+
+        self.assertEqual((background_job.status, background_job.attempts), (BackgroundJob.Status.FAILED, 2))
+
+
+class PublishedTestTest(SdoTestCase):
+    def get_published(self, headers: dict | None = None, **params):
+        return self.client.get('/api/e_tests/published/', {'id': self.evaluation_test.pk, **params}, headers=headers)
+
+    def test_snapshot_is_versioned_by_content(self):
+        response = self.get_published({'Accept-Encoding': 'gzip'})
+        payload = json.loads(gzip.decompress(response.content))
+
+        self.assertEqual(response['X-Test-Version'], '1')
+        self.assertEqual(payload['max_score'], 3.0)
+        self.assertEqual([len(section['answers']) for section in payload['question_sections']], [3, 3, 3])
+        self.assertNotIn('is_correct', payload['question_sections'][0]['answers'][0])
+        self.assertEqual(self.get_published({'If-None-Match': response['ETag']}).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionAnswersService().update(self.correct_answers[0].pk, {'is_correct': True, 'answer': 'changed'})
+
+        self.assertEqual(self.get_published()['X-Test-Version'], '2')
+
+        pinned = self.get_published(version=1)
+
+        self.assertEqual(json.loads(pinned.content), payload)
+        self.assertIn('immutable', pinned['Cache-Control'])
+
+    def test_student_order_is_deterministic(self):
+        first = json.loads(self.get_published(student=self.student.pk).content)
+
+        self.assertEqual(json.loads(self.get_published(student=self.student.pk).content), first)
+        self.assertCountEqual([section['id'] for section in first['question_sections']],
+                              [section.pk for section in self.sections])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get_published(version='latest').status_code, 400)
+        self.assertEqual(self.get_published(student='me').status_code, 400)
+        self.assertEqual(self.client.get('/api/e_tests/published/', {'id': 'test'}).status_code, 400)
+        self.assertEqual(self.get_published(version=7).status_code, 404)
+
+
+    def test_publish_is_scheduled_once_per_transaction(self):
+        with mock.patch.object(PublishedTestService, 'publish') as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    PublishedTestService().schedule_publish(self.evaluation_test.pk)
+                    raise RuntimeError
+
+                PublishedTestService().schedule_publish(self.evaluation_test.pk)
+                PublishedTestService().schedule_publish(self.evaluation_test.pk)
+
+            self.assertEqual(len(callbacks), 1)
+
+            callbacks[0]()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                PublishedTestService().schedule_publish(self.evaluation_test.pk)
+
+        self.assertEqual(publish.call_count, 2)
+
+class EvaluationTestCheckTest(SdoTestCase):
+    def test_retried_check_job_grades_once(self):
+        BackgroundJobService().enqueue('evaluation_test.check', {
+            'student': self.student.pk, 'evaluation_test': self.evaluation_test.pk,
+            'answers': [{'question_section': self.sections[0].pk, 'answer': self.correct_answers[0].pk}]})
+        background_job = BackgroundJobService().run(BackgroundJobService().claim())
+        # The worker died after grading: the job is claimed again.
+        BackgroundJob.objects.filter(pk=background_job.pk).update(status=BackgroundJob.Status.PENDING)
+
+        self.assertEqual(BackgroundJobService().run(BackgroundJobService().claim()).result, {'student_score': 1.0})
+        self.assertEqual(StudentResult.objects.filter(student=self.student).count(), 1)
+
+    def test_answers_are_scored_and_stored_compactly(self):
+        answers = [{'question_section': self.sections[0].pk, 'answer': self.correct_answers[0].pk},
+                   {'question_section': self.sections[1].pk, 'answer': [self.correct_answers[1].pk,
+                                                                        self.correct_answers[1].pk + 1]},
+                   {'question_section': self.sections[2].pk, 'answer': self.correct_answers[0].pk}]
+
+        self.assertEqual(EvaluationTestService().check(self.student.pk, self.evaluation_test.pk, answers), 2.0)
+
+        student_result = StudentResult.objects.get(student=self.student)
+
+        self.assertEqual(unpack_chosen_answers(student_result.chosen_answers), sorted([
+            (self.sections[0].pk, self.correct_answers[0].pk), (self.sections[1].pk, self.correct_answers[1].pk),
+            (self.sections[1].pk, self.correct_answers[1].pk + 1), (self.sections[2].pk, self.correct_answers[0].pk)]))
+
+    def test_answers_without_ids_are_skipped(self):
+        answers = [{'question_section': self.sections[0].pk, 'answer': None},
+                   {'question_section': self.sections[1].pk, 'answer': ''},
+                   {'question_section': self.sections[2].pk, 'answer': [None, 'third', self.correct_answers[2].pk]},
+                   {'question_section': None, 'answer': self.correct_answers[0].pk}]
+        self.authorize(self.student_token)
+
+        response = self.client.post(f'/api/e_tests/?id={self.evaluation_test.pk}',
+                                    {'student': self.student.pk, 'answers': answers}, content_type='application/json')
+
+        self.assertEqual(response.json(), {'code': 200, 'student_score': 1.0})
+
+
+    def test_async_check_replays_the_job_for_a_retried_key(self):
+        self.authorize(self.student_token)
+
+        def post(answers: list, key: str = 'retry'):
+            return self.client.post(f'/api/e_tests/{self.evaluation_test.pk}/?async=1',
+                                    {'student': self.student.pk, 'answers': answers}, content_type='application/json',
+                                    headers={'Idempotency-Key': key})
+
+        answers = [{'question_section': self.sections[0].pk, 'answer': self.correct_answers[0].pk}]
+        response = post(answers)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(post(answers).json(), response.json())
+        self.assertEqual(post([]).status_code, 422)
+        self.assertEqual(BackgroundJob.objects.filter(name='evaluation_test.check').count(), 1)
+        self.assertTrue(BackgroundJob.objects.get().idempotency_key.startswith(
+            f'evaluation_test.check:{self.student.user_id}:{self.evaluation_test.pk}:'))
+
+class SearchTest(SdoTestCase):
+    def setUp(self):
+        super().setUp()
+        SearchService().rebuild()
+
+    def search(self, token: str, **params):
+        self.authorize(token)
+        return self.client.get('/api/search/', params)
+
+    def test_results_are_scoped_to_the_user_courses(self):
+        student_results = self.search(self.student_token, q='lecture text').json()['results']
+
+        self.assertEqual([(result['kind'], result['id']) for result in student_results],
+                         [(SearchDocument.Kind.LECTURE, self.lecture.pk)])
+        self.assertEqual(self.search(self.outsider_token, q='lecture').json()['results'], [])
+        self.assertEqual(self.search(self.student_token, q='question').json()['results'], [])
+        self.assertEqual(len(self.search(self.teacher_token, q='question').json()['results']), 3)
+        self.assertEqual(self.search(self.student_token, q='lecture', course=self.course.pk + 1).json()['results'],
+                         [])
+
+    def test_index_follows_updates(self):
+        LectureService().update(self.lecture.pk, {'title': 'renamed'})
+
+        self.assertEqual(len(self.search(self.student_token, q='renamed').json()['results']), 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.search(self.student_token).json()['code'], 400)
+        self.assertEqual(self.search(self.student_token, q='lecture', limit='all').status_code, 400)
+        self.assertEqual(self.search(self.student_token, q='lecture', limit=-1).status_code, 400)
+        self.assertEqual(self.search(self.student_token, q='lecture', course='first').status_code, 400)
+
+
+class AnalyticsTest(SdoTestCase):
+    def check(self, student: Student, correct_sections: int) -> None:
+        EvaluationTestService().check(student.pk, self.evaluation_test.pk, [
+            {'question_section': section.pk, 'answer': answer.pk}
+            for section, answer in zip(self.sections[:correct_sections], self.correct_answers)])
+
+    def test_evaluation_test_statistics(self):
+        self.check(self.student, 3)
+        self.check(self.outsider, 1)
+        self.check(self.student, 0)
+
+        statistics = AnalyticsService().evaluation_test_statistics(self.evaluation_test.pk)
+
+        self.assertEqual((statistics['attempts'], statistics['students'], statistics['max_score']), (3, 2, 3.0))
+        self.assertAlmostEqual(statistics['mean_score'], 4 / 3)
+        self.assertEqual((statistics['min_score'], statistics['max_achieved_score']), (0.0, 3.0))
+        self.assertAlmostEqual(statistics['pass_rate'], 1 / 3)
+        self.assertEqual([histogram_bin['count'] for histogram_bin in statistics['histogram']],
+                         [1, 0, 0, 1, 0, 0, 0, 0, 0, 1])
+        self.assertAlmostEqual(statistics['items'][0]['difficulty'], 2 / 3)
+        self.assertAlmostEqual(statistics['items'][1]['difficulty'], 1 / 3)
+
+    def test_statistics_are_updated_incrementally(self):
+        self.check(self.student, 3)
+        AnalyticsService().evaluation_test_statistics(self.evaluation_test.pk)
+        self.check(self.outsider, 1)
+
+        with self.assertNumQueries(1):
+            statistics = AnalyticsService().evaluation_test_statistics(self.evaluation_test.pk)
+
+        self.assertEqual(statistics['attempts'], 2)
+        self.assertAlmostEqual(statistics['mean_score'], 2.0)
+
+    def test_course_statistics_endpoint(self):
+        self.check(self.student, 2)
+        self.authorize(self.student_token)
+
+        self.assertEqual(self.client.get('/api/analytics/', {'course': self.course.pk}).status_code, 403)
+
+        self.authorize(self.teacher_token)
+        data = self.client.get('/api/analytics/', {'course': self.course.pk}).json()['data']
+
+        self.assertEqual([(evaluation_test['evaluation_test'], evaluation_test['attempts'],
+                           evaluation_test['mean_score']) for evaluation_test in data['evaluation_tests']],
+                         [(self.evaluation_test.pk, 1, 2.0)])
+
+
+class AnswerDetailTest(SdoTestCase):
+    def test_packing_round_trip(self):
+        question_scores = {3: 1.5, 1: 0.0, 2 ** 40: 2.25}
+        chosen_answers = [(1, 10), (3, 30), (3, 31)]
+
+        self.assertEqual(len(pack_question_scores(question_scores)), 4 + 3 * 16)
+        self.assertEqual(unpack_question_scores(memoryview(pack_question_scores(question_scores))), question_scores)
+        self.assertEqual(unpack_chosen_answers(pack_chosen_answers(chosen_answers)), chosen_answers)
+        self.assertEqual((unpack_question_scores(None), unpack_chosen_answers(b'')), ({}, []))
+
+    def test_check_stores_a_score_for_every_question(self):
+        EvaluationTestService().check(self.student.pk, self.evaluation_test.pk, [
+            {'question_section': self.sections[1].pk, 'answer': self.correct_answers[1].pk}])
+
+        self.assertEqual(unpack_question_scores(StudentResult.objects.get(student=self.student).question_scores),
+                         {self.sections[0].pk: 0.0, self.sections[1].pk: 1.0, self.sections[2].pk: 0.0})
+
+    def test_parse_id(self):
+        self.assertEqual([parse_id(value) for value in [7, '7', ' 7', None, '', 'seven', True, [7]]],
+                         [7, 7, 7, None, None, None, None, None])
+
+
+class RegradeTest(SdoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.wrong_answer = QuestionAnswers.objects.filter(question_section=self.sections[0], is_correct=False).first()
+        EvaluationTestService().check(self.student.pk, self.evaluation_test.pk, [
+            {'question_section': self.sections[0].pk, 'answer': self.wrong_answer.pk},
+            {'question_section': self.sections[1].pk, 'answer': self.correct_answers[1].pk}])
+        EvaluationTestService().check(self.outsider.pk, self.evaluation_test.pk, [
+            {'question_section': self.sections[0].pk, 'answer': self.correct_answers[0].pk}])
+
+    def test_answer_key_edits_enqueue_one_regrade(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionAnswersService().update(self.wrong_answer.pk, {'is_correct': True, 'score': 2.0})
+            QuestionAnswersService().update(self.correct_answers[0].pk, {'is_correct': False})
+
+        background_job = BackgroundJob.objects.get(name='evaluation_test.regrade')
+
+        self.assertEqual(background_job.payload, {'evaluation_test': self.evaluation_test.pk})
+        self.assertEqual(BackgroundJobService().run(BackgroundJobService().claim()).result, {'regraded': 2})
+        self.assertEqual(list(StudentResult.objects.order_by('student_id').values_list('student_id', 'score')),
+                         [(self.student.pk, 3.0), (self.outsider.pk, 0.0)])
+        self.assertEqual(unpack_question_scores(StudentResult.objects.get(student=self.student).question_scores),
+                         {self.sections[0].pk: 2.0, self.sections[1].pk: 1.0, self.sections[2].pk: 0.0})
+
+    def test_rolled_back_edit_does_not_suppress_regrade(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                QuestionAnswersService().update(self.wrong_answer.pk, {'is_correct': True})
+                raise RuntimeError
+
+            QuestionAnswersService().update(self.correct_answers[0].pk, {'is_correct': False})
+
+        self.assertEqual(BackgroundJob.objects.filter(name='evaluation_test.regrade').count(), 1)
+
+    def test_regrade_runs_in_batches_and_reports_progress(self):
+        QuestionAnswers.objects.filter(pk=self.correct_answers[1].pk).update(score=5.0)
+        progress = mock.Mock()
+
+        self.assertEqual(EvaluationTestService().regrade(self.evaluation_test.pk, batch_size=1, progress=progress), 2)
+        self.assertEqual(progress.call_args_list, [mock.call(1, 2), mock.call(2, 2)])
+        self.assertEqual(StudentResult.objects.get(student=self.student).score, 5.0)
+
+
+class StudentResultArchiveTest(SdoTestCase):
+    def check(self, correct_sections: int) -> StudentResult:
+        EvaluationTestService().check(self.student.pk, self.evaluation_test.pk, [
+            {'question_section': section.pk, 'answer': answer.pk}
+            for section, answer in zip(self.sections[:correct_sections], self.correct_answers)])
+        return StudentResult.objects.filter(student=self.student).last()
+
+    def archive(self) -> None:
+        StudentResultService().archive_groups([(self.student.pk, self.evaluation_test.pk, None)])
+
+    def get_final_result(self) -> int:
+        return StudentResultService().get_final_result(self.student.pk, str(self.evaluation_test.pk), None)
+
+    def test_archived_attempts_are_replaced_by_one_row(self):
+        best_result = self.check(3)
+        self.check(1)
+        self.archive()
+
+        archive = StudentResultArchive.objects.get(student=self.student)
+
+        self.assertFalse(StudentResult.objects.filter(student=self.student).exists())
+        self.assertEqual((archive.attempts, archive.final_result_id, archive.final_score), (2, best_result.pk, 3.0))
+        self.assertEqual([student_result.score for student_result in StudentResultService().get_by(
+            student=self.student.pk, evaluation_test=self.evaluation_test.pk)], [3.0, 1.0])
+
+    def test_get_by_returns_a_list_with_or_without_archives(self):
+        self.check(3)
+        live_results = StudentResultService().get_by(student=self.student.pk, evaluation_test=self.evaluation_test.pk)
+        self.archive()
+        self.check(1)
+        merged_results = StudentResultService().get_by(evaluation_test_id=self.evaluation_test.pk)
+
+        self.assertIsInstance(live_results, list)
+        self.assertIsInstance(merged_results, list)
+        self.assertEqual([student_result.score for student_result in merged_results], [3.0, 1.0])
+        self.assertIsNone(StudentResultService().get_by(student=self.student.pk))
+
+    def test_final_result_merges_archived_and_live_attempts(self):
+        best_result = self.check(3)
+        self.check(1)
+        self.archive()
+        live_result = self.check(2)
+
+        self.assertEqual(self.get_final_result(), best_result.pk)
+        self.assertEqual(live_result.attempt, 3)
+
+        EvaluationTest.objects.filter(pk=self.evaluation_test.pk).update(
+            final_score_is=EvaluationTest.FinalScoreIs.LAST_ATTEMPT)
+
+        self.assertEqual(self.get_final_result(), live_result.pk)
+
+    def test_archived_attempts_count_towards_the_limit(self):
+        self.check(1)
+        self.check(1)
+        self.archive()
+        self.check(1)
+
+        self.assertEqual(StudentResultService().count_attempts(self.student.pk, self.evaluation_test.pk), 3)
+
+        with self.assertRaisesMessage(APIValidationError, 'No attempts left'):
+            ExamSessionService().start({'student': self.student.pk, 'evaluation_test': self.evaluation_test.pk})
+
+
+    def test_one_archive_per_student_and_task(self):
+        self.check(1)
+        self.archive()
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StudentResultArchive.objects.create(student=self.student, evaluation_test=self.evaluation_test, results=b'')
+
+        StudentResultArchive.objects.create(student=self.student, practice=self.practice, results=b'')
+
+class EnrollmentInvalidationTest(SdoTestCase):
+    def get_course_ids(self, student: Student) -> frozenset:
+        return EnrollmentService().get_course_ids(student.pk)
+
+    @override_settings(ENROLLMENT_CACHE_TIMEOUT=30)
+    def test_enrollment_is_cached_with_a_timeout(self):
+        with mock.patch.object(cache, 'set') as cache_set:
+            self.get_course_ids(self.student)
+
+        cache_set.assert_called_once_with(EnrollmentService.cache_key(self.student.pk), frozenset({self.course.pk}),
+                                          30)
+
+    def test_study_group_membership_changes(self):
+        self.assertEqual(self.get_course_ids(self.outsider), frozenset())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.study_group.students.add(self.outsider)
+
+        self.assertEqual(self.get_course_ids(self.outsider), {self.course.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.outsider.study_groups.remove(self.study_group)
+
+        self.assertEqual(self.get_course_ids(self.outsider), frozenset())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.study_group.students.clear()
+
+        self.assertEqual(self.get_course_ids(self.student), frozenset())
+
+    def test_course_membership_changes(self):
+        self.assertEqual(self.get_course_ids(self.student), {self.course.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.members.set([])
+
+        self.assertEqual(self.get_course_ids(self.student), frozenset())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.study_group.course_members.add(self.course)
+
+        self.assertEqual(self.get_course_ids(self.student), {self.course.pk})
+
+    def test_deleted_study_group(self):
+        self.assertEqual(self.get_course_ids(self.student), {self.course.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.members.through.objects.filter(studygroup=self.study_group).delete()
+            StudyGroup.objects.filter(pk=self.study_group.pk).first().delete()
+
+        self.assertEqual(self.get_course_ids(self.student), frozenset())
+
+    def test_new_student_profile_is_picked_up(self):
+        user = User.objects.create_user('new', 'new@example.com', 'p')
+
+        self.assertIsNone(EnrollmentService().get_student_id(user))
+
+        student = Student.objects.create(user=user, first_name='N', middle_name='N', last_name='N')
+
+        self.assertEqual(EnrollmentService().get_student_id(user), student.pk)
+
+
+class DashboardTest(SdoTestCase):
+    def get_dashboard(self, token: str, **params):
+        self.authorize(token)
+        return self.client.get('/api/dashboard/', params)
+
+    def test_dashboard_lists_courses_deadlines_and_results(self):
+        EvaluationTestService().check(self.student.pk, self.evaluation_test.pk, [
+            {'question_section': self.sections[0].pk, 'answer': self.correct_answers[0].pk}])
+
+        dashboard = self.get_dashboard(self.student_token).json()['data']
+
+        self.assertEqual([course['id'] for course in dashboard['courses']], [self.course.pk])
+        self.assertCountEqual([(deadline['kind'], deadline['id']) for deadline in dashboard['deadlines']],
+                              [('lecture', self.lecture.pk), ('practice', self.practice.pk),
+                               ('evaluation_test', self.evaluation_test.pk)])
+        self.assertEqual([(result['kind'], result['attempts'], result['final_score'])
+                          for result in dashboard['results']], [('evaluation_test', 1, 1.0)])
+
+    def test_dashboard_is_cached_until_invalidated(self):
+        self.get_dashboard(self.student_token)
+
+        with self.assertNumQueries(2):
+            self.get_dashboard(self.student_token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LectureService().update(self.lecture.pk, {'title': 'renamed'})
+
+        deadlines = self.get_dashboard(self.student_token).json()['data']['deadlines']
+
+        self.assertIn('renamed', [deadline['title'] for deadline in deadlines])
+
+    def test_content_edits_invalidate_enrolled_students_only(self):
+        self.get_dashboard(self.student_token)
+        self.get_dashboard(self.outsider_token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PracticeService().update(self.practice.pk, {'title': 'renamed'})
+
+        self.assertIsNone(cache.get(DashboardService().cache_key(self.student.pk)))
+        self.assertIsNotNone(cache.get(DashboardService().cache_key(self.outsider.pk)))
+
+    def test_other_students_dashboards(self):
+        self.assertEqual(self.get_dashboard(self.teacher_token, student=self.student.pk).json()['data']['student'],
+                         self.student.pk)
+        self.assertEqual(self.get_dashboard(self.outsider_token, student=self.student.pk).json()['data']['student'],
+                         self.outsider.pk)
+        self.assertEqual(self.get_dashboard(self.teacher_token, student='me').status_code, 400)
+        self.assertEqual(self.get_dashboard(self.teacher_token).json()['code'], 404)
+
+
+class AdminSearchTest(SdoTestCase):
+    def search(self, model, search_term: str) -> list:
+        model_admin = site._registry[model]
+        request = RequestFactory().get('/', {'q': search_term})
+        queryset, _ = model_admin.get_search_results(request, model.objects.all(), search_term)
+
+        return list(queryset)
+
+    def test_exact_and_prefix_search(self):
+        self.assertEqual(self.search(Student, 'student'), [self.student])
+        self.assertEqual(self.search(Student, 'STUDENT'), [])
+        self.assertEqual(self.search(Major, '01.01.01'), [self.major])
+        self.assertEqual(self.search(Lecture, 'LECT'), [self.lecture])
+        self.assertEqual(self.search(QuestionSection, str(self.evaluation_test.pk)), self.sections)
+
+    def test_word_against_id_fields(self):
+        self.assertEqual(self.search(QuestionSection, 'question'), [])
+        self.assertEqual(self.search(StudentResult, 'student'), [])
+
+    def test_prefix_search_fields_are_indexed(self):
+        for model in (Chair, Department, Program, Major, Student, StudyGroup, Course, Module, Lecture, Practice,
+                      EvaluationTest):
+            for search_field in site._registry[model].search_fields:
+                if search_field.startswith('^'):
+                    # Inherited fields are indexed on the parent table.
+                    indexes = model._meta.get_field(search_field[1:]).model._meta.indexes
+                    expressions = [str(expression) for index in indexes for expression in index.expressions]
+
+                    self.assertIn(f"OpClass(Upper(F({search_field[1:]})), name=text_pattern_ops)", expressions)
+
+    def test_large_tables_have_no_date_hierarchy(self):
+        for model in (Lecture, Practice, EvaluationTest):
+            self.assertIsNone(site._registry[model].date_hierarchy)
+
+
+    def test_answer_signature_rows_are_rendered_from_one_query(self):
+        student_result = StudentResult.objects.create(student=self.student, practice=self.practice, is_completed=True)
+        AnswerSignature.objects.create(student_result=student_result, practice=self.practice, student=self.student,
+                                       signature=b'')
+        model_admin = site._registry[AnswerSignature]
+        request = RequestFactory().get('/')
+
+        with self.assertNumQueries(1):
+            for answer_signature in model_admin.get_queryset(request).select_related(*model_admin.list_select_related):
+                [str(getattr(answer_signature, field)) for field in model_admin.list_display]
+
+class CourseCloneTest(SdoTestCase):
+    def test_clone_copies_the_tree_and_shares_blobs(self):
+        blob_names = [self.course.evaluation_criteria.name, self.lecture.materials.name,
+                      self.practice.description.name]
+        ref_counts = dict(FileBlob.objects.filter(name__in=blob_names).values_list('name', 'ref_count'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            clone = CourseService().clone(self.course.pk, {'title': 'clone', 'deadline_shift': 7})
+
+        module = clone.modules.get()
+        lecture = Lecture.objects.get(module=module)
+        sections = QuestionSection.objects.filter(evaluation_test=module.evaluation_test)
+
+        self.assertNotEqual(module.pk, self.module.pk)
+        self.assertEqual(lecture.materials.name, self.lecture.materials.name)
+        self.assertEqual(lecture.deadline_date, self.deadline + datetime.timedelta(days=7))
+        self.assertNotEqual(module.practice_id, self.practice.pk)
+        self.assertEqual(sections.count(), 3)
+        self.assertEqual(QuestionAnswers.objects.filter(question_section__in=sections, is_correct=True).count(), 3)
+        self.assertEqual(dict(FileBlob.objects.filter(name__in=blob_names).values_list('name', 'ref_count')),
+                         {name: ref_count + 1 for name, ref_count in ref_counts.items()})
+        self.assertTrue(BackgroundJob.objects.filter(name='course.index', payload__course=clone.pk).exists())
+
+    def test_clone_route(self):
+        self.authorize(self.teacher_token)
+
+        response = self.client.post(f'/api/courses/?clone={self.course.pk}', {'title': 'clone'})
+
+        self.assertEqual(response.json()['data']['title'], 'clone')
+        self.assertEqual(self.client.post('/api/courses/?clone=course', {}).status_code, 400)
+        self.assertEqual(self.client.post(f'/api/courses/?clone={self.course.pk}',
+                                          {'deadline_shift': 'week'}).status_code, 400)
+
+
+class LectureProgressTest(SdoTestCase):
+    def test_student_marks_lecture_read(self):
+        self.authorize(self.student_token)
+
+        self.assertEqual(self.client.post('/api/lecture_progress/', {'lecture': self.lecture.pk}).json()['courses'],
+                         [self.course.pk])
+
+        progress = self.client.get('/api/lecture_progress/', {'course': self.course.pk}).json()['data']
+
+        self.assertEqual((progress['student'], progress['read'], progress['total'], progress['read_lectures']),
+                         (self.student.pk, 1, 1, [self.lecture.pk]))
+
+    def test_teacher_sees_course_and_student_progress(self):
+        LectureProgressService().mark_read(self.student.pk, self.lecture.pk)
+        self.authorize(self.teacher_token)
+
+        course_progress = self.client.get('/api/lecture_progress/', {'course': self.course.pk}).json()['data']
+        student_progress = self.client.get('/api/lecture_progress/', {'course': self.course.pk,
+                                                                      'student': self.student.pk}).json()['data']
+
+        self.assertEqual(course_progress['students'], [{'student': self.student.pk, 'read': 1, 'completion': 1.0}])
+        self.assertEqual(student_progress['read_lectures'], [self.lecture.pk])
+
+    def test_non_numeric_ids(self):
+        self.authorize(self.teacher_token)
+
+        self.assertEqual(self.client.get('/api/lecture_progress/', {'course': self.course.pk,
+                                                                    'student': 'me'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/lecture_progress/', {'course': 'course'}).status_code, 400)
+
+        self.authorize(self.student_token)
+
+        self.assertEqual(self.client.post('/api/lecture_progress/', {'lecture': 'lecture'}).status_code, 400)
+        self.assertEqual(self.client.post('/api/lecture_progress/', {}).json()['code'], 404)
+
+
+@override_settings(CHANGE_FEED_VISIBILITY_DELAY=-60)
+class ChangeFeedTest(SdoTestCase):
+    def get_changes(self) -> dict:
+        return {(change['model'], change['object_id']): change['data'] for change in ChangeFeedService().stream(0, 100)}
+
+    def test_feed_leaves_out_answer_keys(self):
+        answer = self.correct_answers[0]
+        QuestionAnswersService().update(answer.pk, {'question_section': answer.question_section_id, 'answer': 'yes',
+                                                    'is_correct': True, 'score': 2.0})
+        EvaluationTestService().update(self.evaluation_test.pk, {'title': 'renamed'})
+
+        changes = self.get_changes()
+
+        self.assertEqual(changes[('questionanswers', answer.pk)],
+                         {'id': answer.pk, 'question_section': answer.question_section_id, 'answer': 'yes'})
+        self.assertEqual(changes[('evaluationtest', self.evaluation_test.pk)]['title'], 'renamed')
+        self.assertNotIn('answers', changes[('evaluationtest', self.evaluation_test.pk)])
+
+    def test_every_feed_model_is_hydrated(self):
+        ChangeFeedService().record(Student, ChangeRecord.Operation.UPDATED, [self.student.pk])
+        ChangeFeedService().record(Teacher, ChangeRecord.Operation.UPDATED, [self.teacher.pk])
+
+        changes = self.get_changes()
+
+        self.assertEqual(changes[('student', self.student.pk)]['email'], 'student@example.com')
+        self.assertEqual(changes[('teacher', self.teacher.pk)]['department'], self.department.pk)
+
+
+class IdempotencyTest(SdoTestCase):
+    def execute(self, handler=lambda: (200, {'done': True})) -> tuple:
+        return IdempotencyService().execute(self.student.user_id, 'key', 'fingerprint', handler)
+
+    def test_response_is_replayed_for_the_ttl(self):
+        self.assertEqual(self.execute(), (None, 200, {'done': True}))
+        self.assertEqual(self.execute(lambda: self.fail('handler ran twice')), (None, 200, {'done': True}))
+        self.assertGreater(IdempotentResponse.objects.get().expires_at,
+                           timezone.now() + datetime.timedelta(seconds=IdempotencyService.ttl() - 60))
+
+    def test_unfinished_request_holds_the_key_for_its_lease(self):
+        IdempotentResponse.objects.create(user=self.student.user, key='key', fingerprint='fingerprint',
+                                          expires_at=timezone.now() + datetime.timedelta(seconds=60))
+
+        self.assertEqual(self.execute(), (IdempotencyService.IN_PROGRESS, 409, {}))
+
+    def test_abandoned_placeholder_is_reclaimed(self):
+        IdempotentResponse.objects.create(user=self.student.user, key='key', fingerprint='fingerprint',
+                                          expires_at=timezone.now() - datetime.timedelta(seconds=1))
+
+        self.assertEqual(self.execute(), (None, 200, {'done': True}))
+        self.assertEqual(IdempotentResponse.objects.get().status_code, 200)
+
+    def test_failed_request_releases_the_key(self):
+        with self.assertRaises(RuntimeError):
+            self.execute(mock.Mock(side_effect=RuntimeError))
+
+        self.assertFalse(IdempotentResponse.objects.exists())
+
+
+class LectureMaterialsTest(SdoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.asset_dir = LectureMaterialsService.get_asset_dir(self.lecture)
+        self.asset_name = f'{self.asset_dir}/diagram.png'
+        FileSystemStorage(location=MEDIA_ROOT).save(self.asset_name, SimpleUploadedFile('diagram.png', b'png'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LectureService().update(self.lecture.pk, {
+                'materials': SimpleUploadedFile('lecture.md', b'![diagram](diagram.png) [missing](missing.png)')})
+
+    def get_materials(self, token: str):
+        self.authorize(token)
+        return self.client.get('/api/lectures/materials/', {'id': self.lecture.pk})
+
+    def test_assets_resolve_against_the_lecture_directory(self):
+        self.assertTrue(self.asset_dir.startswith(f'courses/{self.course}/'))
+
+        materials = json.loads(b''.join(self.get_materials(self.student_token).streaming_content))
+
+        self.assertEqual([asset['name'] for asset in materials['assets']], [self.asset_name])
+        self.assertIn(f'src="{materials["assets"][0]["url"]}"', materials['html'])
+        self.assertIn('href="missing.png"', materials['html'])
+        self.assertEqual(self.client.get(materials['assets'][0]['url']).status_code, 200)
+
+    def test_new_asset_invalidates_the_manifest(self):
+        version = self.get_materials(self.student_token)['ETag']
+        FileSystemStorage(location=MEDIA_ROOT).save(f'{self.asset_dir}/missing.png',
+                                                    SimpleUploadedFile('missing.png', b'png'))
+        os.utime(content_addressed_storage.path(self.asset_dir), (0, time.time() + 10))
+
+        self.assertNotEqual(self.get_materials(self.student_token)['ETag'], version)
+
+
+class NearDuplicatesTest(SdoTestCase):
+    ANSWER = ' '.join(f'step {number} computes the partial sum of the series and stores it' for number in range(20))
+
+    def submit(self, student: Student, answer_text: str) -> StudentResult:
+        student_result = StudentResult.objects.create(student=student, practice=self.practice, attempt=1,
+                                                      answer_text=answer_text)
+        SimilarityService().index([student_result.pk])
+        return student_result
+
+    def get_near_duplicates(self, **params):
+        self.authorize(self.teacher_token)
+        return self.client.get('/api/near_duplicates/', {'practice': self.practice.pk, **params})
+
+    def test_copied_answers_are_clustered(self):
+        copied = [self.submit(self.student, self.ANSWER), self.submit(self.outsider, self.ANSWER + ' done')]
+        self.submit(self.outsider, 'an unrelated answer written from scratch about something else entirely')
+
+        clusters = self.get_near_duplicates().json()['clusters']
+
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0]['students'], sorted([self.student.pk, self.outsider.pk]))
+        self.assertEqual(clusters[0]['student_results'], [student_result.pk for student_result in copied])
+
+    def test_new_signature_refreshes_cached_clusters(self):
+        self.submit(self.student, self.ANSWER)
+
+        self.assertEqual(self.get_near_duplicates().json()['clusters'], [])
+
+        self.submit(self.outsider, self.ANSWER)
+
+        self.assertEqual(len(self.get_near_duplicates().json()['clusters']), 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get_near_duplicates(threshold=2).status_code, 400)
+        self.assertEqual(self.get_near_duplicates(threshold='high').status_code, 400)
+        self.assertEqual(self.get_near_duplicates(practice='practice').status_code, 400)
+
+        self.authorize(self.student_token)
+
+        self.assertEqual(self.client.get('/api/near_duplicates/', {'practice': self.practice.pk}).status_code, 403)
+
+
+class DeadlineReminderTest(SdoTestCase):
+    def test_enrolled_students_get_one_digest(self):
+        self.assertEqual(DeadlineReminderService().send(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['student@example.com'])
+        self.assertEqual(mail.outbox[0].subject, 'Приближаются сроки: 3')
+
+        for title in ('lecture', 'practice', 'test'):
+            self.assertIn(f'«{title}»', mail.outbox[0].body)
+
+    def test_completed_tasks_are_left_out(self):
+        StudentResult.objects.create(student=self.student, evaluation_test=self.evaluation_test, attempt=1,
+                                     is_completed=True)
+
+        reminders = DeadlineReminderService().get_reminders(timezone.localdate())
+
+        self.assertEqual([(deadline['kind'], deadline['courses']) for deadline in reminders[0]['deadlines']],
+                         [('lecture', ['course']), ('practice', ['course'])])
+
+    def test_queries_do_not_grow_with_students(self):
+        day = timezone.localdate()
+
+        with self.assertNumQueries(9):
+            DeadlineReminderService().get_reminders(day)
+
+        for number in range(5):
+            user = User.objects.create_user(f'student{number}', f'student{number}@example.com')
+            student = Student.objects.create(user=user, first_name='S', middle_name='S', last_name='S')
+            self.study_group.students.add(student)
+
+        with self.assertNumQueries(9):
+            self.assertEqual(len(DeadlineReminderService().get_reminders(day)), 6)
+
+    def test_other_days_and_dry_run(self):
+        self.assertEqual(DeadlineReminderService().send(self.deadline), 0)
+        self.assertEqual(DeadlineReminderService().send(dry_run=True), 1)
+        self.assertEqual(mail.outbox, [])
+
+
+class OrgHierarchyTest(SdoTestCase):
+    def setUp(self):
+        super().setUp()
+        OrgHierarchyService().rebuild()
+
+    def get_course_ids(self, model_name: str, pk: int) -> list[int]:
+        return list(OrgHierarchyService().get_descendant_ids(model_name, pk, 'course')
+                    .values_list('descendant_id', flat=True))
+
+    def test_rebuild_links_every_level(self):
+        for model_name, pk in (('chair', self.chair.pk), ('department', self.department.pk),
+                               ('program', self.program.pk), ('major', self.major.pk),
+                               ('studygroup', self.study_group.pk)):
+            self.assertEqual(self.get_course_ids(model_name, pk), [self.course.pk])
+
+        self.assertEqual(OrgHierarchy.objects.get(ancestor_model='chair', descendant_model='major').depth, 3)
+
+    def test_major_programs_are_set(self):
+        chair = ChairService().create({'name': 'other chair'})
+        department = DepartmentService().create({'name': 'other department', 'chair': chair.pk})
+        program = ProgramService().create({'name': 'other program', 'department': department.pk})
+
+        major = MajorService().create({'name': 'new major', 'code': '02.02.02', 'programs': [self.program.pk]})
+        MajorService().update(str(self.major.pk), {'programs': [program.pk]})
+
+        self.assertEqual(list(self.major.programs.all()), [program])
+        self.assertEqual(self.get_course_ids('chair', chair.pk), [self.course.pk])
+        self.assertEqual(self.get_course_ids('chair', self.chair.pk), [])
+        self.assertFalse(OrgHierarchy.objects.filter(ancestor_model='program', ancestor_id=self.program.pk,
+                                                     descendant_model='major', descendant_id=self.major.pk).exists())
+        self.assertTrue(OrgHierarchy.objects.filter(ancestor_model='chair', ancestor_id=self.chair.pk,
+                                                    descendant_model='major', descendant_id=major.pk).exists())
+
+    def test_rollup(self):
+        self.authorize(self.teacher_token)
+
+        rollup = self.client.get('/api/analytics/', {'chair': self.chair.pk}).json()['data']
+
+        self.assertEqual(([course['id'] for course in rollup['courses']], rollup['study_groups'], rollup['students']),
+                         ([self.course.pk], 1, 1))
+        self.assertEqual(self.client.get('/api/analytics/', {'chair': 'chair'}).status_code, 400)
+
+
+class DetailValidatorsTest(SdoTestCase):
+    def get_etag(self, path: str) -> str:
+        self.authorize(self.teacher_token)
+        return self.client.get(path)['ETag']
+
+    def test_unchanged_object_is_not_modified(self):
+        etag = self.get_etag(f'/api/modules/{self.module.pk}/')
+
+        self.assertEqual(self.client.get(f'/api/modules/{self.module.pk}/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_module_changes_with_its_lectures(self):
+        etag = self.get_etag(f'/api/modules/{self.module.pk}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LectureService().update(self.lecture.pk, {'title': 'renamed'})
+
+        self.assertNotEqual(self.get_etag(f'/api/modules/{self.module.pk}/'), etag)
+
+    def test_many_to_many_changes(self):
+        course_etag = self.get_etag(f'/api/courses/{self.course.pk}/')
+        study_group_etag = self.get_etag(f'/api/study_groups/{self.study_group.pk}/')
+        major_etag = self.get_etag(f'/api/majors/{self.major.pk}/')
+
+        other_group = StudyGroup.objects.create(name='other group', major=self.major, education_degree='BC')
+        self.course.members.set([other_group])
+        self.study_group.students.set([self.outsider])
+        self.major.programs.set([Program.objects.create(name='other program', department=self.department)])
+
+        self.assertNotEqual(self.get_etag(f'/api/courses/{self.course.pk}/'), course_etag)
+        self.assertNotEqual(self.get_etag(f'/api/study_groups/{self.study_group.pk}/'), study_group_etag)
+        self.assertNotEqual(self.get_etag(f'/api/majors/{self.major.pk}/'), major_etag)
@@ -3,37 +3,55 @@ from django.urls import re_path
 from sdo_app.views import (ChairAPIView, SubjectAPIView, DepartmentAPIView, ProgramAPIView, MajorAPIView,
                            StudentAPIView, TeacherAPIView, StudyGroupAPIView, StudentResultAPIView,
                            EvaluationTestAPIView, QuestionAnswersAPIView, QuestionSectionAPIView, CourseAPIView,
-                           LectureAPIView, ModuleAPIView)
+                           LectureAPIView, ModuleAPIView, MediaAPIView, ExamSessionAPIView, PracticeAPIView,
+                           BackgroundJobAPIView, PublishedTestAPIView, SearchAPIView,
+                           AnalyticsAPIView, DashboardAPIView, LectureMaterialsAPIView, LectureProgressAPIView,
+                           ChangeFeedAPIView, NearDuplicatesAPIView)
 
 urlpatterns = [
+    re_path(r'^chairs/(?P<id>\d+)/?$', ChairAPIView.as_view(), name='chair-detail'),
     re_path(r'^chairs/', ChairAPIView.as_view(), name='chair-list'),
-    re_path(r'^chairs/<id:int>', ChairAPIView.as_view(), name='chair-detail'),
+    re_path(r'^courses/(?P<id>\d+)/?$', CourseAPIView.as_view(), name='course-detail'),
     re_path(r'^courses/', CourseAPIView.as_view(), name='course-list'),
-    re_path(r'^courses/<id:int>', CourseAPIView.as_view(), name='course-detail'),
+    re_path(r'^subjects/(?P<id>\d+)/?$', SubjectAPIView.as_view(), name='subject-detail'),
     re_path(r'^subjects/', SubjectAPIView.as_view(), name='subject-list'),
-    re_path(r'^subjects/<id:int>', SubjectAPIView.as_view(), name='subject-detail'),
+    re_path(r'^departments/(?P<id>\d+)/?$', DepartmentAPIView.as_view(), name='department-detail'),
     re_path(r'^departments/', DepartmentAPIView.as_view(), name='department-list'),
-    re_path(r'^departments/<id:int>', DepartmentAPIView.as_view(), name='department-detail'),
+    re_path(r'^programs/(?P<id>\d+)/?$', ProgramAPIView.as_view(), name='program-detail'),
     re_path(r'^programs/', ProgramAPIView.as_view(), name='program-list'),
-    re_path(r'^programs/<id:int>', ProgramAPIView.as_view(), name='program-detail'),
+    re_path(r'^majors/(?P<id>\d+)/?$', MajorAPIView.as_view(), name='major-detail'),
     re_path(r'^majors/', MajorAPIView.as_view(), name='major-list'),
-    re_path(r'^majors/<id:int>', MajorAPIView.as_view(), name='major-detail'),
+    re_path(r'^modules/(?P<id>\d+)/?$', ModuleAPIView.as_view(), name='module-detail'),
     re_path(r'^modules/', ModuleAPIView.as_view(), name='module-list'),
-    re_path(r'^modules/<id:int>', ModuleAPIView.as_view(), name='module-detail'),
+    re_path(r'^students/(?P<id>\d+)/?$', StudentAPIView.as_view(), name='student-detail'),
     re_path(r'^students/', StudentAPIView.as_view(), name='student-list'),
-    re_path(r'^students/<id:int>', StudentAPIView.as_view(), name='student-detail'),
+    re_path(r'^teachers/(?P<id>\d+)/?$', TeacherAPIView.as_view(), name='teacher-detail'),
     re_path(r'^teachers/', TeacherAPIView.as_view(), name='teacher-list'),
-    re_path(r'^teachers/<id:int>', TeacherAPIView.as_view(), name='teacher-detail'),
+    re_path(r'^study_groups/(?P<id>\d+)/?$', StudyGroupAPIView.as_view(), name='study-group-detail'),
     re_path(r'^study_groups/', StudyGroupAPIView.as_view(), name='study-group-list'),
-    re_path(r'^study_groups/<id:int>', StudyGroupAPIView.as_view(), name='study-group-detail'),
+    re_path(r'^student_results/(?P<id>\d+)/?$', StudentResultAPIView.as_view(), name='student-result-detail'),
     re_path(r'^student_results/', StudentResultAPIView.as_view(), name='student-result-list'),
-    re_path(r'^student_results/<id:int>', StudentResultAPIView.as_view(), name='student-result-detail'),
+    re_path(r'^e_tests/published/', PublishedTestAPIView.as_view(), name='published-test'),
+    re_path(r'^e_tests/(?P<id>\d+)/?$', EvaluationTestAPIView.as_view(), name='evaluation-test-detail'),
     re_path(r'^e_tests/', EvaluationTestAPIView.as_view(), name='evaluation-test-list'),
-    re_path(r'^e_tests/<id:int>', EvaluationTestAPIView.as_view(), name='evaluation-test-detail'),
+    re_path(r'^lectures/materials/', LectureMaterialsAPIView.as_view(), name='lecture-materials'),
+    re_path(r'^lectures/(?P<id>\d+)/?$', LectureAPIView.as_view(), name='lecture-detail'),
     re_path(r'^lectures/', LectureAPIView.as_view(), name='lecture-list'),
-    re_path(r'^lectures/<id:int>', LectureAPIView.as_view(), name='lecture-detail'),
+    re_path(r'^questions/(?P<id>\d+)/?$', QuestionSectionAPIView.as_view(), name='question-section-detail'),
     re_path(r'^questions/', QuestionSectionAPIView.as_view(), name='question-section-list'),
-    re_path(r'^questions/<id:int>', QuestionSectionAPIView.as_view(), name='question-section-detail'),
+    re_path(r'^answers/(?P<id>\d+)/?$', QuestionAnswersAPIView.as_view(), name='question-answer-detail'),
     re_path(r'^answers/', QuestionAnswersAPIView.as_view(), name='question-answer-list'),
-    re_path(r'^answers/<id:int>', QuestionAnswersAPIView.as_view(), name='question-answer-detail')
+    re_path(r'^media/(?P<path>.+)$', MediaAPIView.as_view(), name='media'),
+    re_path(r'^practices/(?P<id>\d+)/?$', PracticeAPIView.as_view(), name='practice-detail'),
+    re_path(r'^practices/', PracticeAPIView.as_view(), name='practice-list'),
+    re_path(r'^exam_sessions/(?P<id>\d+)/?$', ExamSessionAPIView.as_view(), name='exam-session-detail'),
+    re_path(r'^exam_sessions/', ExamSessionAPIView.as_view(), name='exam-session-list'),
+    re_path(r'^jobs/(?P<id>\d+)/?$', BackgroundJobAPIView.as_view(), name='background-job-detail'),
+    re_path(r'^jobs/', BackgroundJobAPIView.as_view(), name='background-job-list'),
+    re_path(r'^search/', SearchAPIView.as_view(), name='search'),
+    re_path(r'^analytics/', AnalyticsAPIView.as_view(), name='analytics'),
+    re_path(r'^dashboard/', DashboardAPIView.as_view(), name='dashboard'),
+    re_path(r'^lecture_progress/', LectureProgressAPIView.as_view(), name='lecture-progress'),
+    re_path(r'^changes/', ChangeFeedAPIView.as_view(), name='changes'),
+    re_path(r'^near_duplicates/', NearDuplicatesAPIView.as_view(), name='near-duplicates'),
 ]
@@ -1,3 +1,7 @@
+from array import array
+from typing import Dict, List, Tuple
+
+
 def course_dir_path(instance, filename) -> str:
     module = instance.module
     course = module.course_modules.all()[0]
@@ -31,3 +35,57 @@ def question_file_path(instance, filename) -> str:
 
 def eval_criteria_file_path(instance, filename) -> str:
     return f'courses/{instance}/{filename}'
+
+
+def pack_question_scores(question_scores: Dict[int, float]) -> bytes:
+    question_section_ids = array('q', question_scores.keys())
+    scores = array('d', question_scores.values())
+    return len(question_section_ids).to_bytes(4, 'little') + question_section_ids.tobytes() + scores.tobytes()
+
+
+def unpack_question_scores(packed: bytes | memoryview | None) -> Dict[int, float]:
+    if not packed:
+        return {}
+
+    packed = bytes(packed)
+    count: int = int.from_bytes(packed[:4], 'little')
+    question_section_ids = array('q', packed[4:4 + count * 8])
+    scores = array('d', packed[4 + count * 8:4 + count * 16])
+    return dict(zip(question_section_ids, scores))
+
+
+def pack_chosen_answers(chosen_answers: List[Tuple[int, int]]) -> bytes:
+    return array('q', [item for pair in chosen_answers for item in pair]).tobytes()
+
+
+def unpack_chosen_answers(packed: bytes | memoryview | None) -> List[Tuple[int, int]]:
+    if not packed:
+        return []
+
+    items = array('q', bytes(packed))
+    return list(zip(items[::2], items[1::2]))
+
+
+def set_bit(bitmap: bytes | memoryview, position: int) -> bytes:
+    bits = bytearray(bitmap)
+
+    if len(bits) <= position // 8:
+        bits.extend(bytes(position // 8 + 1 - len(bits)))
+
+    bits[position // 8] |= 1 << position % 8
+    return bytes(bits)
+
+
+def bitmap_to_int(bitmap: bytes | memoryview | None) -> int:
+    return int.from_bytes(bytes(bitmap or b''), 'little')
+
+
+def parse_id(value) -> int | None:
+    # Ids arrive from request bodies as numbers or numeric strings, anything else (null, '', true) is not an id.
+    if isinstance(value, bool):
+        return None
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
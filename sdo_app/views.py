@@ -1,7 +1,13 @@
-from typing import List, Type
+import gzip
+import json
+from datetime import datetime
+from typing import Callable, List, Type
 
 from django.db import transaction, IntegrityError
-from django.http import JsonResponse, QueryDict
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (FileResponse, HttpResponse, HttpResponseNotModified, JsonResponse, QueryDict,
+                         StreamingHttpResponse)
+from django.utils.http import http_date, parse_etags, quote_etag
 from rest_framework import status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken.models import Token
@@ -10,10 +16,41 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.request import Request
 from rest_framework.serializers import ModelSerializer
 from rest_framework.views import APIView
+from .media import is_not_modified, serve_file
 from .services import (ChairService, CourseService, DepartmentService, EvaluationTestService, LectureService,
-                       MajorService, ModuleService, PersonService, ProgramService, PracticeService, SubjectService,
+                       MajorService, MediaService, ModuleService, ExamSessionService, BackgroundJobService,
+                       PublishedTestService, SearchService, AnalyticsService, DashboardService, EnrollmentService,
+                       LectureMaterialsService, LectureProgressService, ChangeFeedService, IdempotencyService,
+                       OrgHierarchyService, PersonService, ProgramService, PracticeService, SimilarityService,
+                       SubjectService,
                        StudentResultService, StudyGroupService, StudentService, TeacherService, QuestionSectionService,
                        QuestionAnswersService, BaseService)
+from .utils import parse_id
+
+
+def idempotent_response(request: Request, scope: str, handler: Callable[[], dict],
+                        status_code: int = status.HTTP_200_OK) -> JsonResponse:
+    # Retries carrying the same Idempotency-Key get the stored response back instead of being checked again.
+    idempotency_key: str | None = request.headers.get('Idempotency-Key', None)
+
+    if not idempotency_key or not request.user.is_authenticated:
+        return JsonResponse(handler(), status=status_code)
+
+    if len(idempotency_key) > 255:
+        return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+    idempotency_service = IdempotencyService()
+    error, status_code, response = idempotency_service.execute(
+        request.user.pk, idempotency_key,
+        idempotency_service.fingerprint(scope, request.data),
+        lambda: (status_code, handler()))
+
+    if error is not None:
+        return JsonResponse({'code': status_code, 'error': error}, status=status_code)
+
+    json_response = JsonResponse(response, status=status_code)
+    json_response['Idempotency-Key'] = idempotency_key
+    return json_response
 
 
 class BaseAPIView(APIView):
@@ -21,14 +58,40 @@ class BaseAPIView(APIView):
         self.__model_service__: BaseService = service()
         super().__init__(*args, **kwargs)
 
-    def get(self, request: Request) -> JsonResponse:
+    def dispatch(self, request, *args, **kwargs):
+        # Detail routes carry the id in the path, handlers keep reading it from the query string as with ?id=.
+        model_id: str | None = kwargs.pop('id', None)
+
+        if model_id is not None:
+            request.GET = request.GET.copy()
+            request.GET['id'] = model_id
+
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request: Request) -> HttpResponse:
         model_id: int | None = request.query_params.get('id', None)
 
         if model_id:
             model_obj = self.__model_service__.get(pk=model_id)
             if model_obj is None:
                 return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
-            return JsonResponse(self.__model_service__.serializer(model_obj).data, safe=False)
+
+            validators: tuple[datetime, str] | None = self.__model_service__.get_validators(model_obj)
+
+            if validators is None:
+                return JsonResponse(self.__model_service__.serializer(model_obj).data, safe=False)
+
+            last_modified, etag = validators[0].timestamp(), quote_etag(validators[1])
+
+            if is_not_modified(request, etag, last_modified):
+                response = HttpResponseNotModified()
+            else:
+                response = JsonResponse(self.__model_service__.serializer(model_obj).data, safe=False)
+
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            response['Cache-Control'] = 'private, no-cache'
+            return response
 
         return JsonResponse(self.__model_service__.list(), safe=False)
 
@@ -153,9 +216,27 @@ class EvaluationTestAPIView(BaseAPIView):
             student_id: int = request.data['student']
             answers: list = request.data['answers']
 
-            return JsonResponse({'code': status.HTTP_200_OK,
-                                 'student_score': EvaluationTestService().check(student_id, evaluation_test_id,
-                                                                                answers)})
+            if request.query_params.get('async', None):
+                idempotency_key: str | None = request.headers.get('Idempotency-Key', None)
+
+                def enqueue() -> dict:
+                    # The job key also dedupes a retry whose stored response was lost with a dead worker's lease; the
+                    # client key is hashed with the payload, so it fits the column and a changed body gets a new job.
+                    job_key: str | None = f'evaluation_test.check:{request.user.pk}:{evaluation_test_id}:' \
+                        f'{IdempotencyService.fingerprint(idempotency_key, request.data)}' \
+                        if idempotency_key and request.user.is_authenticated else None
+                    background_job = BackgroundJobService().enqueue(
+                        'evaluation_test.check',
+                        {'student': student_id, 'evaluation_test': evaluation_test_id, 'answers': answers}, job_key)
+                    return {'code': status.HTTP_202_ACCEPTED, 'job_id': background_job.pk}
+
+                return idempotent_response(request, f'evaluation_test.check.async:{evaluation_test_id}', enqueue,
+                                           status.HTTP_202_ACCEPTED)
+
+            return idempotent_response(
+                request, f'evaluation_test.check:{evaluation_test_id}',
+                lambda: {'code': status.HTTP_200_OK,
+                         'student_score': EvaluationTestService().check(student_id, evaluation_test_id, answers)})
 
         question_sections: list = data.pop('question_sections', [])
 
@@ -186,7 +267,7 @@ class EvaluationTestAPIView(BaseAPIView):
         if request.data.get('question', None):
             evaluation_test_id: int = request.query_params.get('id')
 
-            if StudentResultService().get_by(evaluation_test_id=evaluation_test_id) is None:
+            if not evaluation_test_id:
                 return JsonResponse({'code': status.HTTP_400_BAD_REQUEST})
 
             question_data: dict | list = request.data['question']
@@ -208,6 +289,85 @@ class EvaluationTestAPIView(BaseAPIView):
         return super().patch(request)
 
 
+class ExamSessionAPIView(BaseAPIView):
+    def __init__(self, *args, **kwargs):
+        super().__init__(ExamSessionService)
+
+    def post(self, request: Request) -> JsonResponse:
+        if request.query_params.get('id', None):
+            exam_session_id: int = request.query_params['id']
+
+            if not ExamSessionService().is_exist(exam_session_id):
+                return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+            exam_session = ExamSessionService().finish(exam_session_id)
+
+            return JsonResponse({'code': status.HTTP_200_OK,
+                                 'student_score': exam_session.student_result.score
+                                 if exam_session.student_result else None,
+                                 'exam_session': ExamSessionService().to_serialize(exam_session)})
+
+        exam_session = ExamSessionService().start(request.data)
+
+        return JsonResponse({'code': status.HTTP_201_CREATED,
+                             'exam_session': ExamSessionService().to_serialize(exam_session)})
+
+    def patch(self, request: Request) -> JsonResponse:
+        exam_session_id: int | None = request.query_params.get('id', None)
+
+        if not ExamSessionService().is_exist(exam_session_id):
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+        exam_session = ExamSessionService().autosave(exam_session_id, request.data.get('answers', []))
+
+        return JsonResponse({'code': status.HTTP_200_OK, 'expires_at': exam_session.expires_at})
+
+
+class PublishedTestAPIView(APIView):
+    def get(self, request: Request) -> HttpResponse:
+        try:
+            evaluation_test_id: int | None = int(request.query_params['id']) \
+                if request.query_params.get('id') else None
+            version: int | None = int(request.query_params['version']) \
+                if request.query_params.get('version') else None
+            student_id: int | None = int(request.query_params['student']) \
+                if request.query_params.get('student') else None
+        except ValueError:
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not EvaluationTestService().is_exist(evaluation_test_id):
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND}, status=status.HTTP_404_NOT_FOUND)
+
+        snapshot: dict | None = PublishedTestService().get_version(evaluation_test_id, version) \
+            if version is not None else PublishedTestService().get_latest(evaluation_test_id)
+
+        if snapshot is None:
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND}, status=status.HTTP_404_NOT_FOUND)
+
+        etag: str = quote_etag(f'{snapshot["etag"]}-{student_id}' if student_id is not None else snapshot['etag'])
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        elif student_id is not None:
+            published_test_service = PublishedTestService()
+            payload: dict = published_test_service.shuffle(
+                published_test_service.get_payload(evaluation_test_id, snapshot),
+                published_test_service.shuffle_seed(student_id, evaluation_test_id, snapshot['version']))
+            response = JsonResponse(payload, json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(snapshot['payload'], content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(snapshot['payload']), content_type='application/json')
+
+        response['ETag'] = etag
+        response['X-Test-Version'] = str(snapshot['version'])
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = 'private, max-age=31536000, immutable' if version is not None \
+            else 'private, max-age=0, must-revalidate'
+        return response
+
+
 class PracticeAPIView(BaseAPIView):
     def __init__(self, *args, **kwargs):
         super().__init__(PracticeService)
@@ -218,13 +378,52 @@ class PracticeAPIView(BaseAPIView):
             student_id: int = request.data['student']
             score: float = request.data['score']
 
-            PracticeService().check(student_id, practice_id, score)
+            def check() -> dict:
+                PracticeService().check(student_id, practice_id, score)
+                return {'code': status.HTTP_200_OK}
 
-            return JsonResponse({'code': status.HTTP_200_OK})
+            return idempotent_response(request, f'practice.check:{practice_id}', check)
 
         return super().post(request)
 
 
+class LectureMaterialsAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request) -> HttpResponse:
+        lecture_id: str | None = request.query_params.get('id', None)
+        version: str | None = request.query_params.get('version', None)
+
+        if not LectureService().is_exist(lecture_id):
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND}, status=status.HTTP_404_NOT_FOUND)
+
+        lecture = LectureService().get(lecture_id)
+
+        if not MediaService().has_access(request.user, lecture.materials.name):
+            return JsonResponse({'code': status.HTTP_403_FORBIDDEN}, status=status.HTTP_403_FORBIDDEN)
+
+        rendered: dict | None = LectureMaterialsService().render_lecture(lecture)
+
+        if rendered is None:
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND}, status=status.HTTP_404_NOT_FOUND)
+
+        etag: str = quote_etag(rendered['version'])
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = FileResponse(open(rendered['gzip_path'], 'rb'), content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = FileResponse(open(rendered['path'], 'rb'), content_type='application/json')
+
+        response['ETag'] = etag
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = 'private, max-age=31536000, immutable' if version == rendered['version'] \
+            else 'private, max-age=0, must-revalidate'
+        return response
+
+
 class LectureAPIView(BaseAPIView):
     def __init__(self, *args, **kwargs):
         super().__init__(LectureService)
@@ -238,3 +437,247 @@ class ModuleAPIView(BaseAPIView):
 class CourseAPIView(BaseAPIView):
     def __init__(self, *args, **kwargs):
         super().__init__(CourseService)
+
+    def post(self, request: Request) -> JsonResponse:
+        if request.query_params.get('clone', None) is None:
+            return super().post(request)
+
+        try:
+            source_id: int = int(request.query_params['clone'])
+            int(request.data.get('deadline_shift', 0))
+        except (TypeError, ValueError):
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not CourseService().is_exist(source_id):
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+        if request.query_params.get('async', None):
+            background_job = BackgroundJobService().enqueue('course.clone',
+                                                            {'course': source_id, 'data': {**request.data}})
+
+            return JsonResponse({'code': status.HTTP_202_ACCEPTED, 'job_id': background_job.pk},
+                                status=status.HTTP_202_ACCEPTED)
+
+        course = CourseService().clone(source_id, request.data)
+        return JsonResponse({'code': status.HTTP_201_CREATED, 'data': CourseService().to_serialize(course)})
+
+    def delete(self, request: Request) -> JsonResponse:
+        if request.query_params.get('async', None):
+            course_id: int | None = request.query_params.get('id', None)
+
+            if not CourseService().is_exist(course_id):
+                return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+            background_job = BackgroundJobService().enqueue('course.delete',
+                                                            {'course': course_id, 'data': {**request.data}})
+
+            return JsonResponse({'code': status.HTTP_202_ACCEPTED, 'job_id': background_job.pk},
+                                status=status.HTTP_202_ACCEPTED)
+
+        return super().delete(request)
+
+
+class BackgroundJobAPIView(BaseAPIView):
+    def __init__(self, *args, **kwargs):
+        super().__init__(BackgroundJobService)
+
+    def post(self, request: Request) -> JsonResponse:
+        return JsonResponse({'code': status.HTTP_405_METHOD_NOT_ALLOWED})
+
+    def patch(self, request: Request) -> JsonResponse:
+        return JsonResponse({'code': status.HTTP_405_METHOD_NOT_ALLOWED})
+
+    def delete(self, request: Request) -> JsonResponse:
+        return JsonResponse({'code': status.HTTP_405_METHOD_NOT_ALLOWED})
+
+
+class MediaAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request, path: str) -> HttpResponse:
+        media_service = MediaService()
+        file_path: str | None = media_service.get_path(path)
+
+        if file_path is None:
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND}, status=status.HTTP_404_NOT_FOUND)
+
+        if not media_service.has_access(request.user, path):
+            return JsonResponse({'code': status.HTTP_403_FORBIDDEN}, status=status.HTTP_403_FORBIDDEN)
+
+        return serve_file(request, path, file_path)
+
+
+class SearchAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request) -> JsonResponse:
+        query: str = request.query_params.get('q', '').strip()
+
+        if not query:
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST})
+
+        try:
+            course_id: int | None = int(request.query_params['course']) \
+                if request.query_params.get('course') else None
+            limit: int = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        if limit < 1:
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        return JsonResponse({'code': status.HTTP_200_OK,
+                             'results': SearchService().search(request.user, query, course_id, limit)})
+
+
+class AnalyticsAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request) -> JsonResponse:
+        if not request.user.is_staff and not TeacherService().__model__.objects.filter(user=request.user).exists():
+            return JsonResponse({'code': status.HTTP_403_FORBIDDEN}, status=status.HTTP_403_FORBIDDEN)
+
+        evaluation_test_id: str | None = request.query_params.get('evaluation_test', None)
+        course_id: str | None = request.query_params.get('course', None)
+
+        if evaluation_test_id and EvaluationTestService().is_exist(evaluation_test_id):
+            return JsonResponse({'code': status.HTTP_200_OK,
+                                 'data': AnalyticsService().evaluation_test_statistics(int(evaluation_test_id))})
+
+        if course_id and CourseService().is_exist(course_id):
+            return JsonResponse({'code': status.HTTP_200_OK,
+                                 'data': AnalyticsService().course_statistics(int(course_id))})
+
+        for model_name, service in (('chair', ChairService), ('department', DepartmentService),
+                                    ('program', ProgramService), ('major', MajorService),
+                                    ('study_group', StudyGroupService)):
+            if not request.query_params.get(model_name, None):
+                continue
+
+            try:
+                object_id: int = int(request.query_params[model_name])
+            except ValueError:
+                return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+            if service().is_exist(object_id):
+                return JsonResponse({'code': status.HTTP_200_OK,
+                                     'data': OrgHierarchyService().rollup(service().__model__._meta.model_name,
+                                                                          object_id)})
+
+        return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+
+class NearDuplicatesAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request) -> JsonResponse:
+        if not request.user.is_staff and not TeacherService().__model__.objects.filter(user=request.user).exists():
+            return JsonResponse({'code': status.HTTP_403_FORBIDDEN}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            practice_id: int | None = int(request.query_params['practice']) \
+                if request.query_params.get('practice') else None
+            threshold: float | None = float(request.query_params['threshold']) \
+                if request.query_params.get('threshold') else None
+        except ValueError:
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        if threshold is not None and not 0 < threshold <= 1:
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        if practice_id is None or not PracticeService().is_exist(practice_id):
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+        return JsonResponse({'code': status.HTTP_200_OK,
+                             'clusters': SimilarityService().get_clusters(practice_id, threshold)})
+
+
+class DashboardAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request) -> JsonResponse:
+        student_id: int | None = EnrollmentService().get_student_id(request.user)
+
+        if request.query_params.get('student') and (request.user.is_staff or TeacherService().__model__.objects
+                                                    .filter(user=request.user).exists()):
+            try:
+                student_id = int(request.query_params['student'])
+            except ValueError:
+                return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        if student_id is None or not StudentService().is_exist(student_id):
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+        return JsonResponse({'code': status.HTTP_200_OK, 'data': DashboardService().get(student_id)})
+
+
+class LectureProgressAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request) -> JsonResponse:
+        try:
+            course_id: int | None = int(request.query_params['course']) \
+                if request.query_params.get('course') else None
+            student_id: int | None = int(request.query_params['student']) \
+                if request.query_params.get('student') else None
+        except ValueError:
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        if course_id is None or not CourseService().is_exist(course_id):
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+        is_teacher: bool = request.user.is_staff or \
+            TeacherService().__model__.objects.filter(user=request.user).exists()
+
+        if is_teacher and student_id is None:
+            return JsonResponse({'code': status.HTTP_200_OK,
+                                 'data': LectureProgressService().get_course_progress(course_id)})
+
+        if not is_teacher:
+            student_id = EnrollmentService().get_student_id(request.user)
+
+        if student_id is None:
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+        return JsonResponse({'code': status.HTTP_200_OK,
+                             'data': LectureProgressService().get_progress(student_id, course_id)})
+
+    def post(self, request: Request) -> JsonResponse:
+        student_id: int | None = EnrollmentService().get_student_id(request.user)
+
+        if request.data.get('lecture', None) in (None, ''):
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+        lecture_id: int | None = parse_id(request.data['lecture'])
+
+        if lecture_id is None:
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        if student_id is None or not LectureService().is_exist(lecture_id):
+            return JsonResponse({'code': status.HTTP_404_NOT_FOUND})
+
+        return JsonResponse({'code': status.HTTP_200_OK,
+                             'courses': LectureProgressService().mark_read(student_id, lecture_id)})
+
+
+class ChangeFeedAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request) -> HttpResponse:
+        if not request.user.is_staff:
+            return JsonResponse({'code': status.HTTP_403_FORBIDDEN}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            since: int = int(request.query_params.get('since', 0))
+            limit: int = min(int(request.query_params.get('limit', 10000)), 100000)
+        except ValueError:
+            return JsonResponse({'code': status.HTTP_400_BAD_REQUEST}, status=status.HTTP_400_BAD_REQUEST)
+
+        models: list[str] = [model for model in request.query_params.get('model', '').split(',') if model]
+        change_records = ChangeFeedService().stream(since, limit, models)
+
+        response = StreamingHttpResponse((json.dumps(change_record, cls=DjangoJSONEncoder) + '\n'
+                                          for change_record in change_records),
+                                         content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-store'
+        return response
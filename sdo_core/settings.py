@@ -80,6 +80,75 @@ DEFAULT_PARSER_CLASSES = [
     'rest_framework.parsers.MultiPartParser',
 ]
 
+# Upper bounds for uploaded JSON files checked by validators.py before they are parsed
+JSON_UPLOAD_MAX_SIZE = 2 * 1024 * 1024
+
+JSON_UPLOAD_MAX_DEPTH = 32
+
+# Exam sessions keep autosaved answers in the cache and write them to the database every EXAM_AUTOSAVE_FLUSH_EVERY
+# saves or EXAM_AUTOSAVE_FLUSH_INTERVAL seconds, the cache must be shared between workers in production
+EXAM_AUTOSAVE_FLUSH_EVERY = 10
+
+EXAM_AUTOSAVE_FLUSH_INTERVAL = 60
+
+# Seconds a request may arrive after the exam time is over, to make up for network latency
+EXAM_SESSION_GRACE_PERIOD = 15
+
+# Background jobs executed by `manage.py run_workers`: failed jobs are retried after BACKGROUND_JOB_RETRY_DELAY
+# seconds (doubled on every attempt), jobs running longer than BACKGROUND_JOB_LOCK_TIMEOUT are considered lost
+BACKGROUND_JOB_RETRY_DELAY = 30
+
+BACKGROUND_JOB_LOCK_TIMEOUT = 600
+
+BACKGROUND_JOB_POLL_INTERVAL = 1
+
+# Share of the maximum score a result needs to count as passed in analytics
+ANALYTICS_PASS_RATIO = 0.5
+
+# Seconds a student's dashboard stays cached when nothing invalidates it earlier
+STUDENT_DASHBOARD_CACHE_TIMEOUT = 600
+
+# Admin changelists above this many rows show the planner's row estimate instead of an exact COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Change records younger than this many seconds are held back from the change feed, so rows committed out of id order
+# are not skipped by consumers
+CHANGE_FEED_VISIBILITY_DELAY = 5
+
+# Seconds a response stored under an Idempotency-Key is replayed for retries
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Seconds an unfinished Idempotency-Key request holds its key before a retry may run it again
+IDEMPOTENCY_LEASE_SECONDS = 5 * 60
+
+# Estimated share of shared answer shingles above which practice answers are reported as near-duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Deadline reminders are sent this many days before a deadline, DEADLINE_REMINDER_BATCH_SIZE messages per batch
+DEADLINE_REMINDER_DAYS = (1, 3)
+
+DEADLINE_REMINDER_BATCH_SIZE = 100
+
+# Mail is printed to the console during development, switch to the SMTP backend (or the file-based one with
+# EMAIL_FILE_PATH) to deliver it
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Seconds a student's enrollment (and a user's student id) stays cached; signals invalidate it earlier on changes, the
+# timeout bounds how long a missed invalidation can keep stale access
+ENROLLMENT_CACHE_TIMEOUT = 60 * 60
+
+# Enrollment, exam autosaves, idempotency keys and dashboards are shared by every worker process, so the cache must be
+# shared as well; the table is created with `python manage.py createcachetable`
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'sdo_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    }
+}
+
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
@@ -157,6 +226,13 @@ MEDIA_DIR = BASE_DIR / 'data'
 MEDIA_ROOT = MEDIA_DIR
 
 MEDIA_URL = '/data/'
+
+# Protected media delivery: None streams files from Django, 'x-accel-redirect' hands them off to nginx
+# (internal location MEDIA_ACCEL_REDIRECT_LOCATION aliased to MEDIA_ROOT), 'x-sendfile' to apache/lighttpd
+MEDIA_SENDFILE_BACKEND = None
+
+MEDIA_ACCEL_REDIRECT_LOCATION = '/protected-data/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -1,3 +1,109 @@
+import re
+
+
+class JSONDepthScanner:
+    STRUCTURE_RE = re.compile(rb'[\\"\[\]{}]')
+
+    def __init__(self, max_depth: int):
+        self.max_depth: int = max_depth
+        self.depth: int = 0
+        self.in_string: bool = False
+        self.escaped_pos: int = -1
+
+    def feed(self, chunk: bytes) -> None:
+        from django.core.exceptions import ValidationError
+
+        for match in self.STRUCTURE_RE.finditer(chunk):
+            pos: int = match.start()
+
+            if pos == self.escaped_pos:
+                continue
+
+            char: int = chunk[pos]
+
+            if self.in_string:
+                if char == ord('\\'):
+                    self.escaped_pos = pos + 1
+                elif char == ord('"'):
+                    self.in_string = False
+                continue
+
+            if char == ord('"'):
+                self.in_string = True
+            elif char in b'[{':
+                self.depth += 1
+
+                if self.depth > self.max_depth:
+                    raise ValidationError(f'JSON nesting is too deep, maximum depth is {self.max_depth}.')
+            elif char in b']}':
+                self.depth -= 1
+
+        self.escaped_pos -= len(chunk)
+
+
+def parse_json_file(value):
+    import json
+    from django.conf import settings
+    from django.core.exceptions import ValidationError
+
+    upload = getattr(value, 'file', value)
+
+    for obj in (value, upload):
+        if hasattr(obj, 'parsed_json'):
+            return obj.parsed_json
+
+    max_size: int = getattr(settings, 'JSON_UPLOAD_MAX_SIZE', 2 * 1024 * 1024)
+    max_depth: int = getattr(settings, 'JSON_UPLOAD_MAX_DEPTH', 32)
+
+    if (getattr(value, 'size', None) or 0) > max_size:
+        raise ValidationError(f'File is too large, maximum size is {max_size} bytes.')
+
+    scanner = JSONDepthScanner(max_depth)
+    chunks: list = []
+    size: int = 0
+
+    upload.seek(0)
+
+    try:
+        while chunk := upload.read(64 * 1024):
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+
+            size += len(chunk)
+
+            if size > max_size:
+                raise ValidationError(f'File is too large, maximum size is {max_size} bytes.')
+
+            scanner.feed(chunk)
+            chunks.append(chunk)
+    finally:
+        upload.seek(0)
+
+    try:
+        parsed_json = json.loads(b''.join(chunks))
+    except (ValueError, RecursionError) as error:
+        raise ValidationError(f'Invalid JSON file: {error}.')
+
+    for obj in (value, upload):
+        try:
+            obj.parsed_json = parsed_json
+        except AttributeError:
+            pass
+
+    return parsed_json
+
+
+def parse_json_object_file(value) -> dict:
+    from django.core.exceptions import ValidationError
+
+    parsed_json = parse_json_file(value)
+
+    if not isinstance(parsed_json, dict):
+        raise ValidationError('JSON file must contain an object.')
+
+    return parsed_json
+
+
 def validate_file_extension(value):
     import os
     from django.core.exceptions import ValidationError
@@ -8,11 +114,9 @@ def validate_file_extension(value):
 
 
 def validate_lecture_materials_file(value):
-    import json
     from django.core.exceptions import ValidationError
 
-    lecture_materials: dict = json.loads(value.file.open('r').read()) if hasattr(value.file, 'open') \
-        else json.load(value.file)
+    lecture_materials: dict = parse_json_object_file(value)
 
     for key in lecture_materials.keys():
         if key not in ['text', 'files', 'links']:
@@ -20,11 +124,9 @@ def validate_lecture_materials_file(value):
 
 
 def validate_eval_criteria_file(value):
-    import json
     from django.core.exceptions import ValidationError
 
-    eval_criteria: dict = json.loads(value.file.open('r').read()) if hasattr(value.file, 'open') \
-        else json.load(value.file)
+    eval_criteria: dict = parse_json_object_file(value)
 
     for key in eval_criteria.keys():
         if key not in ['credit', 'grades']:
@@ -36,10 +138,9 @@ def validate_eval_criteria_file(value):
 
 
 def validate_question_file(value):
-    import json
     from django.core.exceptions import ValidationError
 
-    question: dict = json.loads(value.file.open('r').read())
+    question: dict = parse_json_object_file(value)
 
     for key in question.keys():
         if key not in ['question', 'answers', 'correct_answers']: